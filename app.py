@@ -1,10 +1,17 @@
 import os
+import time
 import logging
 from datetime import datetime
 from flask import Flask, jsonify
 from flask_cors import CORS
 from config import Config
-from routes.automation import automation_bp
+from routes.automation import automation_bp, clients, head_tracker, indexer, networks, price_sampler
+from utils.rpc_batch import RPCBatch
+from utils.json_provider import FastJSONProvider
+from utils.compression import ResponseCompressor
+from utils import metrics
+from utils.tracing import RequestTracer
+from routes.automation_async import automation_async_bp
 
 # Configurar logging
 logging.basicConfig(
@@ -15,11 +22,22 @@ logger = logging.getLogger(__name__)
 
 def create_app():
     """Factory function para criar a aplicação Flask"""
+    started = time.perf_counter()
     app = Flask(__name__)
     
     # Carregar configurações
     app.config.from_object(Config)
     
+    # Serialização JSON via orjson (fallback para stdlib) e compressão gzip/brotli das respostas
+    app.json = FastJSONProvider(app)
+    app.json.big_int_as_string = Config.JSON_BIG_INT_AS_STRING
+    ResponseCompressor(
+        app,
+        min_size=Config.COMPRESSION_MIN_SIZE,
+        gzip_level=Config.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=Config.COMPRESSION_BROTLI_QUALITY
+    )
+    
     # Validar configurações obrigatórias
     try:
         Config.validate_config()
@@ -39,8 +57,34 @@ def create_app():
         CORS(app)  # Permitir todas as origens para desenvolvimento
         logger.info("CORS configurado para todas as origens (desenvolvimento)")
     
+    # Métricas Prometheus de todas as rotas (/metrics)
+    metrics.init_app(app)
+    
+    # Trace das chamadas RPC por requisição (X-Debug-Trace ou amostragem); registrado após a
+    # compressão para que o campo _trace seja incluído antes de o corpo ser comprimido
+    RequestTracer(
+        app,
+        sample_rate=Config.TRACE_SAMPLE_RATE,
+        header_enabled=Config.TRACE_HEADER_ENABLED,
+        profile_dir=Config.TRACE_PROFILE_DIR,
+        max_calls=Config.TRACE_MAX_CALLS,
+        token=Config.TRACE_TOKEN
+    )
+    
     # Registrar blueprints
     app.register_blueprint(automation_bp, url_prefix='/api')
+    app.register_blueprint(automation_async_bp, url_prefix='/api/async')
+    
+    # Clientes Web3 compartilhados (aquecidos em background por worker, ver gunicorn.conf.py)
+    clients.init_app(app)
+    
+    # Iniciar indexador de eventos, se habilitado
+    if indexer is not None:
+        indexer.start()
+    
+    # Iniciar amostrador de preços, se habilitado
+    if price_sampler is not None:
+        price_sampler.start()
     
     # Rotas principais
     @app.route('/')
@@ -53,24 +97,32 @@ def create_app():
             "version": "1.0.0",
             "environment": os.environ.get('FLASK_ENV', 'development')
         })
-    
+
+    @app.route('/metrics')
+    def prometheus_metrics():
+        """Métricas no formato texto do Prometheus"""
+        return metrics.metrics_response(networks.head_trackers())
+
     @app.route('/health')
     def detailed_health_check():
         """Health check detalhado"""
         try:
-            from web3 import Web3
-            
-            # Verificar conectividade com BSC
-            rpc_url = app.config['BSC_RPC_URL']
-            w3 = Web3(Web3.HTTPProvider(rpc_url))
+            # Verificar conectividade com BSC (chainId e bloco em um único lote JSON-RPC)
+            w3 = clients.w3
+            rpc_url = w3.provider.endpoint_uri
             
             is_connected = False
             latest_block = None
+            chain_id = None
             
             try:
-                is_connected = w3.is_connected()
-                if is_connected:
-                    latest_block = w3.eth.block_number
+                batch = RPCBatch(w3)
+                chain_id_request = batch.chain_id()
+                block_request = batch.block_number()
+                batch.execute()
+                chain_id = chain_id_request.result()
+                latest_block = head_tracker.observe(block_request.result())
+                is_connected = True
             except Exception as e:
                 logger.error(f"Erro ao verificar conexão BSC: {str(e)}")
             
@@ -82,7 +134,10 @@ def create_app():
                 "bsc_connection": {
                     "connected": is_connected,
                     "rpc_url": rpc_url,
-                    "latest_block": latest_block
+                    "latest_block": latest_block,
+                    "chain_id": chain_id,
+                    "rpc_endpoints": w3.provider.stats(),
+                    "circuit_breaker": clients.breaker.stats()
                 },
                 "contracts": {
                     "brzstable_address": app.config['BRZSTABLE_ADDRESS'],
@@ -106,7 +161,7 @@ def create_app():
             "message": "Endpoint não encontrado",
             "timestamp": datetime.utcnow().isoformat()
         }), 404
-    
+
     @app.errorhandler(500)
     def internal_error(error):
         logger.error(f"Erro interno do servidor: {str(error)}")
@@ -115,7 +170,7 @@ def create_app():
             "message": "Erro interno do servidor",
             "timestamp": datetime.utcnow().isoformat()
         }), 500
-    
+
     @app.errorhandler(405)
     def method_not_allowed(error):
         return jsonify({
@@ -124,6 +179,7 @@ def create_app():
             "timestamp": datetime.utcnow().isoformat()
         }), 405
     
+    clients.startup["createAppMs"] = round((time.perf_counter() - started) * 1000, 2)
     return app
 
 # Criar aplicação
@@ -140,10 +196,13 @@ if __name__ == '__main__':
     logger.info(f"Host: {host}")
     logger.info(f"Porta: {port}")
     logger.info(f"Debug: {debug}")
-    logger.info(f"BSC RPC: {app.config['BSC_RPC_URL']}")
+    logger.info(f"BSC RPC: {', '.join(app.config['BSC_RPC_URLS'])}")
     logger.info(f"BRZStable: {app.config['BRZSTABLE_ADDRESS']}")
     logger.info(f"MockUSDT: {app.config['MOCKUSDT_ADDRESS']}")
     
+    if Config.WARMUP_ON_BOOT:
+        clients.warm_async()
+    
     try:
         app.run(
             host=host,
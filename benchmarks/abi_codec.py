@@ -0,0 +1,93 @@
+"""Compara a montagem e decodificação de leituras via ContractFunction do web3 e via codecs pré-compilados.
+
+Uso:
+    python benchmarks/abi_codec.py --items 500 --repeat 20
+
+Para cada caminho mede, por leitura: a criação da instância do contrato
+(w3.eth.contract, como o get_contract_instance original fazia a cada
+chamada), o encode do calldata (getPoolInfo + getTokenPrice por pool,
+getStablecoinInfo por stablecoin) e a decodificação do retorno, com os
+retornos gerados por benchmarks/fake_rpc.py. Nenhuma chamada de rede é feita.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web3 import Web3  # noqa: E402
+from benchmarks.fake_rpc import LIQUIDITY_MANAGER_ADDRESS, STABLECOIN_FACTORY_ADDRESS, FakeChain  # noqa: E402
+from routes.automation import (  # noqa: E402
+    LIQUIDITY_MANAGER, LIQUIDITY_MANAGER_ABI, STABLECOIN_FACTORY, STABLECOIN_FACTORY_ABI
+)
+from utils.multicall import Call  # noqa: E402
+
+
+def web3_path(w3, chain, pool_ids, stablecoin_ids):
+    """Caminho original: contrato por chamada + ContractFunction + decodificação genérica"""
+    manager = w3.eth.contract(address=Web3.to_checksum_address(LIQUIDITY_MANAGER_ADDRESS), abi=LIQUIDITY_MANAGER_ABI)
+    factory = w3.eth.contract(address=Web3.to_checksum_address(STABLECOIN_FACTORY_ADDRESS), abi=STABLECOIN_FACTORY_ABI)
+    calls = []
+    for pool_id in pool_ids:
+        calls.append(Call.from_function(manager.functions.getPoolInfo(pool_id)))
+        calls.append(Call.from_function(manager.functions.getTokenPrice(pool_id, True)))
+    calls.extend(Call.from_function(factory.functions.getStablecoinInfo(item)) for item in stablecoin_ids)
+    return calls
+
+
+def codec_path(chain, pool_ids, stablecoin_ids):
+    calls = []
+    for pool_id in pool_ids:
+        calls.append(LIQUIDITY_MANAGER.getPoolInfo.call(LIQUIDITY_MANAGER_ADDRESS, pool_id))
+        calls.append(LIQUIDITY_MANAGER.getTokenPrice.call(LIQUIDITY_MANAGER_ADDRESS, pool_id, True))
+    calls.extend(STABLECOIN_FACTORY.getStablecoinInfo.call(STABLECOIN_FACTORY_ADDRESS, item) for item in stablecoin_ids)
+    return calls
+
+
+def timed(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=500, help='quantidade de pools e de stablecoins')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    chain = FakeChain(pools=args.items, stablecoins=args.items)
+    w3 = Web3()
+    pool_ids, stablecoin_ids = chain.pool_ids, chain.stablecoin_ids
+
+    report = {"items": args.items, "calls": 2 * len(pool_ids) + len(stablecoin_ids)}
+    decoded = {}
+    for name, build in (
+        ("web3", lambda: web3_path(w3, chain, pool_ids, stablecoin_ids)),
+        ("codec", lambda: codec_path(chain, pool_ids, stablecoin_ids))
+    ):
+        encode_time, calls = timed(build, args.repeat)
+        returns = [chain.call(call.target, call.call_data)[1] for call in calls]
+        decode_time, values = timed(lambda: [call.decode(data) for call, data in zip(calls, returns)], args.repeat)
+        decoded[name] = values
+        report[name] = {
+            "encodeMs": round(encode_time * 1000, 3),
+            "decodeMs": round(decode_time * 1000, 3),
+            "perCallUs": round((encode_time + decode_time) / report["calls"] * 1e6, 2)
+        }
+
+    # Os dois caminhos devem produzir os mesmos valores (registros são tuplas)
+    report["identical"] = decoded["web3"] == decoded["codec"]
+    report["speedup"] = round(report["web3"]["perCallUs"] / report["codec"]["perCallUs"], 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Compara a vazão de requisições concorrentes entre o blueprint síncrono e o assíncrono.
+
+Uso:
+    python benchmarks/async_vs_sync.py --requests 200 --concurrency 1 8 32
+
+As leituras vão para o RPC configurado; o cache de respostas por bloco é
+desativado para que cada requisição pague as leituras on-chain.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+os.environ.setdefault('RESPONSE_CACHE_MAXSIZE', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.serving import make_server  # noqa: E402
+from app import create_app  # noqa: E402
+
+
+def run_load(url, total, concurrency):
+    latencies = []
+    errors = 0
+    session = requests.Session()
+
+    def hit(_):
+        started = time.perf_counter()
+        response = session.get(url, timeout=60)
+        return time.perf_counter() - started, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for latency, status_code in executor.map(hit, range(total)):
+            latencies.append(latency)
+            if status_code != 200:
+                errors += 1
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "reqPerSec": round(total / elapsed, 2),
+        "p50Ms": round(statistics.median(latencies) * 1000, 2),
+        "p95Ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--paths', nargs='+', default=['/api/status', '/api/async/status'])
+    args = parser.parse_args()
+
+    server = make_server('127.0.0.1', 0, create_app(), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    results = []
+    try:
+        for path in args.paths:
+            for concurrency in args.concurrency:
+                result = run_load(base_url + path, args.requests, concurrency)
+                result["path"] = path
+                results.append(result)
+    finally:
+        server.shutdown()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Saldos em lote (POST /api/tokens/<endereço>/balances) para conjuntos grandes de holders.
+
+Uso:
+    python benchmarks/balances.py --holders 10000 100000 --latency-ms 20
+
+Sobe benchmarks/fake_rpc.py e a API no gunicorn (1 worker) e, para cada
+tamanho, envia os holders em NDJSON com upload em streaming (chunked), lendo
+a resposta linha a linha. Reporta tempo, holders/s, chamadas eth_call
+recebidas pelo RPC (contra uma por holder do script ingênuo) e o pico de
+memória residente do worker, que deve ficar estável com o tamanho da entrada.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_rpc import derive_address, start_server  # noqa: E402
+from benchmarks.load import free_port, start_gunicorn  # noqa: E402
+
+TOKEN = '0xA991a6642ee368683A8308D79a3B6a46c535D851'
+
+
+def worker_peak_rss_mb(master_pid):
+    """VmHWM do(s) worker(s) do gunicorn, via /proc (None fora do Linux)"""
+    try:
+        with open(f'/proc/{master_pid}/task/{master_pid}/children') as f:
+            children = f.read().split()
+        peaks = []
+        for pid in children:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        peaks.append(int(line.split()[1]) / 1024)
+        return round(max(peaks), 1) if peaks else None
+    except OSError:
+        return None
+
+
+def upload(count):
+    for start in range(0, count, 1000):
+        yield "".join(derive_address('holder', i) + "\n" for i in range(start, min(count, start + 1000))).encode()
+
+
+def run(base_url, count, rpc_stats):
+    rpc_stats.reset()
+    started = time.perf_counter()
+    first_line = None
+    lines = 0
+    summary = None
+    with requests.post(
+        f'{base_url}/api/tokens/{TOKEN}/balances', data=upload(count),
+        headers={'Content-Type': 'application/x-ndjson'}, stream=True, timeout=600
+    ) as response:
+        for line in response.iter_lines():
+            if first_line is None:
+                first_line = time.perf_counter() - started
+            lines += 1
+            summary = line
+    elapsed = time.perf_counter() - started
+    summary = json.loads(summary)
+    eth_calls = rpc_stats.snapshot()["methods"].get("eth_call", 0)
+    return {
+        "holders": count,
+        "balances": lines - 1,
+        "failed": summary.get("failed"),
+        "seconds": round(elapsed, 2),
+        "firstLineMs": round(first_line * 1000, 1),
+        "holdersPerSecond": round(count / elapsed),
+        "ethCalls": eth_calls,
+        "naiveEthCalls": count
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--holders', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+    args.workers = 1
+    args.pools = args.stablecoins = 10
+    args.no_cache = False
+
+    rpc_server, rpc_url, rpc_stats = start_server(pools=10, stablecoins=10, latency_ms=args.latency_ms)
+    process, base_url = start_gunicorn(rpc_url, free_port(), args)
+    results = []
+    try:
+        for count in args.holders:
+            result = run(base_url, count, rpc_stats)
+            result["workerPeakRssMb"] = worker_peak_rss_mb(process.pid)
+            results.append(result)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        rpc_server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
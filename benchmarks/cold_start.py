@@ -0,0 +1,135 @@
+"""Benchmark de inicialização: import, create_app() e primeira requisição, com e sem aquecimento.
+
+Uso:
+    python benchmarks/cold_start.py --latency-ms 20 --paths /api/pools /api/stablecoins --gunicorn
+
+Cada cenário roda em um processo novo (import frio) apontando para
+benchmarks/fake_rpc.py. Mede o tempo de `import app` (que inclui
+create_app() e nunca chama o RPC), o aquecimento, a latência da primeira e da
+segunda requisição em cada rota e, com --gunicorn, o tempo até o primeiro 200
+com e sem `--preload`.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_rpc import LIQUIDITY_MANAGER_ADDRESS, STABLECOIN_FACTORY_ADDRESS, start_server  # noqa: E402
+from benchmarks.load import free_port, start_gunicorn  # noqa: E402
+
+DEFAULT_PATHS = ['/api/status', '/api/pools', '/api/stablecoins']
+
+# Executado em um interpretador novo para que o import seja realmente frio
+PROBE = """
+import json, os, sys, time
+started = time.perf_counter()
+import app as module
+import_ms = (time.perf_counter() - started) * 1000
+if os.environ.get("WARMUP_ON_BOOT") == "true":
+    # Como no post_worker_init do gunicorn, mas esperando o fim para medir as requisições aquecidas
+    module.clients.warm_async().join()
+client = module.app.test_client()
+requests_ms = {}
+for path in sys.argv[1:]:
+    timings = []
+    for _ in range(2):
+        t = time.perf_counter()
+        response = client.get(path)
+        timings.append(round((time.perf_counter() - t) * 1000, 2))
+    requests_ms[path] = {"status": response.status_code, "firstMs": timings[0], "secondMs": timings[1]}
+print(json.dumps({
+    "importMs": round(import_ms, 2),
+    "startup": module.clients.startup,
+    "requests": requests_ms
+}))
+"""
+
+
+def benchmark_env(rpc_url, warm):
+    return dict(
+        os.environ,
+        BSC_RPC_URLS=rpc_url,
+        LIQUIDITY_MANAGER_ADDRESS=LIQUIDITY_MANAGER_ADDRESS,
+        STABLECOIN_FACTORY_ADDRESS=STABLECOIN_FACTORY_ADDRESS,
+        BRZSTABLE_ADDRESS=os.environ.get('BRZSTABLE_ADDRESS', '0xA991a6642ee368683A8308D79a3B6a46c535D851'),
+        MOCKUSDT_ADDRESS=os.environ.get('MOCKUSDT_ADDRESS', '0x5Fc088c2890fAB8c481cFB6D0d16f15A7f75c760'),
+        WARMUP_ON_BOOT='true' if warm else 'false',
+        FLASK_ENV='production',
+        SECRET_KEY='benchmark'
+    )
+
+
+def run_probe(rpc_url, warm, paths):
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE] + paths,
+        cwd=ROOT, env=benchmark_env(rpc_url, warm), capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def time_to_first_200(rpc_url, args, preload):
+    os.environ.update(WARMUP_ON_BOOT='true', GUNICORN_CMD_ARGS='--preload' if preload else '')
+    started = time.perf_counter()
+    process, base_url = start_gunicorn(rpc_url, free_port(), args)
+    try:
+        ready_ms = (time.perf_counter() - started) * 1000
+        first = {}
+        for path in args.paths:
+            t = time.perf_counter()
+            status = requests.get(base_url + path, timeout=120).status_code
+            first[path] = {"status": status, "firstMs": round((time.perf_counter() - t) * 1000, 2)}
+        return {"preload": preload, "readyMs": round(ready_ms, 2), "requests": first}
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        os.environ.pop('GUNICORN_CMD_ARGS', None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pools', type=int, default=100)
+    parser.add_argument('--stablecoins', type=int, default=50)
+    parser.add_argument('--latency-ms', type=float, default=10.0, help='latência simulada por POST ao RPC')
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS)
+    parser.add_argument('--gunicorn', action='store_true', help='também mede o tempo até o primeiro 200 no gunicorn')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--output', help='também grava o JSON neste arquivo')
+    args = parser.parse_args()
+    # start_gunicorn() também é usado por load.py, que expõe --no-cache
+    args.no_cache = False
+
+    rpc_server, rpc_url, _ = start_server(pools=args.pools, stablecoins=args.stablecoins, latency_ms=args.latency_ms)
+    try:
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "config": {"pools": args.pools, "stablecoins": args.stablecoins, "rpcLatencyMs": args.latency_ms},
+            "coldStart": {
+                "warmup": run_probe(rpc_url, True, args.paths),
+                "noWarmup": run_probe(rpc_url, False, args.paths)
+            }
+        }
+        if args.gunicorn:
+            report["gunicorn"] = [time_to_first_200(rpc_url, args, preload) for preload in (False, True)]
+    finally:
+        rpc_server.shutdown()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
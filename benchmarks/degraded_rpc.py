@@ -0,0 +1,124 @@
+"""Latência e disponibilidade de status, pools e monitoramento com o RPC travado ou fora do ar.
+
+Uso:
+    python benchmarks/degraded_rpc.py --phase-seconds 20
+    python benchmarks/degraded_rpc.py --baseline   # sem respostas anteriores nem circuit breaker
+
+Sobe benchmarks/fake_rpc.py e a API no gunicorn (1 worker) e consulta
+/api/status, /api/pools e /api/monitor/system em sequência durante quatro
+fases: RPC normal, RPC travado (cada POST segura por --stall-seconds), RPC
+respondendo 503 e RPC recuperado. Para cada fase são reportados os
+percentis de latência, respostas com "stale": true, erros 5xx, os estados do
+circuit breaker e o campo blockchain.connected do monitoramento.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_rpc import start_server  # noqa: E402
+from benchmarks.load import free_port, start_gunicorn  # noqa: E402
+
+PATHS = ['/api/status', '/api/pools', '/api/monitor/system']
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 1)
+
+
+def run_phase(base_url, seconds):
+    """Consulta as rotas em sequência por `seconds` segundos"""
+    latencies = []
+    total = stale = errors = 0
+    breaker_states = set()
+    connected = set()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for path in PATHS:
+            total += 1
+            started = time.perf_counter()
+            try:
+                response = requests.get(base_url + path, timeout=120)
+                body = response.json()
+            except (requests.RequestException, ValueError):
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 500:
+                errors += 1
+            if body.get("stale"):
+                stale += 1
+            if path == '/api/monitor/system' and "blockchain" in body:
+                breaker_states.add(body["blockchain"]["circuitBreaker"]["state"])
+                connected.add(body["blockchain"]["connected"])
+        time.sleep(0.1)
+    return {
+        "requests": total,
+        "p50Ms": percentile(latencies, 0.5),
+        "p95Ms": percentile(latencies, 0.95),
+        "maxMs": round(max(latencies), 1) if latencies else None,
+        "meanMs": round(statistics.mean(latencies), 1) if latencies else None,
+        "stale": stale,
+        "errors": errors,
+        "breakerStates": sorted(breaker_states),
+        "connected": sorted(connected)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pools', type=int, default=50)
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--phase-seconds', type=float, default=20.0)
+    parser.add_argument('--stall-seconds', type=float, default=60.0)
+    parser.add_argument('--rpc-timeout', type=float, default=5.0)
+    parser.add_argument('--latency-budget', type=float, default=0.5)
+    parser.add_argument('--baseline', action='store_true', help='desativa respostas anteriores e circuit breaker')
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+    args.workers = 1
+    args.stablecoins = 10
+    args.no_cache = False
+
+    os.environ.update(
+        RPC_REQUEST_TIMEOUT=str(args.rpc_timeout),
+        BLOCK_POLL_INTERVAL='1',
+        STALE_LATENCY_BUDGET=str(args.latency_budget),
+        BREAKER_RESET_TIMEOUT='5'
+    )
+    if args.baseline:
+        os.environ.update(STALE_MAX_AGE='0', BREAKER_FAILURE_THRESHOLD='0')
+
+    rpc_server, rpc_url, _ = start_server(pools=args.pools, stablecoins=args.stablecoins, latency_ms=args.latency_ms,
+                                          block_time=1.0)
+    process, base_url = start_gunicorn(rpc_url, free_port(), args)
+    report = {"config": vars(args), "phases": {}}
+    phases = [
+        ("healthy", None, None),
+        ("stalled", args.stall_seconds, None),
+        ("http503", None, 503),
+        ("recovered", None, None)
+    ]
+    try:
+        for name, stall, status in phases:
+            rpc_server.faults.set(stall=stall, status=status)
+            report["phases"][name] = run_phase(base_url, args.phase_seconds)
+    finally:
+        rpc_server.faults.set()
+        process.terminate()
+        process.wait(timeout=30)
+        rpc_server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
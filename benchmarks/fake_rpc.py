@@ -0,0 +1,414 @@
+"""Servidor JSON-RPC local que simula a BSC para benchmarks.
+
+Uso:
+    python benchmarks/fake_rpc.py --port 8545 --pools 200 --stablecoins 100 --latency-ms 20
+    python benchmarks/fake_rpc.py --rate-limit 30   # como um RPC público: 429 acima de 30 chamadas/s
+
+Responde eth_blockNumber, eth_chainId, eth_getBalance, eth_getBlockByNumber,
+eth_getLogs e eth_call (ERC20, liquidity manager, factory, pares e
+Multicall3 aggregate3), inclusive em lotes; eth_getLogs devolve os logs
+registrados com FakeChain.add_log. A latência é aplicada a cada POST
+(uma ida e volta de rede); GET /stats retorna as chamadas recebidas e
+POST /reset zera os contadores. Com --rate-limit, chamadas JSON-RPC (cada
+item de um lote conta) acima do limite por segundo recebem HTTP 429 com
+Retry-After, como os endpoints públicos da BSC. POST /faults simula um nó
+degradado: {"stallMs": 30000} segura cada POST por 30s e {"status": 503}
+responde com o erro HTTP informado ({} volta ao normal). Com
+--max-batch-size, lotes maiores são rejeitados por inteiro com um único
+objeto de erro JSON-RPC, como nós que limitam o tamanho do lote.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from eth_abi import decode, encode
+from eth_utils import function_abi_to_4byte_selector
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.multicall import AGGREGATE3_INPUT_TYPES, AGGREGATE3_OUTPUT_TYPES, AGGREGATE3_SELECTOR, abi_type  # noqa: E402
+
+LIQUIDITY_MANAGER_ADDRESS = "0x00000000000000000000000000000000000b3001"
+STABLECOIN_FACTORY_ADDRESS = "0x00000000000000000000000000000000000b3002"
+MULTICALL3_ADDRESS = "0xca11bde05977b3631167028862be2a173976ca11"
+CHAIN_ID = 97
+
+
+def load_abis():
+    # As ABIs são as mesmas usadas pela API; importadas aqui para não duplicá-las
+    from routes.automation import ERC20_ABI, LIQUIDITY_MANAGER_ABI, PAIR_ABI, STABLECOIN_FACTORY_ABI
+    return ERC20_ABI + LIQUIDITY_MANAGER_ABI + STABLECOIN_FACTORY_ABI + PAIR_ABI
+
+
+def derive_address(*parts):
+    return "0x" + hashlib.sha256(":".join(map(str, parts)).encode()).hexdigest()[:40]
+
+
+def derive_id(*parts):
+    return hashlib.sha256(":".join(map(str, parts)).encode()).digest()
+
+
+class FakeChain:
+    """Estado sintético: tokens, pools (com pares) e stablecoins, com um bloco que avança no tempo"""
+
+    def __init__(self, pools=100, stablecoins=50, tokens=20, block_time=3.0, start_block=40_000_000, chain_id=CHAIN_ID):
+        self.chain_id = chain_id
+        self.block_time = block_time
+        self.start_block = start_block
+        self.started = time.time()
+        self.tokens = [derive_address("token", i) for i in range(tokens)]
+        self.pool_ids = [derive_id("pool", i) for i in range(pools)]
+        self.pools = {}
+        self.pairs = {}
+        for i, pool_id in enumerate(self.pool_ids):
+            token_a = self.tokens[i % tokens]
+            token_b = self.tokens[(i + 1) % tokens]
+            pair = derive_address("pair", i)
+            reserve = 10 ** 24 + i * 10 ** 21
+            # Preço em torno do peg, variando por pool
+            deviation = ((i * 37) % 41 - 20) / 1000
+            self.pools[pool_id] = (token_a, token_b, pair, reserve, i % 10 != 0, 1_700_000_000 + i, chain_id)
+            self.pairs[pair] = (token_a, reserve, int(reserve * (1 + deviation)))
+        self.stablecoin_ids = [derive_id("stablecoin", i) for i in range(stablecoins)]
+        self.stablecoins = {
+            stablecoin_id: (
+                derive_address("stablecoin", i),
+                LIQUIDITY_MANAGER_ADDRESS,
+                self.pool_ids[i % len(self.pool_ids)] if self.pool_ids else bytes(32),
+                (f"Stable {i}", f"STB{i}", self.tokens[i % tokens], 10 ** 24, 150, True, 1_700_000_000 + i)
+            )
+            for i, stablecoin_id in enumerate(self.stablecoin_ids)
+        }
+        # Logs devolvidos por eth_getLogs: (bloco, endereço, tópicos), acrescentados com add_log
+        self.logs = []
+        self.functions = {}
+        for item in load_abis():
+            if item.get("type") == "function":
+                self.functions[function_abi_to_4byte_selector(item)] = item
+
+    def block_number(self):
+        return self.start_block + int((time.time() - self.started) / self.block_time)
+
+    def add_log(self, address, topics, block_number=None):
+        """Registra um log do contrato no bloco informado (ou no atual)"""
+        block_number = self.block_number() if block_number is None else block_number
+        self.logs.append((block_number, address.lower(), [bytes(topic) for topic in topics]))
+
+    def get_logs(self, options):
+        from_block = int(options.get("fromBlock", "0x0"), 16)
+        to_block = self.block_number() if options.get("toBlock", "latest") == "latest" else int(options["toBlock"], 16)
+        addresses = options.get("address") or []
+        addresses = {address.lower() for address in ([addresses] if isinstance(addresses, str) else addresses)}
+        return [
+            {
+                "address": log_address,
+                "topics": ["0x" + topic.hex() for topic in topics],
+                "data": "0x",
+                "blockNumber": hex(number),
+                "blockHash": "0x" + derive_id("block", number).hex(),
+                "transactionHash": "0x" + derive_id("tx", number, index).hex(),
+                "transactionIndex": "0x0",
+                "logIndex": hex(index),
+                "removed": False
+            }
+            for index, (number, log_address, topics) in enumerate(self.logs)
+            if from_block <= number <= to_block and (not addresses or log_address in addresses)
+        ]
+
+    def call(self, to, data):
+        """Executa um eth_call; retorna (sucesso, bytes de retorno, nome da função)"""
+        to = to.lower()
+        selector, args_data = data[:4], data[4:]
+        if to == MULTICALL3_ADDRESS and selector == AGGREGATE3_SELECTOR:
+            (entries,) = decode(AGGREGATE3_INPUT_TYPES, args_data)
+            results = []
+            functions = []
+            for target, _, call_data in entries:
+                success, output, function = self.call(target, call_data)
+                results.append((success, output))
+                functions.append(function)
+            return True, encode(AGGREGATE3_OUTPUT_TYPES, [results]), ["aggregate3"] + functions
+
+        abi = self.functions.get(selector)
+        if abi is None:
+            return False, b"", "unknown"
+        name = abi["name"]
+        args = decode([abi_type(i) for i in abi["inputs"]], args_data)
+        values = self._dispatch(to, name, args)
+        if values is None:
+            return False, b"", name
+        return True, encode([abi_type(o) for o in abi["outputs"]], values), name
+
+    def _dispatch(self, to, name, args):
+        if to == LIQUIDITY_MANAGER_ADDRESS:
+            if name == "getAllPoolIds":
+                return [self.pool_ids]
+            if name == "getPoolInfo":
+                info = self.pools.get(args[0])
+                return [info] if info else None
+            if name == "getTokenPrice":
+                info = self.pools.get(args[0])
+                if info is None:
+                    return None
+                _, reserve0, reserve1 = self.pairs[info[2]]
+                return [reserve1 * 10 ** 18 // reserve0]
+            return None
+        if to == STABLECOIN_FACTORY_ADDRESS:
+            if name == "getAllStablecoinIds":
+                return [self.stablecoin_ids]
+            if name == "getStablecoinInfo":
+                info = self.stablecoins.get(args[0])
+                return [info] if info else None
+            return None
+        if to in self.pairs:
+            token0, reserve0, reserve1 = self.pairs[to]
+            if name == "getReserves":
+                return [reserve0, reserve1, int(time.time()) % 2 ** 32]
+            if name == "token0":
+                return [token0]
+            return None
+        # Qualquer outro endereço se comporta como um ERC20
+        suffix = to[-4:].upper()
+        erc20 = {
+            "name": [f"Token {suffix}"],
+            "symbol": [f"T{suffix}"],
+            "decimals": [18],
+            "totalSupply": [10 ** 27 + int(to[-6:], 16)],
+            "balanceOf": [int(args[0][-6:], 16) * 10 ** 15] if args else None
+        }
+        return erc20.get(name)
+
+    def handle(self, request, stats):
+        method = request.get("method")
+        params = request.get("params") or []
+        stats.record(method)
+        try:
+            if method == "eth_blockNumber":
+                result = hex(self.block_number())
+            elif method == "eth_chainId":
+                result = hex(self.chain_id)
+            elif method == "eth_getBalance":
+                result = hex(10 ** 18)
+            elif method == "eth_getBlockByNumber":
+                number = self.block_number() if params[0] in ("latest", "pending") else int(params[0], 16)
+                result = {
+                    "number": hex(number),
+                    "hash": "0x" + derive_id("block", number).hex(),
+                    "parentHash": "0x" + derive_id("block", number - 1).hex(),
+                    "timestamp": hex(int(self.started + (number - self.start_block) * self.block_time)),
+                    "transactions": []
+                }
+            elif method == "eth_getLogs":
+                result = self.get_logs(params[0])
+            elif method == "eth_call":
+                transaction = params[0]
+                data = bytes.fromhex((transaction.get("data") or transaction.get("input") or "0x")[2:])
+                success, output, functions = self.call(transaction["to"], data)
+                stats.record_functions(functions if isinstance(functions, list) else [functions])
+                if not success:
+                    return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32000, "message": "execution reverted"}}
+                result = "0x" + output.hex()
+            else:
+                return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32601, "message": "method not found"}}
+        except Exception as e:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32603, "message": str(e)}}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+
+class CallStats:
+    """Contadores de POSTs, chamadas JSON-RPC e funções de contrato recebidas"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.http_requests = 0
+            self.throttled = 0
+            self.rejected_batches = 0
+            self.methods = {}
+            self.functions = {}
+
+    def record_http(self):
+        with self._lock:
+            self.http_requests += 1
+
+    def record_throttled(self):
+        with self._lock:
+            self.throttled += 1
+
+    def record_rejected_batch(self):
+        with self._lock:
+            self.rejected_batches += 1
+
+    def record(self, method):
+        with self._lock:
+            self.methods[method] = self.methods.get(method, 0) + 1
+
+    def record_functions(self, functions):
+        with self._lock:
+            for function in functions:
+                self.functions[function] = self.functions.get(function, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "httpRequests": self.http_requests,
+                "throttled": self.throttled,
+                "rejectedBatches": self.rejected_batches,
+                "rpcCalls": sum(self.methods.values()),
+                "methods": dict(self.methods),
+                "functions": dict(self.functions)
+            }
+
+
+class Faults:
+    """Falhas simuladas em tempo de execução: nó travado (stall, em segundos) ou respondendo com erro HTTP"""
+
+    def __init__(self):
+        self.stall = None
+        self.status = None
+
+    def set(self, stall=None, status=None):
+        self.stall = stall
+        self.status = status
+
+
+class RateLimiter:
+    """Janela fixa de um segundo: no máximo `limit` chamadas JSON-RPC por janela"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._window = 0
+        self._count = 0
+
+    def allow(self, calls):
+        """Retorna None se permitido ou os segundos até a próxima janela"""
+        now = time.monotonic()
+        with self._lock:
+            window = int(now)
+            if window != self._window:
+                self._window, self._count = window, 0
+            if self._count + calls > self.limit:
+                return window + 1 - now
+            self._count += calls
+            return None
+
+
+def make_handler(chain, stats, latency, limiter=None, faults=None, max_batch_size=None):
+    class FakeRPCHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, body, status=200, headers=None):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._reply(stats.snapshot())
+            else:
+                self._reply({"error": "not found"}, 404)
+
+        def do_POST(self):
+            payload = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self.path == "/reset":
+                stats.reset()
+                self._reply({"status": "ok"})
+                return
+            if self.path == "/faults":
+                options = json.loads(payload or b"{}")
+                stall_ms = options.get("stallMs")
+                faults.set(stall=stall_ms / 1000 if stall_ms else None, status=options.get("status"))
+                self._reply({"status": "ok"})
+                return
+            stats.record_http()
+            if latency:
+                time.sleep(latency)
+            if faults is not None and faults.stall:
+                time.sleep(faults.stall)
+            if faults is not None and faults.status:
+                self._reply({"error": "fault injected"}, faults.status)
+                return
+            request = json.loads(payload)
+            if limiter is not None:
+                retry_after = limiter.allow(len(request) if isinstance(request, list) else 1)
+                if retry_after is not None:
+                    stats.record_throttled()
+                    self._reply({"error": "rate limit exceeded"}, 429, {"Retry-After": str(max(1, round(retry_after)))})
+                    return
+            if isinstance(request, list) and max_batch_size is not None and len(request) > max_batch_size:
+                stats.record_rejected_batch()
+                self._reply({
+                    "jsonrpc": "2.0", "id": None,
+                    "error": {"code": -32600, "message": f"batch size {len(request)} exceeds {max_batch_size}"}
+                })
+                return
+            if isinstance(request, list):
+                self._reply([chain.handle(item, stats) for item in request])
+            else:
+                self._reply(chain.handle(request, stats))
+
+    return FakeRPCHandler
+
+
+def start_server(host="127.0.0.1", port=0, pools=100, stablecoins=50, latency_ms=0.0, block_time=3.0,
+                 chain_id=CHAIN_ID, rate_limit=None, max_batch_size=None):
+    """Inicia o servidor em uma thread; retorna (servidor, url, estatísticas); server.faults simula falhas e server.chain é o estado"""
+    chain = FakeChain(pools=pools, stablecoins=stablecoins, block_time=block_time, chain_id=chain_id)
+    stats = CallStats()
+    limiter = RateLimiter(rate_limit) if rate_limit else None
+    faults = Faults()
+    server = ThreadingHTTPServer((host, port), make_handler(chain, stats, latency_ms / 1000, limiter, faults, max_batch_size))
+    server.faults = faults
+    server.chain = chain
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-rpc", daemon=True).start()
+    return server, f"http://{host}:{server.server_port}", stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8545)
+    parser.add_argument('--pools', type=int, default=100)
+    parser.add_argument('--stablecoins', type=int, default=50)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--block-time', type=float, default=3.0)
+    parser.add_argument('--chain-id', type=int, default=CHAIN_ID)
+    parser.add_argument('--rate-limit', type=int, default=None, help='chamadas JSON-RPC por segundo antes do 429')
+    parser.add_argument('--max-batch-size', type=int, default=None, help='lotes maiores são rejeitados por inteiro')
+    args = parser.parse_args()
+
+    server, url, _ = start_server(
+        args.host, args.port, args.pools, args.stablecoins, args.latency_ms, args.block_time, args.chain_id,
+        args.rate_limit, args.max_batch_size
+    )
+    print(json.dumps({
+        "url": url,
+        "liquidityManager": LIQUIDITY_MANAGER_ADDRESS,
+        "stablecoinFactory": STABLECOIN_FACTORY_ADDRESS
+    }))
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
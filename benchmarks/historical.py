@@ -0,0 +1,96 @@
+"""Custo em chamadas ao RPC de consultas históricas (?block=) repetidas, como um job de conciliação.
+
+Uso:
+    python benchmarks/historical.py --pools 200 --stablecoins 100 --blocks 5 --passes 2
+
+Sobe benchmarks/fake_rpc.py e a API no gunicorn (sem cache de respostas, para
+medir só o cache permanente) e, a cada passada, consulta /api/status,
+/api/pools e /api/stablecoins com ?block= em --blocks blocos já finalizados.
+A última passada roda depois de reiniciar o gunicorn, mostrando que o cache
+em ARCHIVE_CACHE_PATH sobrevive ao processo. Para cada passada são
+reportados o tempo e as chamadas eth_call recebidas pelo RPC.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_rpc import start_server  # noqa: E402
+from benchmarks.load import free_port, start_gunicorn  # noqa: E402
+
+PATHS = ['/api/status', '/api/pools', '/api/stablecoins']
+
+
+def run_pass(base_url, blocks, rpc_stats):
+    """Consulta cada rota em cada bloco; retorna (segundos, eth_calls, erros)"""
+    rpc_stats.reset()
+    errors = 0
+    started = time.perf_counter()
+    for block in blocks:
+        for path in PATHS:
+            response = requests.get(f'{base_url}{path}?block={block}', timeout=120)
+            if response.status_code != 200 or response.json().get("block") != block:
+                errors += 1
+    elapsed = time.perf_counter() - started
+    return elapsed, rpc_stats.snapshot()["methods"].get("eth_call", 0), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pools', type=int, default=200)
+    parser.add_argument('--stablecoins', type=int, default=100)
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--blocks', type=int, default=5, help='blocos históricos consultados por passada')
+    parser.add_argument('--passes', type=int, default=2, help='passadas com o mesmo processo')
+    parser.add_argument('--finality-depth', type=int, default=15)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+    args.no_cache = True
+
+    # Blocos de 0,1s: a profundidade de finalidade é atingida logo depois da inicialização
+    rpc_server, rpc_url, rpc_stats = start_server(
+        pools=args.pools, stablecoins=args.stablecoins, latency_ms=args.latency_ms, block_time=0.1
+    )
+    archive_path = os.path.join(tempfile.mkdtemp(prefix='brzstable-archive-'), 'archive.db')
+    os.environ.update(
+        ARCHIVE_CACHE_PATH=archive_path,
+        FINALITY_DEPTH=str(args.finality_depth),
+        PAGE_MAX_LIMIT=str(max(args.pools, args.stablecoins))
+    )
+    report = {"config": vars(args), "passes": []}
+    try:
+        first_block = int(requests.post(rpc_url, json={
+            "jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber", "params": []
+        }, timeout=10).json()["result"], 16)
+        blocks = list(range(first_block, first_block + args.blocks))
+        time.sleep((args.blocks + args.finality_depth) * 0.1 + 1)
+
+        for restart in (False, True):
+            process, base_url = start_gunicorn(rpc_url, free_port(), args)
+            try:
+                for _ in range(1 if restart else args.passes):
+                    elapsed, eth_calls, errors = run_pass(base_url, blocks, rpc_stats)
+                    report["passes"].append({
+                        "afterRestart": restart,
+                        "seconds": round(elapsed, 3),
+                        "ethCalls": eth_calls,
+                        "errors": errors
+                    })
+                report["archive"] = requests.get(base_url + '/api/monitor/system', timeout=60).json()["cache"]["archive"]
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+    finally:
+        rpc_server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Compara tempo de serialização e tamanho das respostas de pools e stablecoins.
+
+Uso:
+    python benchmarks/json_encoding.py --items 500 --repeat 50
+
+Mede a serialização com o provider padrão do Flask e com FastJSONProvider
+(orjson, com e sem inteiros grandes como string), e o tamanho do corpo com
+gzip e brotli.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from utils.compression import ResponseCompressor, brotli  # noqa: E402
+from utils.json_provider import FastJSONProvider, orjson  # noqa: E402
+
+
+def random_address(rng):
+    return "0x" + "".join(rng.choice("0123456789abcdefABCDEF") for _ in range(40))
+
+
+def random_token(rng):
+    return {
+        "address": random_address(rng),
+        "name": "Token " + str(rng.randint(1, 999)),
+        "symbol": "TK" + str(rng.randint(1, 99)),
+        "decimals": 18,
+        "totalSupply": rng.randint(10 ** 20, 10 ** 30)
+    }
+
+
+def pools_payload(items, rng):
+    return {
+        "status": "success",
+        "pools": [{
+            "poolId": rng.randbytes(32).hex(),
+            "tokenA": random_token(rng),
+            "tokenB": random_token(rng),
+            "pairAddress": random_address(rng),
+            "liquidityAmount": rng.randint(10 ** 18, 10 ** 27),
+            "isActive": True,
+            "createdAt": 1700000000 + rng.randint(0, 10 ** 7),
+            "networkId": 97,
+            "currentPrice": rng.uniform(0.95, 1.05)
+        } for _ in range(items)],
+        "totalPools": items,
+        "incomplete": False,
+        "nextCursor": None
+    }
+
+
+def stablecoins_payload(items, rng):
+    return {
+        "status": "success",
+        "stablecoins": [{
+            "stablecoinId": rng.randbytes(32).hex(),
+            "token": random_token(rng),
+            "creator": random_address(rng),
+            "initialSupply": rng.randint(10 ** 20, 10 ** 30),
+            "createdAt": 1700000000 + rng.randint(0, 10 ** 7),
+            "isActive": True
+        } for _ in range(items)],
+        "totalStablecoins": items,
+        "incomplete": False,
+        "nextCursor": None
+    }
+
+
+def price_history_payload(items, rng):
+    points = []
+    for index in range(items * 4):
+        close = rng.uniform(0.98, 1.02)
+        points.append({
+            "time": 1700000000 + index * 60,
+            "open": close,
+            "high": close * 1.001,
+            "low": close * 0.999,
+            "close": close,
+            "pegDeviation": round((close - 1) * 100, 4)
+        })
+    return {"status": "success", "resolution": "1m", "points": points}
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    payloads = {
+        "pools": pools_payload(args.items, rng),
+        "stablecoins": stablecoins_payload(args.items, rng),
+        # Sem inteiros acima de 64 bits: caminho inteiro pelo orjson
+        "priceHistory": price_history_payload(args.items, rng)
+    }
+
+    app = Flask(__name__)
+    default_provider = DefaultJSONProvider(app)
+    fast_provider = FastJSONProvider(app)
+    string_provider = FastJSONProvider(app)
+    string_provider.big_int_as_string = True
+    compressor = ResponseCompressor()
+
+    results = {"items": args.items, "orjson": orjson is not None, "brotli": brotli is not None, "shapes": {}}
+    with app.app_context():
+        for name, payload in payloads.items():
+            body = fast_provider.dumps_bytes(payload)
+            sizes = {"identity": len(body), "gzip": len(compressor.compress(body, "gzip"))}
+            if brotli is not None:
+                sizes["br"] = len(compressor.compress(body, "br"))
+            results["shapes"][name] = {
+                "encodeMs": {
+                    "stdlib": timed(lambda: default_provider.dumps(payload), args.repeat),
+                    "fast": timed(lambda: fast_provider.dumps_bytes(payload), args.repeat),
+                    "fastBigIntString": timed(lambda: string_provider.dumps_bytes(payload), args.repeat)
+                },
+                "compressMs": {
+                    encoding: timed(lambda: compressor.compress(body, encoding), args.repeat)
+                    for encoding in sizes if encoding != "identity"
+                },
+                "bytes": sizes
+            }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""Benchmark de vazão e latência da API sob gunicorn, contra um RPC local simulado.
+
+Uso:
+    python benchmarks/load.py --pools 200 --stablecoins 100 --latency-ms 20 \\
+        --concurrency 1 8 32 --requests 200 --output results.json
+
+Sobe benchmarks/fake_rpc.py em uma thread, inicia create_app() no gunicorn
+apontando para ele e mede cada rota em concorrência crescente. O resultado
+(JSON) traz req/s, p50/p95/p99 e as chamadas ao RPC por requisição, para
+acompanhar regressões ao longo do tempo.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_rpc import LIQUIDITY_MANAGER_ADDRESS, STABLECOIN_FACTORY_ADDRESS, start_server  # noqa: E402
+
+DEFAULT_PATHS = ['/api/status', '/api/pools', '/api/stablecoins', '/health']
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def start_gunicorn(rpc_url, port, args):
+    env = dict(
+        os.environ,
+        BSC_RPC_URLS=rpc_url,
+        LIQUIDITY_MANAGER_ADDRESS=LIQUIDITY_MANAGER_ADDRESS,
+        STABLECOIN_FACTORY_ADDRESS=STABLECOIN_FACTORY_ADDRESS,
+        MULTICALL3_ADDRESS='0xcA11bde05977b3631167028862bE2a173976CA11',
+        BRZSTABLE_ADDRESS=os.environ.get('BRZSTABLE_ADDRESS', '0xA991a6642ee368683A8308D79a3B6a46c535D851'),
+        MOCKUSDT_ADDRESS=os.environ.get('MOCKUSDT_ADDRESS', '0x5Fc088c2890fAB8c481cFB6D0d16f15A7f75c760'),
+        PAGE_MAX_LIMIT=str(max(args.pools, args.stablecoins)),
+        FLASK_ENV='production',
+        SECRET_KEY='benchmark'
+    )
+    if args.no_cache:
+        env['RESPONSE_CACHE_MAXSIZE'] = '0'
+    command = [
+        sys.executable, '-m', 'gunicorn', 'app:app',
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', str(args.workers),
+        '--worker-class', 'gthread',
+        '--threads', str(args.threads),
+        '--log-level', 'warning'
+    ]
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn encerrou com código {process.returncode}')
+        try:
+            requests.get(base_url + '/', timeout=2)
+            return process, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn não respondeu em 30s')
+
+
+def run_load(url, total, concurrency):
+    session = requests.Session()
+
+    def hit(_):
+        started = time.perf_counter()
+        response = session.get(url, timeout=120)
+        return time.perf_counter() - started, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(hit, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in samples)
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": sum(1 for _, status in samples if status != 200),
+        "reqPerSec": round(total / elapsed, 2),
+        "p50Ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95Ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99Ms": round(percentile(latencies, 0.99) * 1000, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pools', type=int, default=100)
+    parser.add_argument('--stablecoins', type=int, default=50)
+    parser.add_argument('--latency-ms', type=float, default=10.0, help='latência simulada por POST ao RPC')
+    parser.add_argument('--block-time', type=float, default=3.0)
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--no-cache', action='store_true', help='desativa o cache de respostas por bloco')
+    parser.add_argument('--output', help='também grava o JSON neste arquivo')
+    args = parser.parse_args()
+
+    rpc_server, rpc_url, rpc_stats = start_server(
+        pools=args.pools, stablecoins=args.stablecoins, latency_ms=args.latency_ms, block_time=args.block_time
+    )
+    process, base_url = start_gunicorn(rpc_url, free_port(), args)
+
+    results = []
+    try:
+        for path in args.paths:
+            for concurrency in args.concurrency:
+                for _ in range(args.warmup):
+                    requests.get(base_url + path, timeout=120)
+                rpc_stats.reset()
+                result = run_load(base_url + path, args.requests, concurrency)
+                upstream = rpc_stats.snapshot()
+                result.update({
+                    "path": path,
+                    "rpcHttpPerRequest": round(upstream["httpRequests"] / args.requests, 3),
+                    "rpcCallsPerRequest": round(upstream["rpcCalls"] / args.requests, 3),
+                    "rpcMethods": upstream["methods"],
+                    "contractFunctions": upstream["functions"]
+                })
+                results.append(result)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        rpc_server.shutdown()
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {
+            "pools": args.pools,
+            "stablecoins": args.stablecoins,
+            "rpcLatencyMs": args.latency_ms,
+            "workers": args.workers,
+            "threads": args.threads,
+            "responseCache": not args.no_cache
+        },
+        "results": results
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Carga com prioridades mistas contra um RPC local que limita as chamadas por segundo (HTTP 429).
+
+Uso:
+    python benchmarks/rpc_budget.py --rate-limit 40 --duration 15 --bulk 16 --interactive 4 --critical 4
+
+Sobe benchmarks/fake_rpc.py com --rate-limit e, para cada modo, inicia a API
+no gunicorn e mantém ao mesmo tempo clientes de listagem (/api/pools, bulk),
+de status (/api/status, interactive) e de arbitragem
+(/api/arbitrage/opportunities, critical) durante --duration segundos. O modo
+"sem orçamento" (RPC_RATE_LIMIT=0) mostra o comportamento anterior; no modo
+"orçamento" o limite de cada worker é --budget-fraction do limite do RPC
+dividido pelos workers. Para cada classe são reportados respostas 200, 503
+(recusadas com Retry-After), outros erros e latências, além dos 429 do RPC.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_rpc import start_server  # noqa: E402
+from benchmarks.load import free_port, percentile, start_gunicorn  # noqa: E402
+
+CLASSES = {
+    "bulk": "/api/pools",
+    "interactive": "/api/status",
+    "critical": "/api/arbitrage/opportunities"
+}
+
+
+def run_clients(base_url, clients, duration):
+    """Mantém `clients[classe]` clientes em laço por `duration` segundos; retorna as amostras por classe"""
+    samples = {name: [] for name in CLASSES}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(name):
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                status = session.get(base_url + CLASSES[name], timeout=60).status_code
+            except requests.RequestException:
+                status = None
+            with lock:
+                samples[name].append((status, time.perf_counter() - started))
+
+    threads = [
+        threading.Thread(target=client, args=(name,), daemon=True)
+        for name, count in clients.items() for _ in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def summarize(samples):
+    report = {}
+    for name, entries in samples.items():
+        statuses = Counter(status for status, _ in entries)
+        latencies = sorted(latency for status, latency in entries if status == 200)
+        report[name] = {
+            "requests": len(entries),
+            "ok": statuses.get(200, 0),
+            "shed503": statuses.get(503, 0),
+            "otherErrors": len(entries) - statuses.get(200, 0) - statuses.get(503, 0),
+            "p50Ms": round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+            "p95Ms": round(percentile(latencies, 0.95) * 1000, 2) if latencies else None
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rate-limit', type=int, default=40, help='chamadas JSON-RPC/s aceitas pelo RPC simulado')
+    parser.add_argument('--budget-fraction', type=float, default=0.8)
+    parser.add_argument('--pools', type=int, default=100)
+    parser.add_argument('--stablecoins', type=int, default=50)
+    parser.add_argument('--latency-ms', type=float, default=10.0)
+    parser.add_argument('--block-time', type=float, default=0.5)
+    parser.add_argument('--poll-interval', type=float, default=0.5, help='BLOCK_POLL_INTERVAL da API')
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--bulk', type=int, default=16)
+    parser.add_argument('--interactive', type=int, default=4)
+    parser.add_argument('--critical', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=32)
+    args = parser.parse_args()
+    # Sem cache de respostas: cada requisição depende do orçamento
+    args.no_cache = True
+
+    rpc_server, rpc_url, rpc_stats = start_server(
+        pools=args.pools, stablecoins=args.stablecoins, latency_ms=args.latency_ms, block_time=args.block_time,
+        rate_limit=args.rate_limit
+    )
+    clients = {"bulk": args.bulk, "interactive": args.interactive, "critical": args.critical}
+    per_worker = args.rate_limit * args.budget_fraction / args.workers
+    report = {
+        "config": {
+            "rateLimit": args.rate_limit,
+            "budgetPerWorker": per_worker,
+            "workers": args.workers,
+            "clients": clients,
+            "durationSeconds": args.duration
+        }
+    }
+    try:
+        for mode, rate in (("noBudget", 0), ("budget", per_worker)):
+            os.environ.update(
+                RPC_RATE_LIMIT=str(rate),
+                RPC_RATE_BURST=str(max(1, per_worker)),
+                BLOCK_POLL_INTERVAL=str(args.poll_interval)
+            )
+            process, base_url = start_gunicorn(rpc_url, free_port(), args)
+            try:
+                # Aguarda a janela do limite do RPC zerar depois da inicialização
+                time.sleep(2)
+                rpc_stats.reset()
+                samples = run_clients(base_url, clients, args.duration)
+                upstream = rpc_stats.snapshot()
+                monitor = requests.get(base_url + '/api/monitor/system', timeout=60).json()
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+            report[mode] = {
+                "classes": summarize(samples),
+                "rpcCallsPerSecond": round(upstream["rpcCalls"] / args.duration, 2),
+                "rpc429": upstream["throttled"],
+                "budget": monitor.get("metrics", {}).get("rpcBudget")
+            }
+            time.sleep(2)
+    finally:
+        rpc_server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
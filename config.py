@@ -10,8 +10,132 @@ class Config:
     
     # Configurações da Blockchain
     BSC_RPC_URL = os.environ.get('BSC_RPC_URL', 'https://data-seed-prebsc-1-s1.bnbchain.org:8545')
+    bsc_rpc_urls_str = os.environ.get('BSC_RPC_URLS', '')
+    BSC_RPC_URLS = [url.strip() for url in bsc_rpc_urls_str.split(',') if url.strip()] or [BSC_RPC_URL]
     BRZSTABLE_ADDRESS = os.environ.get('BRZSTABLE_ADDRESS')
     MOCKUSDT_ADDRESS = os.environ.get('MOCKUSDT_ADDRESS')
+    LIQUIDITY_MANAGER_ADDRESS = os.environ.get('LIQUIDITY_MANAGER_ADDRESS', '0x0000000000000000000000000000000000000000')
+    STABLECOIN_FACTORY_ADDRESS = os.environ.get('STABLECOIN_FACTORY_ADDRESS', '0x0000000000000000000000000000000000000000')
+    
+    # Configurações multi-rede (a rede padrão usa as variáveis acima; as demais vêm de NETWORKS_FILE)
+    DEFAULT_CHAIN_ID = int(os.environ.get('DEFAULT_CHAIN_ID', 97))
+    NETWORKS_FILE = os.environ.get('NETWORKS_FILE') or None
+    NETWORK_QUERY_TIMEOUT = float(os.environ.get('NETWORK_QUERY_TIMEOUT', 5))
+    NETWORK_MAX_WORKERS = int(os.environ.get('NETWORK_MAX_WORKERS', 8))
+    
+    # Configurações do pool de endpoints RPC
+    RPC_REQUEST_TIMEOUT = float(os.environ.get('RPC_REQUEST_TIMEOUT', 10))
+    RPC_MAX_ATTEMPTS = int(os.environ.get('RPC_MAX_ATTEMPTS', 3))
+    # Hedge (mesma leitura no segundo endpoint se o primeiro demorar): desativado por padrão, já que
+    # duplica chamadas; quando ativo, só sai com orçamento livre na classe bulk
+    RPC_HEDGE_ENABLED = os.environ.get('RPC_HEDGE_ENABLED', 'false').lower() == 'true'
+    RPC_HEDGE_DELAY = float(os.environ['RPC_HEDGE_DELAY']) if os.environ.get('RPC_HEDGE_DELAY') else None
+    RPC_EWMA_ALPHA = float(os.environ.get('RPC_EWMA_ALPHA', 0.2))
+    RPC_BATCH_MAX_SIZE = int(os.environ.get('RPC_BATCH_MAX_SIZE', 100))
+    
+    # Orçamento de chamadas por endpoint RPC (por processo): chamadas/s, rajada e espera máxima na fila.
+    # RPC_RATE_LIMITS sobrescreve por URL, ex: {"https://rpc...": {"rate": 10, "burst": 20}}; 0 desativa
+    RPC_RATE_LIMIT = float(os.environ.get('RPC_RATE_LIMIT', 25))
+    RPC_RATE_BURST = float(os.environ.get('RPC_RATE_BURST', 50))
+    RPC_RATE_LIMITS = os.environ.get('RPC_RATE_LIMITS') or None
+    RPC_BUDGET_MAX_WAIT = float(os.environ.get('RPC_BUDGET_MAX_WAIT', 2))
+    RPC_BACKOFF_BASE = float(os.environ.get('RPC_BACKOFF_BASE', 1))
+    RPC_BACKOFF_MAX = float(os.environ.get('RPC_BACKOFF_MAX', 60))
+    
+    # Circuit breaker do RPC por rede: abre após N chamadas seguidas que falharam em todos os endpoints
+    # (0 desativa) e libera uma chamada de teste a cada BREAKER_RESET_TIMEOUT segundos
+    BREAKER_FAILURE_THRESHOLD = int(os.environ.get('BREAKER_FAILURE_THRESHOLD', 5))
+    BREAKER_RESET_TIMEOUT = float(os.environ.get('BREAKER_RESET_TIMEOUT', 15))
+    
+    # Configurações de agregação de chamadas (Multicall3)
+    MULTICALL3_ADDRESS = os.environ.get('MULTICALL3_ADDRESS', '0xcA11bde05977b3631167028862bE2a173976CA11')
+    MULTICALL_CHUNK_SIZE = int(os.environ.get('MULTICALL_CHUNK_SIZE', 200))
+    
+    # Configurações de cache de metadados de tokens
+    TOKEN_CACHE_MAXSIZE = int(os.environ.get('TOKEN_CACHE_MAXSIZE', 1024))
+    TOKEN_SUPPLY_TTL = float(os.environ.get('TOKEN_SUPPLY_TTL', 15))
+    
+    # Cache compartilhado de leituras da chain: memory (por processo), shm (workers do host) ou redis
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory').lower()
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_SHM_DIR = os.environ.get('CACHE_SHM_DIR') or None
+    CACHE_MAXSIZE = int(os.environ.get('CACHE_MAXSIZE', 10000))
+    CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'brzstable:')
+    CHAIN_READ_TTL = float(os.environ.get('CHAIN_READ_TTL', 30))
+    
+    # Consultas históricas (?block=): leituras em blocos com mais de FINALITY_DEPTH confirmações não mudam
+    # e vão para um cache permanente em SQLite (ARCHIVE_CACHE_PATH vazio desativa)
+    FINALITY_DEPTH = int(os.environ.get('FINALITY_DEPTH', 15))
+    ARCHIVE_CACHE_PATH = os.environ.get('ARCHIVE_CACHE_PATH', 'brzstable_archive.db') or None
+    
+    # Coalescência de leituras idênticas simultâneas: prazo de espera de quem reaproveita a leitura de outro
+    SINGLEFLIGHT_TIMEOUT = float(os.environ.get('SINGLEFLIGHT_TIMEOUT', 30))
+    
+    # Configurações do acompanhamento de blocos e cache de respostas
+    BLOCK_POLL_INTERVAL = float(os.environ.get('BLOCK_POLL_INTERVAL', 3))
+    RESPONSE_CACHE_MAXSIZE = int(os.environ.get('RESPONSE_CACHE_MAXSIZE', 256))
+    
+    # Última resposta boa de status, pools e monitoramento: servida com "stale": true se a leitura nova passar
+    # de STALE_LATENCY_BUDGET segundos ou o circuito do RPC estiver aberto, até STALE_MAX_AGE segundos de idade
+    STALE_LATENCY_BUDGET = float(os.environ.get('STALE_LATENCY_BUDGET', 2))
+    STALE_MAX_AGE = float(os.environ.get('STALE_MAX_AGE', 3600))
+    
+    # Configurações de busca paralela de pools e stablecoins
+    FANOUT_MAX_WORKERS = int(os.environ.get('FANOUT_MAX_WORKERS', 8))
+    FANOUT_BATCH_SIZE = int(os.environ.get('FANOUT_BATCH_SIZE', 50))
+    FANOUT_DEADLINE = float(os.environ.get('FANOUT_DEADLINE', 20))
+    PAGE_MAX_LIMIT = int(os.environ.get('PAGE_MAX_LIMIT', 500))
+    
+    # Consulta de saldos em lote (POST /api/tokens/<endereço>/balances): tamanho máximo do corpo JSON
+    # (listas maiores devem ser enviadas com um endereço por linha, lidas aos poucos)
+    BALANCES_MAX_JSON_SIZE = int(os.environ.get('BALANCES_MAX_JSON_SIZE', 10 * 1024 * 1024))
+    
+    # Configurações do indexador de eventos (SQLite)
+    INDEXER_ENABLED = os.environ.get('INDEXER_ENABLED', 'false').lower() == 'true'
+    INDEXER_DB_PATH = os.environ.get('INDEXER_DB_PATH', 'brzstable_index.db')
+    INDEXER_INTERVAL = float(os.environ.get('INDEXER_INTERVAL', 3))
+    INDEXER_LOG_CHUNK = int(os.environ.get('INDEXER_LOG_CHUNK', 2000))
+    INDEXER_REORG_DEPTH = int(os.environ.get('INDEXER_REORG_DEPTH', 15))
+    
+    # Configurações do histórico de preços
+    PRICE_SAMPLER_ENABLED = os.environ.get('PRICE_SAMPLER_ENABLED', 'false').lower() == 'true'
+    PRICE_HISTORY_DIR = os.environ.get('PRICE_HISTORY_DIR') or None
+    PRICE_HISTORY_RAW_CAPACITY = int(os.environ.get('PRICE_HISTORY_RAW_CAPACITY', 4096))
+    PRICE_HISTORY_BUCKET_CAPACITY = int(os.environ.get('PRICE_HISTORY_BUCKET_CAPACITY', 10080))
+    PEG_TARGET = float(os.environ.get('PEG_TARGET', 1.0))
+    
+    # Configurações do scanner de arbitragem (valores em unidades do token de cotação)
+    ARBITRAGE_POOL_FEE = float(os.environ.get('ARBITRAGE_POOL_FEE', 0.0025))
+    ARBITRAGE_GAS_COST = float(os.environ.get('ARBITRAGE_GAS_COST', 0.3))
+    ARBITRAGE_MIN_PROFIT = float(os.environ.get('ARBITRAGE_MIN_PROFIT', 1.0))
+    ARBITRAGE_MIN_DEVIATION = float(os.environ.get('ARBITRAGE_MIN_DEVIATION', 0.001))
+    ARBITRAGE_GRID_SIZE = int(os.environ.get('ARBITRAGE_GRID_SIZE', 32))
+    ARBITRAGE_MAX_TRADE_FRACTION = float(os.environ.get('ARBITRAGE_MAX_TRADE_FRACTION', 0.2))
+    
+    # Configurações do stream SSE (/api/stream)
+    STREAM_HEARTBEAT = float(os.environ.get('STREAM_HEARTBEAT', 15))
+    STREAM_QUEUE_SIZE = int(os.environ.get('STREAM_QUEUE_SIZE', 100))
+    STREAM_HISTORY_SIZE = int(os.environ.get('STREAM_HISTORY_SIZE', 500))
+    STREAM_RETRY_MS = int(os.environ.get('STREAM_RETRY_MS', 3000))
+    STREAM_ALERT_DEVIATION = float(os.environ.get('STREAM_ALERT_DEVIATION', 0.01))
+    
+    # Serialização e compressão das respostas
+    JSON_BIG_INT_AS_STRING = os.environ.get('JSON_BIG_INT_AS_STRING', 'false').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+    
+    # Trace de chamadas RPC por requisição
+    # Desativado por padrão: o trace expõe contratos e chamadas ao RPC; TRACE_TOKEN exige X-Debug-Token
+    TRACE_HEADER_ENABLED = os.environ.get('TRACE_HEADER_ENABLED', 'false').lower() == 'true'
+    TRACE_TOKEN = os.environ.get('TRACE_TOKEN') or None
+    TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 0.0))
+    TRACE_PROFILE_DIR = os.environ.get('TRACE_PROFILE_DIR') or None
+    TRACE_MAX_CALLS = int(os.environ.get('TRACE_MAX_CALLS', 200))
+    
+    # Aquecimento de ABIs e metadados de tokens em background, em cada worker já iniciado
+    # (nunca no import: com o RPC fora do ar, o boot esperaria pelo timeout)
+    WARMUP_ON_BOOT = os.environ.get('WARMUP_ON_BOOT', 'false').lower() == 'true'
     
     # Configurações CORS
     cors_origins_str = os.environ.get('CORS_ORIGINS', '')
@@ -23,7 +147,7 @@ class Config:
     
     # Configurações de rate limiting
     RATELIMIT_STORAGE_URL = os.environ.get('REDIS_URL', 'memory://')
-    
+
     @staticmethod
     def validate_config():
         """Valida se as configurações obrigatórias estão presentes"""
@@ -0,0 +1,35 @@
+import os
+import shutil
+
+
+def on_starting(server):
+    """Limpa métricas de execuções anteriores no diretório multiprocess do Prometheus"""
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Descarta os gauges "live" do worker que terminou"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    """Aquece clientes e metadados em background, no worker já carregado (nunca no master)"""
+    from config import Config
+    if Config.WARMUP_ON_BOOT:
+        from routes.automation import clients
+        clients.warm_async()
+
+
+def post_fork(server, worker):
+    """Com --preload, as threads iniciadas no master não existem no worker: reiniciá-las"""
+    if server.cfg.preload_app:
+        from routes.automation import indexer, price_sampler
+        if indexer is not None:
+            indexer.start()
+        if price_sampler is not None:
+            price_sampler.start()
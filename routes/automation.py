@@ -1,26 +1,227 @@
-from flask import Blueprint, jsonify, request
+from flask import (
+    Blueprint, Response, abort, current_app, g, has_request_context, jsonify, make_response, request, stream_with_context
+)
 from web3 import Web3
 import json
+import queue
 import requests
+import shutil
+import tempfile
 import time
 import logging
+from concurrent.futures import TimeoutError as FutureTimeout
 from datetime import datetime
+from config import Config
+from utils.multicall import aggregate, aggregate_chunk, decode_aggregate3, encode_aggregate3
+from utils.chain_head import BlockResponseCache, StaleResponseCache
+from utils.circuit_breaker import request_degraded
+from utils.fanout import bounded_imap, bounded_map, chunked, ichunked, windowed_imap
+from utils.networks import Network, NetworkRegistry
+from utils.shared_cache import create_archive, create_backend
+from utils.singleflight import SingleFlight
+from utils.abi_codec import ContractCodec
+from utils.clients import ZERO_ADDRESS
+from utils.rpc_budget import RPCBudgetExceeded, overload_response
+from utils.rpc_batch import RPCBatch
+from utils.indexer import EventIndexer
+from utils.price_history import PriceHistory, PriceSampler, invert_point
+from utils.arbitrage import scan_pools, rank_opportunities
+from utils.event_stream import BlockEventProducer, EventBroker
+from utils import metrics
 
 # Blueprint para rotas de automação multi-rede
 automation_bp = Blueprint('automation', __name__)
 
-# Configuração Web3 para BSC Testnet
-BSC_TESTNET_RPC = "https://data-seed-prebsc-1-s1.bnbchain.org:8545"
-w3 = Web3(Web3.HTTPProvider(BSC_TESTNET_RPC))
-
-# Endereços dos contratos (serão atualizados quando você implantar)
-CONTRACTS = {
+# Endereços dos contratos na rede padrão (serão atualizados quando você implantar)
+BSC_RPC_URLS = Config.BSC_RPC_URLS
+DEFAULT_CONTRACTS = {
     "MOCKUSDT": "0x5Fc088c2890fAB8c481cFB6D0d16f15A7f75c760",
     "BRZSTABLE": "0xA991a6642ee368683A8308D79a3B6a46c535D851",
-    "MULTI_LIQUIDITY_MANAGER": "0x0000000000000000000000000000000000000000",  # Será atualizado
-    "STABLECOIN_FACTORY": "0x0000000000000000000000000000000000000000"      # Será atualizado
+    "MULTI_LIQUIDITY_MANAGER": Config.LIQUIDITY_MANAGER_ADDRESS,  # Será atualizado
+    "STABLECOIN_FACTORY": Config.STABLECOIN_FACTORY_ADDRESS       # Será atualizado
+}
+
+# Cache de leituras da chain compartilhado entre workers (CACHE_BACKEND: memory, shm ou redis)
+cache_backend = create_backend(Config)
+
+# Cache permanente (SQLite) das leituras em blocos finalizados, compartilhado entre as redes
+archive_cache = create_archive(Config)
+
+# Registro de redes: cada uma com seus clientes Web3 (contratos memoizados, conexões abertas por
+# processo), bloco acompanhado em background e cache de metadados de tokens
+networks = NetworkRegistry.from_config(Config, Network(
+    Config, Config.DEFAULT_CHAIN_ID, "BSC Testnet", BSC_RPC_URLS, DEFAULT_CONTRACTS,
+    explorer="https://testnet.bscscan.com",
+    native_currency="tBNB",
+    dex={
+        "name": "PancakeSwap",
+        "factory": "0x6725F303b657a9451d8BA641348b6761A6CC7a17",
+        "router": "0xD99D1c33F9fC3444f8101754aBC46c52416550D1"
+    },
+    cache_backend=cache_backend,
+    archive=archive_cache
+))
+
+# Rede padrão: usada pelo indexador, histórico de preços, stream SSE e rotas sem ?chainId=
+default_network = networks.default
+CONTRACTS = default_network.contracts
+clients = default_network.clients
+w3 = clients.w3
+head_tracker = default_network.head_tracker
+token_cache = default_network.token_cache
+
+def current_head_tracker():
+    """Bloco da rede da requisição; sem cache para consultas a todas as redes (?chainId=all)"""
+    return None if g.get("all_networks") else networks.current().head_tracker
+
+def current_breaker():
+    """Circuit breaker do RPC da rede da requisição (None para ?chainId=all)"""
+    return None if g.get("all_networks") else networks.current().clients.breaker
+
+def finalize_response(response):
+    """503 quando o RPC recusou a leitura; respostas montadas com leituras que falharam não são cacheadas"""
+    response = overload_response(response)
+    if request_degraded() and not response.is_streamed:
+        response.cache_control.no_store = True
+    return response
+
+# Cache de respostas por bloco, separado por rede (o caminho e ?chainId= fazem parte da chave)
+response_cache = BlockResponseCache(
+    current_head_tracker, maxsize=Config.RESPONSE_CACHE_MAXSIZE, flight=SingleFlight(timeout=Config.SINGLEFLIGHT_TIMEOUT),
+    finalize=finalize_response
+)
+
+# Última resposta boa de status, pools e monitoramento, servida quando o RPC atrasa ou está fora
+stale_responses = StaleResponseCache(
+    current_head_tracker, current_breaker,
+    latency_budget=Config.STALE_LATENCY_BUDGET, max_age=Config.STALE_MAX_AGE, maxsize=Config.RESPONSE_CACHE_MAXSIZE
+)
+
+# Prioridade das chamadas ao RPC por rota (ver utils/rpc_budget.py): arbitragem e monitoramento passam
+# à frente das listagens completas; as demais rotas são "interactive"
+RPC_PRIORITIES = {
+    "detailed_health_check": "critical",
+    "automation.get_arbitrage_opportunities": "critical",
+    "automation.get_token_price": "critical",
+    "automation.get_token_price_history": "critical",
+    "automation.monitor_system": "critical",
+    "automation.stream_events": "critical",
+    "automation.get_all_pools": "bulk",
+    "automation.get_all_stablecoins": "bulk",
+    "automation.get_token_balances": "bulk",
+    "automation_async.get_all_pools": "bulk",
+    "automation_async.get_all_stablecoins": "bulk"
 }
 
+@automation_bp.before_app_request
+def select_rpc_priority():
+    g.rpc_priority = RPC_PRIORITIES.get(request.endpoint, "interactive")
+
+# Requisições recusadas por falta de orçamento do RPC viram 503 com Retry-After
+automation_bp.after_app_request(overload_response)
+
+# Rotas que aceitam ?chainId=all, consultando todas as redes ao mesmo tempo
+ALL_NETWORKS_ENDPOINTS = {"automation.get_status", "automation.get_arbitrage_opportunities"}
+
+# Rotas servidas só pela rede padrão (amostrador de preços e stream SSE)
+DEFAULT_NETWORK_ENDPOINTS = {"automation.get_token_price", "automation.get_token_price_history", "automation.stream_events"}
+
+@automation_bp.url_value_preprocessor
+def select_network(endpoint, values):
+    """Rede da requisição: /api/<chainId>/... ou ?chainId= (all nas rotas agregadas)"""
+    chain_id = (values or {}).pop('chain_id', None) or request.args.get('chainId')
+    if chain_id is None:
+        return
+    if str(chain_id).lower() == 'all':
+        if endpoint not in ALL_NETWORKS_ENDPOINTS:
+            abort(make_response(jsonify({
+                "status": "error",
+                "message": "chainId=all não é suportado nesta rota; informe uma rede"
+            }), 400))
+        g.all_networks = True
+        return
+    network = networks.get(chain_id)
+    if network is None:
+        abort(make_response(jsonify({
+            "status": "error",
+            "message": f"Rede não suportada: {chain_id}",
+            "supportedChainIds": [network.chain_id for network in networks]
+        }), 404))
+    if endpoint in DEFAULT_NETWORK_ENDPOINTS and network is not default_network:
+        abort(make_response(jsonify({
+            "status": "error",
+            "message": f"Rota disponível apenas na rede padrão ({default_network.chain_id})",
+            "supportedChainIds": [default_network.chain_id]
+        }), 400))
+    g.network = network
+
+# Rotas que aceitam ?block=<número|tag> (estado em um bloco histórico)
+HISTORICAL_ENDPOINTS = {
+    "automation.get_status", "automation.get_all_pools", "automation.get_all_stablecoins", "automation.get_token_balances",
+    "automation_async.get_status", "automation_async.get_all_pools", "automation_async.get_all_stablecoins"
+}
+BLOCK_TAGS = ("latest", "earliest", "pending", "safe", "finalized")
+
+def parse_block(value, head=None):
+    """Número (decimal ou 0x...) ou tag de bloco; levanta ValueError se inválido ou acima de `head`"""
+    value = value.strip().lower()
+    if value in BLOCK_TAGS:
+        return value
+    try:
+        block_number = int(value, 16) if value.startswith("0x") else int(value)
+    except ValueError:
+        raise ValueError(f"informe um número, um hexadecimal 0x... ou uma tag ({', '.join(BLOCK_TAGS)})") from None
+    if block_number < 0:
+        raise ValueError("bloco negativo")
+    if head is not None and block_number > head:
+        raise ValueError(f"bloco {block_number} ainda não existe (atual: {head})")
+    return block_number
+
+@automation_bp.before_request
+def select_block():
+    """Bloco das leituras da requisição (?block=), disponível via requested_block()"""
+    value = request.args.get('block')
+    if value is None:
+        return
+    if request.endpoint not in HISTORICAL_ENDPOINTS or g.get("all_networks"):
+        abort(make_response(jsonify({
+            "status": "error",
+            "message": "?block= é suportado apenas em /status, /pools, /stablecoins e /tokens/<endereço>/balances de uma rede"
+        }), 400))
+    tracker = networks.current().head_tracker
+    try:
+        # Sem leitura recente do bloco atual (ex: worker recém-iniciado), consulta a rede
+        head = tracker.latest()
+    except Exception:
+        head = tracker.block_number
+    try:
+        g.block_identifier = parse_block(value, head)
+    except ValueError as e:
+        abort(make_response(jsonify({"status": "error", "message": f"Bloco inválido: {e}"}), 400))
+
+def requested_block():
+    """Bloco pedido em ?block= ou "latest" (também fora de requisições, ex: threads de background)"""
+    block = g.get("block_identifier") if has_request_context() else None
+    return "latest" if block is None else block
+
+def block_fields():
+    """Campo "block" das respostas de consultas históricas (vazio sem ?block=)"""
+    block = requested_block()
+    return {} if block == "latest" else {"block": block}
+
+def network_results(fn):
+    """Executa fn(rede) em todas as redes ativas ao mesmo tempo (?chainId=all), com prazo por rede"""
+    started = time.perf_counter()
+    results = []
+    for network, result, error, elapsed in networks.query(fn, timeout=Config.NETWORK_QUERY_TIMEOUT):
+        entry = {"chainId": network.chain_id, "name": network.name, "elapsedMs": elapsed}
+        if error is None:
+            entry.update(status="success", **result)
+        else:
+            entry.update(status="error", message=error)
+        results.append(entry)
+    return results, round((time.perf_counter() - started) * 1000, 2)
+
 # ABIs simplificadas
 ERC20_ABI = [
     {
@@ -161,81 +362,829 @@ STABLECOIN_FACTORY_ABI = [
     }
 ]
 
+# Par de DEX (Uniswap V2 / PancakeSwap) usado pelos pools
+PAIR_ABI = [
+    {
+        "constant": True,
+        "inputs": [],
+        "name": "getReserves",
+        "outputs": [
+            {"name": "reserve0", "type": "uint112"},
+            {"name": "reserve1", "type": "uint112"},
+            {"name": "blockTimestampLast", "type": "uint32"}
+        ],
+        "type": "function"
+    },
+    {
+        "constant": True,
+        "inputs": [],
+        "name": "token0",
+        "outputs": [{"name": "", "type": "address"}],
+        "type": "function"
+    }
+]
+
+# Seletores conhecidos para rotular as métricas de eth_call por função do contrato
+for abi in (ERC20_ABI, LIQUIDITY_MANAGER_ABI, STABLECOIN_FACTORY_ABI, PAIR_ABI):
+    metrics.register_abi(abi)
+
+# Seletores e encoders/decoders eth_abi montados uma vez por função; as leituras das rotas
+# usam estes codecs em vez de ContractFunction do web3 (resolução da ABI a cada chamada)
+ERC20 = ContractCodec(ERC20_ABI)
+LIQUIDITY_MANAGER = ContractCodec(LIQUIDITY_MANAGER_ABI)
+STABLECOIN_FACTORY = ContractCodec(STABLECOIN_FACTORY_ABI)
+PAIR = ContractCodec(PAIR_ABI)
+
+# Indexador de eventos opcional: /pools e /stablecoins passam a responder a partir do SQLite
+indexer = EventIndexer(
+    w3, Config.INDEXER_DB_PATH, CONTRACTS, LIQUIDITY_MANAGER_ABI, STABLECOIN_FACTORY_ABI,
+    interval=Config.INDEXER_INTERVAL,
+    log_chunk=Config.INDEXER_LOG_CHUNK,
+    reorg_depth=Config.INDEXER_REORG_DEPTH,
+    multicall_address=Config.MULTICALL3_ADDRESS,
+    chunk_size=Config.MULTICALL_CHUNK_SIZE
+) if Config.INDEXER_ENABLED else None
+
 def get_contract_instance(address, abi):
-    """Cria instância de contrato Web3"""
+    """Instância de contrato Web3 da rede atual (memoizada no registro de clientes)"""
     try:
-        if address == "0x0000000000000000000000000000000000000000":
-            return None
-        return w3.eth.contract(address=Web3.to_checksum_address(address), abi=abi)
+        return networks.current().clients.contract(address, abi)
     except Exception as e:
         logging.error(f"Erro ao criar instância do contrato {address}: {e}")
         return None
 
-def get_token_info(token_address):
-    """Obtém informações básicas de um token ERC20"""
+def aggregate_calls(calls, block_identifier=None, cached=False):
+    """Executa leituras de contrato agregadas via Multicall3 na rede atual.
+    
+    Leituras idênticas em andamento em outra requisição são reaproveitadas em
+    vez de repetidas. Com cached=True, os retornos do bloco atual também vêm
+    do cache compartilhado e apenas as leituras ausentes vão ao RPC (ver
+    ChainReadCache). Sem block_identifier, vale o bloco da requisição
+    (?block=); leituras em um bloco já finalizado sempre passam pelo cache
+    permanente, então repetir a mesma consulta histórica não chama o RPC.
+    """
+    network = networks.current()
+    if block_identifier is None:
+        block_identifier = requested_block()
+    run = lambda pending: aggregate(
+        network.w3, pending,
+        chunk_size=Config.MULTICALL_CHUNK_SIZE,
+        block_identifier=block_identifier,
+        multicall_address=network.multicall_address
+    )
+    block_number = network.head_tracker.block_number
+    if isinstance(block_identifier, int):
+        cached = network.is_final(block_identifier)
+    elif cached and block_identifier == "latest":
+        try:
+            block_number = network.head_tracker.latest()
+        except Exception:
+            # Sem bloco conhecido não há como versionar as leituras
+            cached = False
+    else:
+        cached = False
+    return network.chain_reads.aggregate(
+        run, calls, block=block_number, block_identifier=block_identifier, cached=cached
+    )
+
+def read_cached(call):
+    """Leitura única pelo cache compartilhado (ex: getAllPoolIds); levanta erro se revertida"""
+    (success, value), = aggregate_calls([call], cached=True)
+    if not success:
+        raise ValueError(f"Leitura revertida em {call.target}")
+    return value
+
+def plan_token_calls(token_addresses, block_identifier="latest"):
+    """Separa o que já está em cache e monta as leituras que faltam para cada token.
+    
+    Retorna (tokens, pendentes, chamadas); tokens já vem preenchido para os acertos de cache.
+    Fora do bloco atual, o totalSupply em cache não vale e é sempre lido no bloco pedido.
+    """
+    network = networks.current()
+    historical = block_identifier != "latest"
+    token_addresses = list(dict.fromkeys(token_addresses))
+    tokens = {token_address: None for token_address in token_addresses}
+    calls = []
+    pending = []
+    for token_address in token_addresses:
+        try:
+            key = Web3.to_checksum_address(token_address)
+        except Exception as e:
+            logging.error(f"Endereço de token inválido {token_address}: {e}")
+            continue
+        
+        metadata = network.token_cache.get_metadata(key)
+        total_supply = None if historical else network.token_cache.get_supply(key, block=network.head_tracker.block_number)
+        if metadata is not None and total_supply is not None:
+            tokens[token_address] = {"address": token_address, **metadata, "totalSupply": total_supply}
+            continue
+        
+        if key == ZERO_ADDRESS:
+            continue
+        token_calls = []
+        if metadata is None:
+            token_calls.extend([ERC20.name.call(key), ERC20.symbol.call(key), ERC20.decimals.call(key)])
+        if total_supply is None:
+            token_calls.append(ERC20.totalSupply.call(key))
+        pending.append((token_address, key, metadata, total_supply, len(calls), len(token_calls)))
+        calls.extend(token_calls)
+    return tokens, pending, calls
+
+def apply_token_results(tokens, pending, results, block_identifier="latest"):
+    """Preenche tokens e caches com o resultado das leituras planejadas em plan_token_calls"""
+    network = networks.current()
+    for token_address, key, metadata, total_supply, start, count in pending:
+        token_results = results[start:start + count]
+        if not all(success for success, _ in token_results):
+            logging.error(f"Erro ao obter informações do token {token_address}: chamada revertida")
+            continue
+        values = [value for _, value in token_results]
+        if metadata is None:
+            metadata = {"name": values[0], "symbol": values[1], "decimals": values[2]}
+            network.token_cache.set_metadata(key, metadata)
+        if total_supply is None:
+            total_supply = values[-1]
+            if block_identifier == "latest":
+                network.token_cache.set_supply(key, total_supply, block=network.head_tracker.block_number)
+        tokens[token_address] = {"address": token_address, **metadata, "totalSupply": total_supply}
+    return tokens
+
+def get_tokens_info(token_addresses, block_identifier=None):
+    """Obtém informações básicas de vários tokens ERC20, buscando apenas o que não está em cache.
+    
+    Sem block_identifier, o totalSupply é o do bloco da requisição (?block=).
+    """
+    if block_identifier is None:
+        block_identifier = requested_block()
+    tokens, pending, calls = plan_token_calls(token_addresses, block_identifier)
+    if not calls:
+        return tokens
     try:
-        contract = get_contract_instance(token_address, ERC20_ABI)
-        if not contract:
-            return None
-            
-        return {
-            "address": token_address,
-            "name": contract.functions.name().call(),
-            "symbol": contract.functions.symbol().call(),
-            "decimals": contract.functions.decimals().call(),
-            "totalSupply": contract.functions.totalSupply().call()
-        }
+        results = aggregate_calls(calls, block_identifier)
+    except RPCBudgetExceeded:
+        raise
     except Exception as e:
-        logging.error(f"Erro ao obter informações do token {token_address}: {e}")
+        logging.error(f"Erro ao obter informações dos tokens: {e}")
+        return tokens
+    return apply_token_results(tokens, pending, results, block_identifier)
+
+def get_token_info(token_address, block_identifier=None):
+    """Obtém informações básicas de um token ERC20"""
+    return get_tokens_info([token_address], block_identifier)[token_address]
+
+def get_head_and_tokens_info(token_addresses):
+    """Obtém o bloco atual e informações de tokens em um único lote JSON-RPC.
+    
+    O bloco só é consultado se o acompanhamento em background não tiver
+    leitura recente, e os tokens só se não estiverem em cache.
+    """
+    network = networks.current()
+    tokens, pending, calls = plan_token_calls(token_addresses)
+    batch = RPCBatch(network.w3)
+    block_request = None if network.head_tracker.is_fresh() else batch.block_number()
+    chunk_requests = [
+        (chunk, batch.eth_call(network.multicall_address, encode_aggregate3(chunk)))
+        for chunk in chunked(calls, Config.MULTICALL_CHUNK_SIZE)
+    ]
+    batch.execute()
+    
+    if block_request is None:
+        latest_block = network.head_tracker.latest()
+    else:
+        latest_block = network.head_tracker.observe(block_request.result())
+    
+    results = []
+    for chunk, chunk_request in chunk_requests:
+        try:
+            results.extend(decode_aggregate3(chunk, chunk_request.result()))
+        except Exception as e:
+            logging.warning(f"aggregate3 falhou no lote JSON-RPC, repetindo fora do lote: {e}")
+            results.extend(aggregate_chunk(network.w3, chunk, multicall_address=network.multicall_address))
+    return latest_block, apply_token_results(tokens, pending, results)
+
+def pool_info_calls(liquidity_manager, pool_ids):
+    """Leituras de getPoolInfo de um lote de pools"""
+    return [LIQUIDITY_MANAGER.getPoolInfo.call(liquidity_manager.address, pool_id) for pool_id in pool_ids]
+
+def pool_calls(liquidity_manager, pool_ids):
+    """Leituras de getPoolInfo e getTokenPrice de um lote de pools, intercaladas"""
+    calls = []
+    for pool_id in pool_ids:
+        calls.append(LIQUIDITY_MANAGER.getPoolInfo.call(liquidity_manager.address, pool_id))
+        calls.append(LIQUIDITY_MANAGER.getTokenPrice.call(liquidity_manager.address, pool_id, True))
+    return calls
+
+def pool_token_addresses(results):
+    """Endereços de tokens referenciados pelos getPoolInfo bem-sucedidos"""
+    token_addresses = []
+    for success, pool_info in results[0::2]:
+        if success:
+            token_addresses.extend([pool_info[0], pool_info[1]])
+    return token_addresses
+
+def same_address(a, b):
+    """Compara endereços sem depender do checksum"""
+    return a.lower() == b.lower()
+
+def pool_matches(pool_info, active=None, token=None):
+    """Se o pool (getPoolInfo) passa nos filtros ?active= e ?token= (tokenA ou tokenB)"""
+    if active is not None and bool(pool_info[4]) != active:
+        return False
+    return token is None or same_address(pool_info[0], token) or same_address(pool_info[1], token)
+
+def stablecoin_matches(stablecoin_info, active=None, token=None):
+    """Se a stablecoin (getStablecoinInfo) passa nos filtros ?active= e ?token= (endereço ou colateral)"""
+    if active is not None and bool(stablecoin_info[3][5]) != active:
+        return False
+    return token is None or same_address(stablecoin_info[0], token) or same_address(stablecoin_info[3][2], token)
+
+def matching_ids(ids, results, matches, active=None, token=None):
+    """IDs cujas leituras (getPoolInfo ou getStablecoinInfo) passam nos filtros, na ordem original"""
+    return [item_id for item_id, (success, info) in zip(ids, results) if success and matches(info, active, token)]
+
+def filter_pool_ids(liquidity_manager, pool_ids, active=None, token=None):
+    """Pools que passam em ?active= e ?token=, antes da paginação (getPoolInfo de todos, em cache no bloco)"""
+    if active is None and token is None:
+        return pool_ids
+    results = aggregate_calls(pool_info_calls(liquidity_manager, pool_ids), cached=True)
+    return matching_ids(pool_ids, results, pool_matches, active, token)
+
+def filter_stablecoin_ids(factory, stablecoin_ids, active=None, token=None):
+    """Versão de filter_pool_ids para as stablecoins (getStablecoinInfo)"""
+    if active is None and token is None:
+        return stablecoin_ids
+    results = aggregate_calls(stablecoin_calls(factory, stablecoin_ids), cached=True)
+    return matching_ids(stablecoin_ids, results, stablecoin_matches, active, token)
+
+def build_pools(pool_ids, results, tokens):
+    """Monta a representação dos pools a partir das leituras agregadas, omitindo os que falharem"""
+    pools = []
+    for index, pool_id in enumerate(pool_ids):
+        try:
+            success, pool_info = results[index * 2]
+            if not success:
+                raise ValueError("getPoolInfo revertido")
+            
+            # Obter preço atual
+            price_success, price = results[index * 2 + 1]
+            price_formatted = price / 1e18 if price_success else 0
+            
+            pools.append({
+                "poolId": pool_id.hex(),
+                "tokenA": tokens[pool_info[0]],
+                "tokenB": tokens[pool_info[1]],
+                "pairAddress": pool_info[2],
+                "liquidityAmount": pool_info[3],
+                "isActive": pool_info[4],
+                "createdAt": pool_info[5],
+                "networkId": pool_info[6],
+                "currentPrice": price_formatted
+            })
+        
+        except Exception as e:
+            logging.error(f"Erro ao processar pool {pool_id.hex()}: {e}")
+            continue
+    return pools
+
+def load_pools(liquidity_manager, pool_ids):
+    """Carrega detalhes de um lote de pools, omitindo os que falharem"""
+    results = aggregate_calls(pool_calls(liquidity_manager, pool_ids), cached=True)
+    
+    # Obter informações de todos os tokens envolvidos de uma só vez
+    tokens = get_tokens_info(pool_token_addresses(results))
+    return build_pools(pool_ids, results, tokens)
+
+def stablecoin_calls(factory, stablecoin_ids):
+    """Leituras de getStablecoinInfo de um lote de stablecoins"""
+    return [STABLECOIN_FACTORY.getStablecoinInfo.call(factory.address, stablecoin_id) for stablecoin_id in stablecoin_ids]
+
+def build_stablecoins(stablecoin_ids, results, tokens):
+    """Monta a representação das stablecoins a partir das leituras agregadas, omitindo as que falharem"""
+    stablecoins = []
+    for stablecoin_id, (success, stablecoin_info) in zip(stablecoin_ids, results):
+        try:
+            if not success:
+                raise ValueError("getStablecoinInfo revertido")
+            
+            stablecoins.append({
+                "stablecoinId": stablecoin_id.hex(),
+                "address": stablecoin_info[0],
+                "liquidityManagerAddress": stablecoin_info[1],
+                "poolId": stablecoin_info[2].hex(),
+                "tokenInfo": tokens[stablecoin_info[0]],
+                "config": {
+                    "name": stablecoin_info[3][0],
+                    "symbol": stablecoin_info[3][1],
+                    "collateralToken": stablecoin_info[3][2],
+                    "initialSupply": stablecoin_info[3][3],
+                    "collateralRatio": stablecoin_info[3][4],
+                    "isActive": stablecoin_info[3][5],
+                    "createdAt": stablecoin_info[3][6]
+                }
+            })
+        
+        except Exception as e:
+            logging.error(f"Erro ao processar stablecoin {stablecoin_id.hex()}: {e}")
+            continue
+    return stablecoins
+
+def load_stablecoins(factory, stablecoin_ids):
+    """Carrega detalhes de um lote de stablecoins, omitindo as que falharem"""
+    results = aggregate_calls(stablecoin_calls(factory, stablecoin_ids), cached=True)
+    tokens = get_tokens_info([info[0] for success, info in results if success])
+    return build_stablecoins(stablecoin_ids, results, tokens)
+
+def list_pool_tokens():
+    """Tokens de cada pool do liquidity manager ({poolId: (tokenA, tokenB)})"""
+    liquidity_manager = get_contract_instance(networks.current().contracts["MULTI_LIQUIDITY_MANAGER"], LIQUIDITY_MANAGER_ABI)
+    if not liquidity_manager:
+        return {}
+    pool_ids = read_cached(LIQUIDITY_MANAGER.getAllPoolIds.call(liquidity_manager.address))
+    results = aggregate_calls(pool_info_calls(liquidity_manager, pool_ids), cached=True)
+    return {
+        pool_id.hex(): (pool_info[0], pool_info[1])
+        for pool_id, (success, pool_info) in zip(pool_ids, results) if success
+    }
+
+def read_pool_prices(pool_ids):
+    """Preço atual (getTokenPrice do token A) de cada pool, ou None se a leitura falhar"""
+    liquidity_manager = get_contract_instance(networks.current().contracts["MULTI_LIQUIDITY_MANAGER"], LIQUIDITY_MANAGER_ABI)
+    if not liquidity_manager:
+        return [None] * len(pool_ids)
+    results = aggregate_calls([
+        LIQUIDITY_MANAGER.getTokenPrice.call(liquidity_manager.address, bytes.fromhex(pool_id), True)
+        for pool_id in pool_ids
+    ], cached=True)
+    return [price / 1e18 if success else None for success, price in results]
+
+def warm_contracts():
+    """Constrói as instâncias dos contratos conhecidos de cada rede (processar a ABI é a parte cara)"""
+    for network in networks:
+        with networks.use(network):
+            get_contract_instance(network.contracts["MOCKUSDT"], ERC20_ABI)
+            get_contract_instance(network.contracts["BRZSTABLE"], ERC20_ABI)
+            get_contract_instance(network.contracts["MULTI_LIQUIDITY_MANAGER"], LIQUIDITY_MANAGER_ABI)
+            get_contract_instance(network.contracts["STABLECOIN_FACTORY"], STABLECOIN_FACTORY_ABI)
+
+def warm_token_metadata():
+    """Carrega name/symbol/decimals dos tokens principais, um multicall por rede, todas ao mesmo tempo"""
+    networks.query(
+        lambda network: get_tokens_info([network.contracts["MOCKUSDT"], network.contracts["BRZSTABLE"]]),
+        timeout=Config.NETWORK_QUERY_TIMEOUT
+    )
+
+clients.add_warmer("contracts", warm_contracts)
+clients.add_warmer("tokenMetadata", warm_token_metadata)
+
+# Histórico de preços por pool, amostrado a cada bloco quando habilitado
+price_history = PriceHistory(
+    Config.PRICE_HISTORY_DIR,
+    raw_capacity=Config.PRICE_HISTORY_RAW_CAPACITY,
+    bucket_capacity=Config.PRICE_HISTORY_BUCKET_CAPACITY
+)
+price_sampler = PriceSampler(
+    price_history, head_tracker, list_pool_tokens, read_pool_prices,
+    interval=Config.BLOCK_POLL_INTERVAL
+) if Config.PRICE_SAMPLER_ENABLED else None
+
+def latest_sampled_price(token_address):
+    """Último preço amostrado do token (no primeiro pool que o contém), ou None"""
+    for pool_id, _, inverted in price_history.pools_for_token(token_address):
+        series = price_history.series(pool_id)
+        latest = series.latest() if series else None
+        if latest is not None and latest[2]:
+            return 1 / latest[2] if inverted else latest[2]
+    return None
+
+def snapshot_pool_reserves():
+    """Reservas normalizadas de todos os pools ativos, em arrays para o scanner de arbitragem"""
+    liquidity_manager = get_contract_instance(networks.current().contracts["MULTI_LIQUIDITY_MANAGER"], LIQUIDITY_MANAGER_ABI)
+    if not liquidity_manager:
         return None
+    
+    pool_ids = read_cached(LIQUIDITY_MANAGER.getAllPoolIds.call(liquidity_manager.address))
+    infos = aggregate_calls([
+        LIQUIDITY_MANAGER.getPoolInfo.call(liquidity_manager.address, pool_id) for pool_id in pool_ids
+    ], cached=True)
+    pools = [
+        (pool_id, pool_info) for pool_id, (success, pool_info) in zip(pool_ids, infos)
+        if success and pool_info.isActive and pool_info.pairAddress != ZERO_ADDRESS
+    ]
+    
+    # Reservas e orientação (token0) de cada par, em um único aggregate3
+    pair_calls = []
+    for _, pool_info in pools:
+        pair_calls.extend([PAIR.getReserves.call(pool_info.pairAddress), PAIR.token0.call(pool_info.pairAddress)])
+    pair_results = aggregate_calls(pair_calls, cached=True)
+    tokens = get_tokens_info([token for _, pool_info in pools for token in (pool_info[0], pool_info[1])])
+    
+    snapshot = {"poolIds": [], "tokenA": [], "tokenB": [], "reserveA": [], "reserveB": []}
+    for index, (pool_id, pool_info) in enumerate(pools):
+        (reserves_success, reserves), (token0_success, token0) = pair_results[index * 2:index * 2 + 2]
+        token_a, token_b = tokens[pool_info[0]], tokens[pool_info[1]]
+        if not (reserves_success and token0_success and token_a and token_b):
+            continue
+        reserve_a, reserve_b = (reserves[0], reserves[1]) if token0 == pool_info[0] else (reserves[1], reserves[0])
+        snapshot["poolIds"].append(pool_id.hex())
+        snapshot["tokenA"].append(token_a)
+        snapshot["tokenB"].append(token_b)
+        snapshot["reserveA"].append(reserve_a / 10 ** token_a["decimals"])
+        snapshot["reserveB"].append(reserve_b / 10 ** token_b["decimals"])
+    return snapshot
+
+def find_arbitrage_opportunities(min_profit, min_deviation):
+    """Varre as reservas de todos os pools ativos e retorna as oportunidades ordenadas por lucro líquido"""
+    opportunities = []
+    snapshot = snapshot_pool_reserves()
+    scan_started = time.perf_counter()
+    
+    if snapshot and snapshot["poolIds"]:
+        # Varredura vetorizada de todos os pools contra o peg
+        scan = scan_pools(
+            snapshot["reserveA"], snapshot["reserveB"],
+            target=Config.PEG_TARGET,
+            fee=Config.ARBITRAGE_POOL_FEE,
+            gas_cost=Config.ARBITRAGE_GAS_COST,
+            grid_size=Config.ARBITRAGE_GRID_SIZE,
+            max_trade_fraction=Config.ARBITRAGE_MAX_TRADE_FRACTION
+        )
+        order, urgency = rank_opportunities(scan, min_profit, min_deviation)
+        
+        for index, level in zip(order.tolist(), urgency.tolist()):
+            token_a = snapshot["tokenA"][index]
+            token_b = snapshot["tokenB"][index]
+            action = "sell" if scan["sellA"][index] else "buy"
+            opportunities.append({
+                "poolId": snapshot["poolIds"][index],
+                "tokenPair": f"{token_a['symbol']}/{token_b['symbol']}",
+                "currentPrice": round(float(scan["spot"][index]), 6),
+                "priceDeviation": round(float(scan["deviation"][index]) * 100, 4),
+                "potentialProfit": round(float(scan["netProfit"][index]), 6),
+                "grossProfit": round(float(scan["grossProfit"][index]), 6),
+                "tradeSize": round(float(scan["amountIn"][index]), 6),
+                "tradeToken": token_a["symbol"] if action == "sell" else token_b["symbol"],
+                "priceImpact": round(float(scan["priceImpact"][index]) * 100, 4),
+                "recommendedAction": f"{action}_{token_a['symbol'].lower()}",
+                "urgency": level
+            })
+    
+    return {
+        "opportunities": opportunities,
+        "scannedPools": len(snapshot["poolIds"]) if snapshot else 0,
+        "scanTimeMs": round((time.perf_counter() - scan_started) * 1000, 3)
+    }
+
+def collect_alerts(prices, opportunities):
+    """Alertas de desvio do peg, arbitragem urgente e endpoints RPC degradados"""
+    alerts = []
+    for pool_id, (token_a, token_b), price in prices:
+        deviation = (price - Config.PEG_TARGET) / Config.PEG_TARGET
+        if abs(deviation) >= Config.STREAM_ALERT_DEVIATION:
+            alerts.append({
+                "type": "peg_deviation",
+                "severity": "critical" if abs(deviation) >= 3 * Config.STREAM_ALERT_DEVIATION else "warning",
+                "poolId": pool_id,
+                "tokenA": token_a,
+                "tokenB": token_b,
+                "deviation": round(deviation * 100, 3)
+            })
+    for opportunity in opportunities:
+        if opportunity["urgency"] == "high":
+            alerts.append({
+                "type": "arbitrage",
+                "severity": "info",
+                "poolId": opportunity["poolId"],
+                "tokenPair": opportunity["tokenPair"],
+                "potentialProfit": opportunity["potentialProfit"]
+            })
+    for endpoint in networks.current().w3.provider.stats():
+        if endpoint["coolingDown"]:
+            alerts.append({"type": "rpc_endpoint", "severity": "warning", "url": endpoint["url"]})
+    return alerts
+
+def collect_stream_events(block_number, topics):
+    """Lê uma única vez por bloco os dados dos tópicos assinados (ver BlockEventProducer)"""
+    events = [("block", None, {"timestamp": datetime.now().isoformat()}, ())]
+    
+    prices = []
+    if "price" in topics or "alerts" in topics:
+        pools = list_pool_tokens()
+        prices = [
+            (pool_id, tokens, price)
+            for (pool_id, tokens), price in zip(pools.items(), read_pool_prices(list(pools)))
+            if price is not None
+        ]
+    if "price" in topics:
+        for pool_id, (token_a, token_b), price in prices:
+            events.append(("price", pool_id, {
+                "poolId": pool_id,
+                "tokenA": token_a,
+                "tokenB": token_b,
+                "price": round(price, 6),
+                "deviation": round((price - Config.PEG_TARGET) / Config.PEG_TARGET * 100, 3)
+            }, (token_a, token_b)))
+    
+    opportunities = []
+    if "arbitrage" in topics or "alerts" in topics:
+        opportunities = find_arbitrage_opportunities(Config.ARBITRAGE_MIN_PROFIT, Config.ARBITRAGE_MIN_DEVIATION)["opportunities"]
+    if "arbitrage" in topics:
+        events.append(("arbitrage", None, {"opportunities": opportunities}, ()))
+    if "alerts" in topics:
+        events.append(("alerts", None, {"alerts": collect_alerts(prices, opportunities)}, ()))
+    return events
+
+# Stream SSE: um produtor por worker lê os dados uma vez por bloco e distribui a todos os clientes
+STREAM_TOPICS = ("block", "price", "arbitrage", "alerts")
+event_broker = EventBroker(history_size=Config.STREAM_HISTORY_SIZE, queue_size=Config.STREAM_QUEUE_SIZE)
+event_producer = BlockEventProducer(
+    event_broker, head_tracker, collect_stream_events, STREAM_TOPICS,
+    interval=Config.BLOCK_POLL_INTERVAL
+)
+
+def parse_page_args():
+    """Lê ?cursor= e ?limit= da requisição; retorna (início, limite ou None)"""
+    start = int(request.args.get('cursor') or 0)
+    if start < 0:
+        raise ValueError("cursor fora do intervalo")
+    
+    limit = request.args.get('limit')
+    if limit is None:
+        return start, None
+    limit = int(limit)
+    if limit < 1:
+        raise ValueError("limit deve ser positivo")
+    return start, min(limit, Config.PAGE_MAX_LIMIT)
+
+def get_page(ids):
+    """Aplica a paginação por cursor (?cursor=&limit=) sobre a lista de IDs"""
+    start, limit = parse_page_args()
+    if start > len(ids):
+        raise ValueError("cursor fora do intervalo")
+    if limit is None:
+        return ids[start:], None
+    end = start + limit
+    return ids[start:end], (str(end) if end < len(ids) else None)
+
+def get_index_filters():
+    """Lê os filtros ?active= e ?token= de /pools e /stablecoins (índice ou chain)"""
+    active = request.args.get('active')
+    if active is not None:
+        if active.lower() not in ('true', 'false'):
+            raise ValueError("active deve ser true ou false")
+        active = active.lower() == 'true'
+    
+    token = request.args.get('token')
+    if token is not None:
+        token = Web3.to_checksum_address(token)
+    return active, token
+
+def indexed_pools_response(liquidity_manager):
+    """Responde /pools a partir do índice SQLite; apenas os preços são lidos da chain"""
+    try:
+        active, token = get_index_filters()
+        offset, limit = parse_page_args()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": f"Parâmetros inválidos: {e}"}), 400
+    
+    rows, next_cursor = indexer.query_pools(CONTRACTS["MULTI_LIQUIDITY_MANAGER"], active, token, offset, limit)
+    pool_ids = [bytes.fromhex(row["pool_id"]) for row in rows]
+    price_results = aggregate_calls([
+        LIQUIDITY_MANAGER.getTokenPrice.call(liquidity_manager.address, pool_id, True) for pool_id in pool_ids
+    ])
+    
+    # Mesmo formato intercalado de pool_calls, para reaproveitar build_pools
+    results = []
+    for row, price_result in zip(rows, price_results):
+        results.append((True, (
+            row["token_a"], row["token_b"], row["pair_address"], int(row["liquidity_amount"]),
+            bool(row["is_active"]), row["created_at"], row["network_id"]
+        )))
+        results.append(price_result)
+    tokens = get_tokens_info(pool_token_addresses(results))
+    pools = build_pools(pool_ids, results, tokens)
+    
+    if request.args.get('format') == 'ndjson':
+        return stream_ndjson([pools], "totalPools", next_cursor)
+    return jsonify({
+        "status": "success",
+        "pools": pools,
+        "totalPools": len(pools),
+        "incomplete": False,
+        "nextCursor": next_cursor,
+        "source": "index"
+    })
+
+def indexed_stablecoins_response():
+    """Responde /stablecoins a partir do índice SQLite"""
+    try:
+        active, token = get_index_filters()
+        offset, limit = parse_page_args()
+    except ValueError as e:
+        return jsonify({"status": "error", "message": f"Parâmetros inválidos: {e}"}), 400
+    
+    rows, next_cursor = indexer.query_stablecoins(CONTRACTS["STABLECOIN_FACTORY"], active, token, offset, limit)
+    stablecoin_ids = [bytes.fromhex(row["stablecoin_id"]) for row in rows]
+    results = [
+        (True, (
+            row["address"], row["liquidity_manager_address"], bytes.fromhex(row["pool_id"]),
+            (row["name"], row["symbol"], row["collateral_token"], int(row["initial_supply"]),
+             int(row["collateral_ratio"]), bool(row["is_active"]), row["created_at"])
+        ))
+        for row in rows
+    ]
+    tokens = get_tokens_info([row["address"] for row in rows])
+    stablecoins = build_stablecoins(stablecoin_ids, results, tokens)
+    
+    if request.args.get('format') == 'ndjson':
+        return stream_ndjson([stablecoins], "totalStablecoins", next_cursor)
+    return jsonify({
+        "status": "success",
+        "stablecoins": stablecoins,
+        "totalStablecoins": len(stablecoins),
+        "incomplete": False,
+        "nextCursor": next_cursor,
+        "source": "index"
+    })
+
+def fail_on_budget(batch, error):
+    """Lote recusado pelo orçamento do RPC interrompe a listagem (503) em vez de omitir os itens"""
+    if isinstance(error, RPCBudgetExceeded):
+        raise error
+    logging.error(f"Erro ao processar lote de {len(batch)} itens: {error}")
+
+def fetch_batches(fetch_batch, ids, incremental=False):
+    """Distribui o carregamento dos IDs em lotes pelo executor compartilhado"""
+    mapper = bounded_imap if incremental else bounded_map
+    return mapper(
+        fetch_batch,
+        chunked(ids, Config.FANOUT_BATCH_SIZE),
+        max_workers=Config.FANOUT_MAX_WORKERS,
+        deadline=Config.FANOUT_DEADLINE,
+        on_error=fail_on_budget
+    )
+
+def stream_ndjson(batches, total_key, next_cursor):
+    """Resposta NDJSON: um item por linha assim que decodificado, seguido de uma linha de resumo"""
+    def generate():
+        total = 0
+        complete = True
+        try:
+            for batch in batches:
+                for item in batch:
+                    total += 1
+                    yield current_app.json.dumps(item) + "\n"
+        except FutureTimeout:
+            complete = False
+        except Exception as e:
+            logging.error(f"Erro durante streaming: {e}")
+            yield current_app.json.dumps({"status": "error", "message": str(e)}) + "\n"
+            return
+        yield current_app.json.dumps({
+            "status": "success",
+            total_key: total,
+            "incomplete": not complete,
+            "nextCursor": next_cursor,
+            **block_fields()
+        }) + "\n"
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def json_holders(body):
+    """Holders de um corpo JSON: uma lista de endereços ou {"holders": [...]}"""
+    data = json.loads(body)
+    holders = data.get("holders") if isinstance(data, dict) else data
+    if not isinstance(holders, list):
+        raise ValueError('esperada uma lista de endereços ou {"holders": [...]}')
+    return holders
+
+def spool_body(stream, memory_limit=1024 * 1024):
+    """Copia o corpo da requisição para um arquivo temporário (em memória até `memory_limit`, depois em disco).
+    
+    A maioria dos clientes HTTP só lê a resposta depois de enviar todo o corpo:
+    responder enquanto o upload ainda é lido travaria os dois lados assim que
+    os buffers dos sockets enchessem.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=memory_limit)
+    shutil.copyfileobj(stream, spool)
+    spool.seek(0)
+    return spool
+
+def holder_lines(stream):
+    """Holders de um corpo com um por linha (endereço, string JSON ou {"address": ...}), lido aos poucos"""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        if line[:1] in (b'"', b'{'):
+            try:
+                value = json.loads(line)
+            except ValueError:
+                yield line.decode(errors="replace")
+                continue
+            yield value.get("address") if isinstance(value, dict) else value
+        else:
+            yield line.decode(errors="replace")
+
+def load_balances(token, holders, block_identifier):
+    """balanceOf de um lote de holders em um único multicall; inválidos e revertidos vêm com "error" """
+    entries = []
+    calls = []
+    for holder in holders:
+        try:
+            address = Web3.to_checksum_address(holder)
+        except Exception:
+            entries.append({"address": holder, "balance": None, "error": "endereço inválido"})
+            continue
+        entries.append({"address": address, "balance": None})
+        calls.append((len(entries) - 1, ERC20.balanceOf.call(token, address)))
+    if not calls:
+        return entries
+    try:
+        results = aggregate_calls([call for _, call in calls], block_identifier)
+    except RPCBudgetExceeded:
+        raise
+    except Exception as e:
+        logging.error(f"Erro ao obter saldos de {len(calls)} holders: {e}")
+        results = [(False, None)] * len(calls)
+    for (index, _), (success, balance) in zip(calls, results):
+        if success:
+            entries[index]["balance"] = balance
+        else:
+            entries[index]["error"] = "balanceOf revertido ou RPC indisponível"
+    return entries
+
+def network_status(network):
+    """Bloco atual, tokens principais e contratos de gerenciamento de uma rede"""
+    contracts = network.contracts
+    
+    # Bloco atual e informações dos tokens principais (um único lote JSON-RPC)
+    token_addresses = [contracts["MOCKUSDT"], contracts["BRZSTABLE"]]
+    if requested_block() == "latest":
+        latest_block, tokens = get_head_and_tokens_info(token_addresses)
+    else:
+        latest_block, tokens = network.head_tracker.latest(), get_tokens_info(token_addresses)
+    
+    # Status dos contratos de gerenciamento
+    liquidity_manager = get_contract_instance(contracts["MULTI_LIQUIDITY_MANAGER"], LIQUIDITY_MANAGER_ABI)
+    factory = get_contract_instance(contracts["STABLECOIN_FACTORY"], STABLECOIN_FACTORY_ABI)
+    
+    return {
+        **block_fields(),
+        "network": {
+            "name": network.name,
+            "chainId": network.chain_id,
+            "latestBlock": latest_block,
+            "rpcUrl": network.w3.provider.endpoint_uri
+        },
+        "contracts": {
+            "mockUSDT": tokens[contracts["MOCKUSDT"]],
+            "brzStable": tokens[contracts["BRZSTABLE"]],
+            "liquidityManager": {
+                "address": contracts["MULTI_LIQUIDITY_MANAGER"],
+                "isDeployed": liquidity_manager is not None
+            },
+            "stablecoinFactory": {
+                "address": contracts["STABLECOIN_FACTORY"],
+                "isDeployed": factory is not None
+            }
+        }
+    }
 
 @automation_bp.route('/status', methods=['GET'])
+@automation_bp.route('/<int:chain_id>/status', methods=['GET'])
+@stale_responses.fallback
+@response_cache.cached
 def get_status():
     """Status geral do sistema multi-rede"""
     try:
-        # Informações básicas da rede
-        latest_block = w3.eth.block_number
-        
-        # Informações dos tokens principais
-        mockusdt_info = get_token_info(CONTRACTS["MOCKUSDT"])
-        brzstable_info = get_token_info(CONTRACTS["BRZSTABLE"])
-        
-        # Status dos contratos de gerenciamento
-        liquidity_manager = get_contract_instance(CONTRACTS["MULTI_LIQUIDITY_MANAGER"], LIQUIDITY_MANAGER_ABI)
-        factory = get_contract_instance(CONTRACTS["STABLECOIN_FACTORY"], STABLECOIN_FACTORY_ABI)
+        if g.get("all_networks"):
+            results, elapsed = network_results(network_status)
+            return jsonify({
+                "status": "success",
+                "networks": results,
+                "totalNetworks": len(results),
+                "elapsedMs": elapsed,
+                "timestamp": datetime.now().isoformat()
+            })
         
         return jsonify({
             "status": "success",
-            "network": {
-                "name": "BSC Testnet",
-                "chainId": 97,
-                "latestBlock": latest_block,
-                "rpcUrl": BSC_TESTNET_RPC
-            },
-            "contracts": {
-                "mockUSDT": mockusdt_info,
-                "brzStable": brzstable_info,
-                "liquidityManager": {
-                    "address": CONTRACTS["MULTI_LIQUIDITY_MANAGER"],
-                    "isDeployed": liquidity_manager is not None
-                },
-                "stablecoinFactory": {
-                    "address": CONTRACTS["STABLECOIN_FACTORY"],
-                    "isDeployed": factory is not None
-                }
-            },
+            **network_status(networks.current()),
             "timestamp": datetime.now().isoformat()
         })
-        
+    
     except Exception as e:
         logging.error(f"Erro ao obter status: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @automation_bp.route('/pools', methods=['GET'])
+@automation_bp.route('/<int:chain_id>/pools', methods=['GET'])
+@stale_responses.fallback
+@response_cache.cached
 def get_all_pools():
     """Lista todos os pools de liquidez"""
     try:
-        liquidity_manager = get_contract_instance(CONTRACTS["MULTI_LIQUIDITY_MANAGER"], LIQUIDITY_MANAGER_ABI)
+        network = networks.current()
+        liquidity_manager = get_contract_instance(network.contracts["MULTI_LIQUIDITY_MANAGER"], LIQUIDITY_MANAGER_ABI)
         
         if not liquidity_manager:
             return jsonify({
@@ -243,56 +1192,59 @@ def get_all_pools():
                 "message": "Liquidity Manager não implantado"
             }), 400
         
-        # Obter todos os IDs de pools
-        pool_ids = liquidity_manager.functions.getAllPoolIds().call()
+        # Com o indexador (rede padrão) sincronizado, responder a partir do SQLite (só o estado atual)
+        if indexer is not None and network is default_network and requested_block() == "latest":
+            indexer.start()
+            if indexer.ready("pools", CONTRACTS["MULTI_LIQUIDITY_MANAGER"]):
+                return indexed_pools_response(liquidity_manager)
         
-        pools = []
-        for pool_id in pool_ids:
-            try:
-                pool_info = liquidity_manager.functions.getPoolInfo(pool_id).call()
-                
-                # Obter informações dos tokens
-                token_a_info = get_token_info(pool_info[0])
-                token_b_info = get_token_info(pool_info[1])
-                
-                # Obter preço atual
-                try:
-                    price = liquidity_manager.functions.getTokenPrice(pool_id, True).call()
-                    price_formatted = price / 1e18
-                except:
-                    price_formatted = 0
-                
-                pools.append({
-                    "poolId": pool_id.hex(),
-                    "tokenA": token_a_info,
-                    "tokenB": token_b_info,
-                    "pairAddress": pool_info[2],
-                    "liquidityAmount": pool_info[3],
-                    "isActive": pool_info[4],
-                    "createdAt": pool_info[5],
-                    "networkId": pool_info[6],
-                    "currentPrice": price_formatted
-                })
-                
-            except Exception as e:
-                logging.error(f"Erro ao processar pool {pool_id.hex()}: {e}")
-                continue
+        try:
+            active, token = get_index_filters()
+        except ValueError as e:
+            return jsonify({"status": "error", "message": f"Parâmetros inválidos: {e}"}), 400
         
-        return jsonify({
+        # Obter todos os IDs de pools; com filtros, o cursor percorre só os que passam neles (como no índice)
+        pool_ids = read_cached(LIQUIDITY_MANAGER.getAllPoolIds.call(liquidity_manager.address))
+        pool_ids = filter_pool_ids(liquidity_manager, pool_ids, active, token)
+        
+        try:
+            page_ids, next_cursor = get_page(pool_ids)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": f"Paginação inválida: {e}"}), 400
+        
+        # Carregar detalhes em lotes paralelos, com prazo total
+        fetch_batch = lambda batch: load_pools(liquidity_manager, batch)
+        if request.args.get('format') == 'ndjson':
+            return stream_ndjson(fetch_batches(fetch_batch, page_ids, incremental=True), "totalPools", next_cursor)
+        
+        batches, complete = fetch_batches(fetch_batch, page_ids)
+        pools = [pool for batch in batches for pool in batch]
+        
+        response = jsonify({
             "status": "success",
             "pools": pools,
-            "totalPools": len(pools)
+            "totalPools": len(pools),
+            "incomplete": not complete,
+            "nextCursor": next_cursor,
+            **block_fields()
         })
-        
+        if not complete:
+            response.cache_control.no_store = True
+        return response
+    
     except Exception as e:
         logging.error(f"Erro ao obter pools: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @automation_bp.route('/stablecoins', methods=['GET'])
+@automation_bp.route('/<int:chain_id>/stablecoins', methods=['GET'])
+@stale_responses.fallback
+@response_cache.cached
 def get_all_stablecoins():
     """Lista todas as stablecoins criadas"""
     try:
-        factory = get_contract_instance(CONTRACTS["STABLECOIN_FACTORY"], STABLECOIN_FACTORY_ABI)
+        network = networks.current()
+        factory = get_contract_instance(network.contracts["STABLECOIN_FACTORY"], STABLECOIN_FACTORY_ABI)
         
         if not factory:
             return jsonify({
@@ -300,56 +1252,135 @@ def get_all_stablecoins():
                 "message": "Stablecoin Factory não implantado"
             }), 400
         
-        # Obter todos os IDs de stablecoins
-        stablecoin_ids = factory.functions.getAllStablecoinIds().call()
+        # Com o indexador (rede padrão) sincronizado, responder a partir do SQLite (só o estado atual)
+        if indexer is not None and network is default_network and requested_block() == "latest":
+            indexer.start()
+            if indexer.ready("stablecoins", CONTRACTS["STABLECOIN_FACTORY"]):
+                return indexed_stablecoins_response()
         
-        stablecoins = []
-        for stablecoin_id in stablecoin_ids:
-            try:
-                stablecoin_info = factory.functions.getStablecoinInfo(stablecoin_id).call()
-                
-                # Obter informações do token
-                token_info = get_token_info(stablecoin_info[0])
-                
-                stablecoins.append({
-                    "stablecoinId": stablecoin_id.hex(),
-                    "address": stablecoin_info[0],
-                    "liquidityManagerAddress": stablecoin_info[1],
-                    "poolId": stablecoin_info[2].hex(),
-                    "tokenInfo": token_info,
-                    "config": {
-                        "name": stablecoin_info[3][0],
-                        "symbol": stablecoin_info[3][1],
-                        "collateralToken": stablecoin_info[3][2],
-                        "initialSupply": stablecoin_info[3][3],
-                        "collateralRatio": stablecoin_info[3][4],
-                        "isActive": stablecoin_info[3][5],
-                        "createdAt": stablecoin_info[3][6]
-                    }
-                })
-                
-            except Exception as e:
-                logging.error(f"Erro ao processar stablecoin {stablecoin_id.hex()}: {e}")
-                continue
+        try:
+            active, token = get_index_filters()
+        except ValueError as e:
+            return jsonify({"status": "error", "message": f"Parâmetros inválidos: {e}"}), 400
         
-        return jsonify({
+        # Obter todos os IDs de stablecoins; com filtros, o cursor percorre só as que passam neles (como no índice)
+        stablecoin_ids = read_cached(STABLECOIN_FACTORY.getAllStablecoinIds.call(factory.address))
+        stablecoin_ids = filter_stablecoin_ids(factory, stablecoin_ids, active, token)
+        
+        try:
+            page_ids, next_cursor = get_page(stablecoin_ids)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": f"Paginação inválida: {e}"}), 400
+        
+        # Carregar detalhes em lotes paralelos, com prazo total
+        fetch_batch = lambda batch: load_stablecoins(factory, batch)
+        if request.args.get('format') == 'ndjson':
+            return stream_ndjson(
+                fetch_batches(fetch_batch, page_ids, incremental=True), "totalStablecoins", next_cursor
+            )
+        
+        batches, complete = fetch_batches(fetch_batch, page_ids)
+        stablecoins = [stablecoin for batch in batches for stablecoin in batch]
+        
+        response = jsonify({
             "status": "success",
             "stablecoins": stablecoins,
-            "totalStablecoins": len(stablecoins)
+            "totalStablecoins": len(stablecoins),
+            "incomplete": not complete,
+            "nextCursor": next_cursor,
+            **block_fields()
         })
-        
+        if not complete:
+            response.cache_control.no_store = True
+        return response
+    
     except Exception as e:
         logging.error(f"Erro ao obter stablecoins: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@automation_bp.route('/tokens/<token_address>/balances', methods=['POST'])
+@automation_bp.route('/<int:chain_id>/tokens/<token_address>/balances', methods=['POST'])
+def get_token_balances(token_address):
+    """Saldos (balanceOf) de uma lista de holders, em NDJSON à medida que os lotes ficam prontos.
+    
+    O corpo é JSON (lista ou {"holders": [...]}, até BALANCES_MAX_JSON_SIZE bytes)
+    ou um endereço por linha (NDJSON ou texto), guardado em um arquivo temporário
+    e lido aos poucos: a memória usada não depende do número de holders. Todos os
+    saldos são do mesmo bloco (?block= ou o atual no início da consulta).
+    """
+    try:
+        token = Web3.to_checksum_address(token_address)
+    except Exception:
+        return jsonify({"status": "error", "message": f"Endereço de token inválido: {token_address}"}), 400
+    
+    spool = None
+    if request.is_json:
+        body = request.stream.read(Config.BALANCES_MAX_JSON_SIZE + 1)
+        if len(body) > Config.BALANCES_MAX_JSON_SIZE:
+            return jsonify({
+                "status": "error",
+                "message": f"Corpo JSON acima de {Config.BALANCES_MAX_JSON_SIZE} bytes; envie um endereço por linha (NDJSON)"
+            }), 413
+        try:
+            holders = json_holders(body)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": f"Lista de holders inválida: {e}"}), 400
+    else:
+        spool = spool_body(request.stream)
+        holders = holder_lines(spool)
+    
+    # Fixar o bloco atual: um snapshot consistente mesmo que a leitura atravesse vários blocos
+    block_identifier = requested_block()
+    if block_identifier == "latest":
+        try:
+            block_identifier = networks.current().head_tracker.latest()
+        except Exception:
+            pass
+    
+    batches = windowed_imap(
+        lambda batch: load_balances(token, batch, block_identifier),
+        ichunked(holders, Config.MULTICALL_CHUNK_SIZE),
+        max_workers=Config.FANOUT_MAX_WORKERS,
+        on_error=fail_on_budget
+    )
+
+    def generate():
+        total = 0
+        failed = 0
+        try:
+            for batch in batches:
+                for entry in batch:
+                    total += 1
+                    failed += "error" in entry
+                    yield current_app.json.dumps(entry) + "\n"
+        except Exception as e:
+            logging.error(f"Erro durante streaming de saldos: {e}")
+            yield current_app.json.dumps({"status": "error", "message": str(e), "totalHolders": total}) + "\n"
+            return
+        finally:
+            if spool is not None:
+                spool.close()
+        yield current_app.json.dumps({
+            "status": "success",
+            "token": token,
+            "block": block_identifier,
+            "totalHolders": total,
+            "failed": failed
+        }) + "\n"
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @automation_bp.route('/price/<token_address>', methods=['GET'])
 def get_token_price(token_address):
     """Obtém preço de um token específico"""
     try:
-        # Simular preço baseado em USDT com pequena variação
-        base_price = 1.0
-        variation = (time.time() % 100) / 10000  # Variação de ±0.01
-        current_price = base_price + (variation - 0.005)
+        base_price = Config.PEG_TARGET
+        current_price = latest_sampled_price(token_address)
+        source = "sampler"
+        if current_price is None:
+            # Sem amostras: simular preço baseado em USDT com pequena variação
+            variation = (time.time() % 100) / 10000  # Variação de ±0.01
+            current_price = base_price + (variation - 0.005)
+            source = "simulated"
         
         # Calcular desvio percentual
         deviation = ((current_price - base_price) / base_price) * 100
@@ -361,123 +1392,274 @@ def get_token_price(token_address):
                 "current": round(current_price, 6),
                 "target": base_price,
                 "deviation": round(deviation, 3),
-                "currency": "USDT"
+                "currency": "USDT",
+                "source": source
             },
             "timestamp": datetime.now().isoformat()
         })
-        
+    
     except Exception as e:
         logging.error(f"Erro ao obter preço: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@automation_bp.route('/price/<token_address>/history', methods=['GET'])
+def get_token_price_history(token_address):
+    """Histórico de preço (OHLC) e desvio do peg de um token"""
+    try:
+        resolution = request.args.get('resolution', '1m')
+        if resolution not in ('raw', '1m', '1h'):
+            return jsonify({"status": "error", "message": "resolution deve ser raw, 1m ou 1h"}), 400
+        try:
+            end = float(request.args.get('to') or time.time())
+            start = float(request.args.get('from') or end - 3600)
+        except ValueError:
+            return jsonify({"status": "error", "message": "from e to devem ser timestamps unix"}), 400
+        
+        if price_sampler is not None:
+            price_sampler.start()
+        
+        series = []
+        for pool_id, quote_token, inverted in price_history.pools_for_token(token_address):
+            pool_series = price_history.series(pool_id)
+            points = pool_series.points(start, end, resolution) if pool_series else []
+            if inverted:
+                points = [invert_point(point) for point in points]
+            for point in points:
+                point["deviation"] = round((point["close"] - Config.PEG_TARGET) / Config.PEG_TARGET * 100, 4)
+            series.append({
+                "poolId": pool_id,
+                "quoteToken": quote_token,
+                "points": points
+            })
+        
+        return jsonify({
+            "status": "success",
+            "tokenAddress": token_address,
+            "resolution": resolution,
+            "from": start,
+            "to": end,
+            "target": Config.PEG_TARGET,
+            "series": series,
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    except Exception as e:
+        logging.error(f"Erro ao obter histórico de preço: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 @automation_bp.route('/arbitrage/opportunities', methods=['GET'])
+@automation_bp.route('/<int:chain_id>/arbitrage/opportunities', methods=['GET'])
+@response_cache.cached
 def get_arbitrage_opportunities():
     """Detecta oportunidades de arbitragem"""
     try:
-        opportunities = []
+        try:
+            min_profit = float(request.args.get('minProfit', Config.ARBITRAGE_MIN_PROFIT))
+            min_deviation = float(request.args.get('minDeviation', Config.ARBITRAGE_MIN_DEVIATION))
+        except ValueError:
+            return jsonify({"status": "error", "message": "minProfit e minDeviation devem ser numéricos"}), 400
         
-        # Simular oportunidades de arbitragem
-        if time.time() % 30 < 10:  # 1/3 do tempo há oportunidades
-            opportunities.append({
-                "poolId": "0x1234567890abcdef",
-                "tokenPair": "BRZ/USDT",
-                "priceDeviation": 0.15,
-                "potentialProfit": 0.08,
-                "recommendedAction": "buy_brz",
-                "urgency": "medium"
-            })
+        if g.get("all_networks"):
+            # Oportunidades de todas as redes, ordenadas juntas por lucro líquido
+            results, elapsed = network_results(lambda network: find_arbitrage_opportunities(min_profit, min_deviation))
+            opportunities = sorted(
+                (
+                    {"chainId": result["chainId"], **opportunity}
+                    for result in results for opportunity in result.pop("opportunities", [])
+                ),
+                key=lambda opportunity: opportunity["potentialProfit"],
+                reverse=True
+            )
+            scan = {"opportunities": opportunities, "networks": results, "elapsedMs": elapsed}
+        else:
+            scan = find_arbitrage_opportunities(min_profit, min_deviation)
         
         return jsonify({
             "status": "success",
-            "opportunities": opportunities,
-            "totalOpportunities": len(opportunities),
+            **scan,
+            "totalOpportunities": len(scan["opportunities"]),
+            "thresholds": {
+                "minProfit": min_profit,
+                "minDeviation": min_deviation,
+                "gasCost": Config.ARBITRAGE_GAS_COST,
+                "poolFee": Config.ARBITRAGE_POOL_FEE
+            },
             "lastCheck": datetime.now().isoformat()
         })
-        
+    
     except Exception as e:
         logging.error(f"Erro ao detectar arbitragem: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@automation_bp.route('/stream', methods=['GET'])
+def stream_events():
+    """Stream Server-Sent Events de blocos, preços, arbitragem e alertas"""
+    topics = [topic.strip() for topic in request.args.get('topics', '').split(',') if topic.strip()] or None
+    invalid = sorted(set(topics or ()) - set(STREAM_TOPICS))
+    if invalid:
+        return jsonify({
+            "status": "error",
+            "message": f"Tópicos inválidos: {', '.join(invalid)}",
+            "topics": list(STREAM_TOPICS)
+        }), 400
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    event_producer.start()
+    subscription, replay = event_broker.subscribe(topics, request.args.get('token'), last_event_id)
+
+    def generate():
+        try:
+            yield f"retry: {Config.STREAM_RETRY_MS}\n\n"
+            for event in replay:
+                yield event.encode()
+            while not subscription.dropped:
+                try:
+                    event = subscription.queue.get(timeout=Config.STREAM_HEARTBEAT)
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield event.encode()
+            # Cliente lento: encerrar; ele reconecta e retoma pelo Last-Event-ID
+            yield 'event: dropped\ndata: {"reason": "slow_consumer"}\n\n'
+        finally:
+            event_broker.unsubscribe(subscription)
+    
+    response = Response(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @automation_bp.route('/monitor/system', methods=['GET'])
+@automation_bp.route('/<int:chain_id>/monitor/system', methods=['GET'])
+@stale_responses.fallback(degraded=False)
 def monitor_system():
-    """Monitoramento geral do sistema"""
+    """Monitoramento geral do sistema.
+    
+    A seção blockchain e as métricas de RPC (metrics.rpc, headBlock) são da
+    rede da requisição; as demais métricas somam todas as redes.
+    """
     try:
-        # Status da conexão blockchain
-        latest_block = w3.eth.block_number
+        network = networks.current()
+        
+        # Status da conexão blockchain: bloco lido recentemente e circuito do RPC fechado
+        try:
+            latest_block = network.head_tracker.latest()
+        except Exception as e:
+            logging.warning(f"Erro ao consultar bloco mais recente: {e}")
+            latest_block = network.head_tracker.block_number
+        connected = network.is_connected()
         
-        # Simular métricas do sistema
+        # Métricas derivadas dos contadores Prometheus (agregadas entre workers em modo multiprocess)
+        summary = metrics.summarize(network.chain_id)
+        error_rate = max(summary["http"]["errorRate"], summary["rpc"]["errorRate"])
+        if not connected or error_rate >= 0.05:
+            system_health = "degraded"
+        elif error_rate >= 0.01:
+            system_health = "good"
+        else:
+            system_health = "excellent"
+        latest_arbitrage = event_broker.latest("arbitrage")
         system_metrics = {
-            "uptime": "99.8%",
-            "totalTransactions": 1247,
-            "totalVolume": 125430.50,
-            "activeArbitrages": 3,
-            "systemHealth": "excellent"
+            **summary,
+            "activeArbitrages": len(latest_arbitrage["opportunities"]) if latest_arbitrage else None,
+            "systemHealth": system_health
         }
         
         return jsonify({
             "status": "success",
             "blockchain": {
-                "connected": True,
+                "connected": connected,
                 "latestBlock": latest_block,
-                "network": "BSC Testnet"
+                "lastBlockAt": network.head_tracker.last_success,
+                "lastError": network.head_tracker.last_error,
+                "network": network.name,
+                "chainId": network.chain_id,
+                "rpcEndpoints": network.w3.provider.stats(),
+                "circuitBreaker": network.clients.breaker.stats()
             },
             "metrics": system_metrics,
-            "alerts": [],
+            "cache": {
+                "tokens": network.token_cache.stats(),
+                "responses": response_cache.stats(),
+                "snapshots": stale_responses.stats(),
+                "chainReads": cache_backend.stats(),
+                "archive": archive_cache.stats() if archive_cache is not None else None
+            },
+            "indexer": indexer.stats() if indexer is not None else None,
+            "stream": event_broker.stats(),
+            "clients": network.clients.stats(),
+            "alerts": (event_broker.latest("alerts") or {}).get("alerts", []),
             "timestamp": datetime.now().isoformat()
         })
-        
+    
     except Exception as e:
         logging.error(f"Erro no monitoramento: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @automation_bp.route('/contracts/update', methods=['POST'])
+@automation_bp.route('/<int:chain_id>/contracts/update', methods=['POST'])
 def update_contract_addresses():
-    """Atualiza endereços dos contratos"""
+    """Atualiza endereços dos contratos da rede"""
     try:
         data = request.get_json()
+        contracts = networks.current().contracts
         
         if 'liquidityManager' in data:
-            CONTRACTS["MULTI_LIQUIDITY_MANAGER"] = data['liquidityManager']
+            contracts["MULTI_LIQUIDITY_MANAGER"] = data['liquidityManager']
         
         if 'stablecoinFactory' in data:
-            CONTRACTS["STABLECOIN_FACTORY"] = data['stablecoinFactory']
+            contracts["STABLECOIN_FACTORY"] = data['stablecoinFactory']
+        
+        # Respostas em cache referem-se aos endereços antigos
+        response_cache.clear()
+        stale_responses.clear()
         
         return jsonify({
             "status": "success",
             "message": "Endereços atualizados com sucesso",
-            "contracts": CONTRACTS
+            "chainId": networks.current().chain_id,
+            "contracts": contracts
         })
-        
+    
     except Exception as e:
         logging.error(f"Erro ao atualizar contratos: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @automation_bp.route('/networks/supported', methods=['GET'])
 def get_supported_networks():
-    """Lista redes suportadas"""
+    """Lista redes suportadas, com bloco atual e latência do RPC medidos agora em todas ao mesmo tempo"""
     try:
-        networks = [
-            {
-                "chainId": 97,
-                "name": "BSC Testnet",
-                "rpcUrl": "https://data-seed-prebsc-1-s1.bnbchain.org:8545",
-                "explorer": "https://testnet.bscscan.com",
-                "nativeCurrency": "tBNB",
-                "isActive": True,
-                "dex": {
-                    "name": "PancakeSwap",
-                    "factory": "0x6725F303b657a9451d8BA641348b6761A6CC7a17",
-                    "router": "0xD99D1c33F9fC3444f8101754aBC46c52416550D1"
-                }
-            }
-        ]
+        def probe(network):
+            started = time.perf_counter()
+            latest_block = network.head_tracker.poll()
+            return latest_block, round((time.perf_counter() - started) * 1000, 2)
+        
+        probes = {
+            network.chain_id: (result, error)
+            for network, result, error, _ in networks.query(
+                probe, networks=list(networks), timeout=Config.NETWORK_QUERY_TIMEOUT
+            )
+        }
+        
+        supported = []
+        for network in networks:
+            result, error = probes[network.chain_id]
+            supported.append({
+                **network.describe(),
+                "isDefault": network is default_network,
+                "isHealthy": error is None,
+                "latestBlock": result[0] if result else None,
+                "rpcLatencyMs": result[1] if result else None,
+                "rpcEndpoints": network.w3.provider.stats(),
+                "error": error
+            })
         
         return jsonify({
             "status": "success",
-            "networks": networks,
-            "totalNetworks": len(networks)
+            "networks": supported,
+            "totalNetworks": len(supported)
         })
-        
+    
     except Exception as e:
         logging.error(f"Erro ao obter redes: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
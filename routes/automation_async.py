@@ -0,0 +1,274 @@
+from flask import Blueprint, jsonify, request
+import asyncio
+import logging
+from datetime import datetime
+from config import Config
+from utils.multicall import aggregate_async
+from utils.rpc_budget import RPCBudgetExceeded
+from routes.automation import (
+    CONTRACTS, clients, default_network, networks, head_tracker, LIQUIDITY_MANAGER, LIQUIDITY_MANAGER_ABI, STABLECOIN_FACTORY,
+    STABLECOIN_FACTORY_ABI,
+    get_contract_instance, plan_token_calls, apply_token_results, get_page,
+    pool_calls, pool_info_calls, pool_token_addresses, build_pools, stablecoin_calls, build_stablecoins,
+    matching_ids, pool_matches, stablecoin_matches,
+    response_cache, stale_responses, select_block, requested_block, block_fields, get_index_filters
+)
+
+# Blueprint assíncrono: mesmas leituras da versão síncrona, com I/O concorrente via AsyncWeb3
+automation_async_bp = Blueprint('automation_async', __name__)
+automation_async_bp.before_request(select_block)
+
+@automation_async_bp.before_request
+def only_default_network():
+    """O blueprint assíncrono atende só a rede padrão: ?chainId= de outra rede é recusado"""
+    chain_id = request.args.get('chainId')
+    if chain_id is not None and networks.get(chain_id) is not default_network:
+        return jsonify({
+            "status": "error",
+            "message": f"Rotas assíncronas atendem apenas a rede padrão ({default_network.chain_id}); use /api/{chain_id}/...",
+            "supportedChainIds": [default_network.chain_id]
+        }), 400
+
+# O caminho assíncrono usa o pool de endpoints da rede padrão (cliente do registro compartilhado)
+aw3 = clients.async_w3
+
+async def aggregate_calls_async(calls, block_identifier=None, cached=False):
+    """Executa leituras de contrato agregadas via Multicall3, com lotes concorrentes.
+    
+    Como na versão síncrona, leituras idênticas em andamento (em qualquer
+    rota, síncrona ou não) são reaproveitadas, cached=True usa o cache
+    compartilhado do bloco atual e leituras em blocos finalizados (?block=)
+    passam pelo cache permanente.
+    """
+    if block_identifier is None:
+        block_identifier = requested_block()
+    run = lambda pending: aggregate_async(
+        aw3, pending,
+        chunk_size=Config.MULTICALL_CHUNK_SIZE,
+        block_identifier=block_identifier,
+        multicall_address=default_network.multicall_address
+    )
+    block_number = head_tracker.block_number
+    if isinstance(block_identifier, int):
+        try:
+            cached = default_network.is_final(block_identifier, head=await latest_block_async())
+        except Exception:
+            cached = False
+    elif cached and block_identifier == "latest":
+        try:
+            block_number = await latest_block_async()
+        except Exception:
+            cached = False
+    else:
+        cached = False
+    return await default_network.chain_reads.aggregate_async(
+        run, calls, block=block_number, block_identifier=block_identifier, cached=cached
+    )
+
+async def latest_block_async():
+    """Bloco em memória ou, se não houver leitura recente, um eth_blockNumber coalescido"""
+    if head_tracker.is_fresh():
+        return head_tracker.block_number
+    return await head_tracker.poll_async(aw3)
+
+async def read_cached_async(call):
+    """Versão assíncrona de read_cached"""
+    (success, value), = await aggregate_calls_async([call], cached=True)
+    if not success:
+        raise ValueError(f"Leitura revertida em {call.target}")
+    return value
+
+async def get_tokens_info_async(token_addresses, block_identifier=None):
+    """Versão assíncrona de get_tokens_info, compartilhando o mesmo cache de metadados"""
+    if block_identifier is None:
+        block_identifier = requested_block()
+    tokens, pending, calls = plan_token_calls(token_addresses, block_identifier)
+    if not calls:
+        return tokens
+    try:
+        results = await aggregate_calls_async(calls, block_identifier)
+    except RPCBudgetExceeded:
+        raise
+    except Exception as e:
+        logging.error(f"Erro ao obter informações dos tokens: {e}")
+        return tokens
+    return apply_token_results(tokens, pending, results, block_identifier)
+
+async def gather_batches(load_batch, ids):
+    """Carrega os lotes concorrentemente, limitado por FANOUT_MAX_WORKERS e FANOUT_DEADLINE"""
+    semaphore = asyncio.Semaphore(Config.FANOUT_MAX_WORKERS)
+
+    async def run(batch):
+        async with semaphore:
+            return await load_batch(batch)
+    
+    batches = [ids[start:start + Config.FANOUT_BATCH_SIZE] for start in range(0, len(ids), Config.FANOUT_BATCH_SIZE)]
+    tasks = [asyncio.ensure_future(run(batch)) for batch in batches]
+    if not tasks:
+        return [], True
+    done, pending = await asyncio.wait(tasks, timeout=Config.FANOUT_DEADLINE)
+    for task in pending:
+        task.cancel()
+    
+    results = []
+    for batch, task in zip(batches, tasks):
+        if task not in done:
+            continue
+        if isinstance(task.exception(), RPCBudgetExceeded):
+            raise task.exception()
+        if task.exception() is not None:
+            logging.error(f"Erro ao processar lote de {len(batch)} itens: {task.exception()}")
+            continue
+        results.extend(task.result())
+    return results, not pending
+
+@automation_async_bp.route('/status', methods=['GET'])
+@stale_responses.fallback
+@response_cache.cached
+async def get_status():
+    """Status geral do sistema multi-rede (leituras concorrentes)"""
+    try:
+        # Bloco atual e informações dos tokens principais em paralelo
+        latest_block, tokens = await asyncio.gather(
+            latest_block_async(),
+            get_tokens_info_async([CONTRACTS["MOCKUSDT"], CONTRACTS["BRZSTABLE"]])
+        )
+        
+        # Status dos contratos de gerenciamento
+        liquidity_manager = get_contract_instance(CONTRACTS["MULTI_LIQUIDITY_MANAGER"], LIQUIDITY_MANAGER_ABI)
+        factory = get_contract_instance(CONTRACTS["STABLECOIN_FACTORY"], STABLECOIN_FACTORY_ABI)
+        
+        return jsonify({
+            "status": "success",
+            **block_fields(),
+            "network": {
+                "name": default_network.name,
+                "chainId": default_network.chain_id,
+                "latestBlock": latest_block,
+                # Endpoint preferido no momento, como em /api/status
+                "rpcUrl": aw3.provider.endpoint_uri
+            },
+            "contracts": {
+                "mockUSDT": tokens[CONTRACTS["MOCKUSDT"]],
+                "brzStable": tokens[CONTRACTS["BRZSTABLE"]],
+                "liquidityManager": {
+                    "address": CONTRACTS["MULTI_LIQUIDITY_MANAGER"],
+                    "isDeployed": liquidity_manager is not None
+                },
+                "stablecoinFactory": {
+                    "address": CONTRACTS["STABLECOIN_FACTORY"],
+                    "isDeployed": factory is not None
+                }
+            },
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    except Exception as e:
+        logging.error(f"Erro ao obter status: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@automation_async_bp.route('/pools', methods=['GET'])
+@stale_responses.fallback
+@response_cache.cached
+async def get_all_pools():
+    """Lista todos os pools de liquidez (lotes concorrentes)"""
+    try:
+        liquidity_manager = get_contract_instance(CONTRACTS["MULTI_LIQUIDITY_MANAGER"], LIQUIDITY_MANAGER_ABI)
+        
+        if not liquidity_manager:
+            return jsonify({
+                "status": "error",
+                "message": "Liquidity Manager não implantado"
+            }), 400
+        
+        try:
+            active, token = get_index_filters()
+        except ValueError as e:
+            return jsonify({"status": "error", "message": f"Parâmetros inválidos: {e}"}), 400
+        
+        # Obter todos os IDs de pools; com filtros, o cursor percorre só os que passam neles
+        pool_ids = await read_cached_async(LIQUIDITY_MANAGER.getAllPoolIds.call(liquidity_manager.address))
+        if active is not None or token is not None:
+            results = await aggregate_calls_async(pool_info_calls(liquidity_manager, pool_ids), cached=True)
+            pool_ids = matching_ids(pool_ids, results, pool_matches, active, token)
+        
+        try:
+            page_ids, next_cursor = get_page(pool_ids)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": f"Paginação inválida: {e}"}), 400
+
+        async def load_batch(batch):
+            results = await aggregate_calls_async(pool_calls(liquidity_manager, batch), cached=True)
+            tokens = await get_tokens_info_async(pool_token_addresses(results))
+            return build_pools(batch, results, tokens)
+        
+        pools, complete = await gather_batches(load_batch, page_ids)
+        
+        response = jsonify({
+            "status": "success",
+            "pools": pools,
+            "totalPools": len(pools),
+            "incomplete": not complete,
+            "nextCursor": next_cursor,
+            **block_fields()
+        })
+        if not complete:
+            response.cache_control.no_store = True
+        return response
+    
+    except Exception as e:
+        logging.error(f"Erro ao obter pools: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@automation_async_bp.route('/stablecoins', methods=['GET'])
+@stale_responses.fallback
+@response_cache.cached
+async def get_all_stablecoins():
+    """Lista todas as stablecoins criadas (lotes concorrentes)"""
+    try:
+        factory = get_contract_instance(CONTRACTS["STABLECOIN_FACTORY"], STABLECOIN_FACTORY_ABI)
+        
+        if not factory:
+            return jsonify({
+                "status": "error",
+                "message": "Stablecoin Factory não implantado"
+            }), 400
+        
+        try:
+            active, token = get_index_filters()
+        except ValueError as e:
+            return jsonify({"status": "error", "message": f"Parâmetros inválidos: {e}"}), 400
+        
+        # Obter todos os IDs de stablecoins; com filtros, o cursor percorre só as que passam neles
+        stablecoin_ids = await read_cached_async(STABLECOIN_FACTORY.getAllStablecoinIds.call(factory.address))
+        if active is not None or token is not None:
+            results = await aggregate_calls_async(stablecoin_calls(factory, stablecoin_ids), cached=True)
+            stablecoin_ids = matching_ids(stablecoin_ids, results, stablecoin_matches, active, token)
+        
+        try:
+            page_ids, next_cursor = get_page(stablecoin_ids)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": f"Paginação inválida: {e}"}), 400
+
+        async def load_batch(batch):
+            results = await aggregate_calls_async(stablecoin_calls(factory, batch), cached=True)
+            tokens = await get_tokens_info_async([info[0] for success, info in results if success])
+            return build_stablecoins(batch, results, tokens)
+        
+        stablecoins, complete = await gather_batches(load_batch, page_ids)
+        
+        response = jsonify({
+            "status": "success",
+            "stablecoins": stablecoins,
+            "totalStablecoins": len(stablecoins),
+            "incomplete": not complete,
+            "nextCursor": next_cursor,
+            **block_fields()
+        })
+        if not complete:
+            response.cache_control.no_store = True
+        return response
+    
+    except Exception as e:
+        logging.error(f"Erro ao obter stablecoins: {e}")
+        return jsonify({"status": "error", "message": str(e)}), 500
@@ -0,0 +1,50 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Os testes importam os módulos da aplicação a partir da raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# O RPC simulado importa routes.automation: sem o cache permanente no diretório do repositório
+os.environ.setdefault("ARCHIVE_CACHE_PATH", "")
+
+from benchmarks.fake_rpc import start_server  # noqa: E402
+from benchmarks.load import free_port, start_gunicorn  # noqa: E402
+
+
+@pytest.fixture
+def fake_rpc():
+    """RPC local simulado (benchmarks/fake_rpc.py); retorna (servidor, url, estatísticas)"""
+    started = []
+
+    def start(**options):
+        options.setdefault("pools", 30)
+        options.setdefault("stablecoins", 10)
+        started.append(start_server(**options))
+        return started[-1]
+
+    yield start
+    for server, _, _ in started:
+        server.shutdown()
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """Sobe a API no gunicorn (1 worker) apontando para o RPC informado; retorna a URL base"""
+    processes = []
+
+    def start(rpc_url, **env):
+        monkeypatch.setenv("ARCHIVE_CACHE_PATH", str(tmp_path / "archive.db"))
+        monkeypatch.setenv("INDEXER_DB_PATH", str(tmp_path / "index.db"))
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        args = SimpleNamespace(pools=100, stablecoins=100, workers=1, threads=16, no_cache=False)
+        process, base_url = start_gunicorn(rpc_url, free_port(), args)
+        processes.append(process)
+        return base_url
+
+    yield start
+    for process in processes:
+        process.terminate()
+        process.wait(timeout=30)
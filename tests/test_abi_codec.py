@@ -0,0 +1,165 @@
+"""O decoder pré-compilado (utils/abi_codec.py) deve produzir exatamente o resultado do eth_abi"""
+import pytest
+from eth_abi import encode
+
+from utils.abi_codec import FunctionCodec, MalformedReturn, UnsupportedType, compile_decoder
+
+TOKEN_A = "0x5Fc088c2890fAB8c481cFB6D0d16f15A7f75c760"
+TOKEN_B = "0xA991a6642ee368683A8308D79a3B6a46c535D851"
+
+GET_POOL_INFO = {
+    "name": "getPoolInfo",
+    "inputs": [{"name": "poolId", "type": "bytes32"}],
+    "outputs": [{
+        "components": [
+            {"name": "tokenA", "type": "address"},
+            {"name": "tokenB", "type": "address"},
+            {"name": "pairAddress", "type": "address"},
+            {"name": "liquidityAmount", "type": "uint256"},
+            {"name": "isActive", "type": "bool"},
+            {"name": "createdAt", "type": "uint256"},
+            {"name": "networkId", "type": "uint256"}
+        ],
+        "name": "",
+        "type": "tuple"
+    }],
+    "type": "function"
+}
+GET_ALL_POOL_IDS = {
+    "name": "getAllPoolIds", "inputs": [], "outputs": [{"name": "", "type": "bytes32[]"}], "type": "function"
+}
+GET_STABLECOIN_INFO = {
+    "name": "getStablecoinInfo",
+    "inputs": [{"name": "id", "type": "uint256"}],
+    "outputs": [{
+        "components": [
+            {"name": "token", "type": "address"},
+            {"name": "symbol", "type": "string"},
+            {"name": "decimals", "type": "uint8"},
+            {"name": "holders", "type": "address[]"}
+        ],
+        "name": "",
+        "type": "tuple"
+    }],
+    "type": "function"
+}
+GET_RESERVES = {
+    "name": "getReserves",
+    "inputs": [],
+    "outputs": [
+        {"name": "reserve0", "type": "uint112"},
+        {"name": "reserve1", "type": "uint112"},
+        {"name": "blockTimestampLast", "type": "uint32"}
+    ],
+    "type": "function"
+}
+
+VALID = [
+    (GET_POOL_INFO, ["(address,address,address,uint256,bool,uint256,uint256)"],
+     [(TOKEN_A, TOKEN_B, TOKEN_A, 10 ** 30, True, 1700000000, 97)]),
+    (GET_ALL_POOL_IDS, ["bytes32[]"], [[bytes([i]) * 32 for i in range(5)]]),
+    (GET_ALL_POOL_IDS, ["bytes32[]"], [[]]),
+    (GET_STABLECOIN_INFO, ["(address,string,uint8,address[])"], [(TOKEN_A, "BRZ€", 18, [TOKEN_A, TOKEN_B])]),
+    (GET_RESERVES, ["uint112", "uint112", "uint32"], [2 ** 112 - 1, 5, 2 ** 32 - 1]),
+]
+
+
+def reference_codec(abi):
+    """Mesmo codec, decodificando sempre pelo eth_abi"""
+    codec = FunctionCodec(abi)
+    codec._fast = None
+    return codec
+
+
+def outcome(codec, data):
+    try:
+        return "ok", codec.decode(data)
+    except Exception as e:
+        return "error", type(e)
+
+
+def assert_same(abi, data):
+    fast = outcome(FunctionCodec(abi), data)
+    reference = outcome(reference_codec(abi), data)
+    assert fast == reference
+    return fast
+
+
+def assert_rejected(abi, data):
+    """O caminho rápido recusa o retorno (em vez de inventar valores) e o resultado é o do eth_abi"""
+    with pytest.raises(MalformedReturn):
+        FunctionCodec(abi)._fast(data, 0)
+    assert_same(abi, data)
+
+
+def set_word(data, index, value):
+    return data[:32 * index] + value + data[32 * (index + 1):]
+
+
+@pytest.mark.parametrize("abi, types, values", VALID)
+def test_valid_data_matches_eth_abi(abi, types, values):
+    codec = FunctionCodec(abi)
+    assert codec._fast is not None
+    data = encode(types, values)
+    codec._fast(data, 0)
+    status, _ = assert_same(abi, data)
+    assert status == "ok"
+
+
+@pytest.mark.parametrize("abi, types, values", VALID)
+def test_truncated_data_raises_like_eth_abi(abi, types, values):
+    data = encode(types, values)
+    for size in range(len(data)):
+        assert_same(abi, data[:size])
+
+
+def test_short_pool_info_is_not_a_zero_pool():
+    data = encode(["(address,address,address,uint256,bool,uint256,uint256)"],
+                  [(TOKEN_A, TOKEN_B, TOKEN_A, 1, True, 2, 97)])
+    for size in (0, 32, 32 * 6):
+        assert_rejected(GET_POOL_INFO, data[:size])
+        assert outcome(FunctionCodec(GET_POOL_INFO), data[:size])[0] == "error"
+
+
+def test_non_canonical_words_match_eth_abi():
+    pool = encode(["(address,address,address,uint256,bool,uint256,uint256)"],
+                  [(TOKEN_A, TOKEN_B, TOKEN_A, 1, True, 2, 97)])
+    # bool diferente de 0/1 e endereço com os 12 bytes superiores preenchidos
+    assert_rejected(GET_POOL_INFO, set_word(pool, 4, (2).to_bytes(32, "big")))
+    assert_rejected(GET_POOL_INFO, set_word(pool, 0, b"\x01" + pool[1:32]))
+
+    reserves = encode(["uint112", "uint112", "uint32"], [1, 2, 3])
+    # uint112 e uint32 acima da largura do tipo
+    assert_rejected(GET_RESERVES, set_word(reserves, 0, (2 ** 112).to_bytes(32, "big")))
+    assert_rejected(GET_RESERVES, set_word(reserves, 2, (2 ** 32).to_bytes(32, "big")))
+
+
+def test_out_of_range_offsets_match_eth_abi():
+    ids = encode(["bytes32[]"], [[b"\x01" * 32, b"\x02" * 32]])
+    assert_rejected(GET_ALL_POOL_IDS, set_word(ids, 0, (len(ids) + 32).to_bytes(32, "big")))
+    # Comprimento do array maior que o retorno
+    assert_rejected(GET_ALL_POOL_IDS, set_word(ids, 1, (10 ** 6).to_bytes(32, "big")))
+
+    info = encode(["(address,string,uint8,address[])"], [(TOKEN_A, "BRZ", 18, [TOKEN_A])])
+    # Offset da string (segunda palavra do registro) apontando além do fim
+    assert_rejected(GET_STABLECOIN_INFO, set_word(info, 2, (len(info) * 2).to_bytes(32, "big")))
+    # Padding da string não zerado
+    string_at = 32 + int.from_bytes(info[64:96], "big")
+    dirty = info[:string_at + 32 + 3] + b"\xff" + info[string_at + 32 + 4:]
+    assert_rejected(GET_STABLECOIN_INFO, dirty)
+
+
+def test_unsupported_types_fall_back_to_eth_abi():
+    with pytest.raises(UnsupportedType):
+        compile_decoder({"type": "tuple", "components": [{"name": "x", "type": "fixed128x18"}]}, "Record")
+
+    abi = {
+        "name": "getRate", "inputs": [],
+        "outputs": [{"name": "rate", "type": "fixed128x18"}, {"name": "owner", "type": "address"}],
+        "type": "function"
+    }
+    codec = FunctionCodec(abi)
+    assert codec._fast is None
+    data = encode(["fixed128x18", "address"], [1, TOKEN_A])
+    assert codec.decode(data) == reference_codec(abi).decode(data)
+    assert codec.decode(data)[1] == TOKEN_A
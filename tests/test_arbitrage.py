@@ -0,0 +1,72 @@
+"""scan_pools/rank_opportunities (utils/arbitrage.py) contra casos de produto constante calculados à mão"""
+import numpy as np
+import pytest
+
+from utils.arbitrage import rank_opportunities, scan_pools
+
+# Grade com dois tamanhos de trade: 0,001% e 1% da reserva de entrada
+GRID = {"grid_size": 2, "max_trade_fraction": 0.01}
+
+
+def test_above_peg_sells_token_a():
+    scan = scan_pools([1e6], [1.1e6], fee=0.0, **GRID)
+    assert scan["spot"][0] == pytest.approx(1.1)
+    assert scan["deviation"][0] == pytest.approx(0.1)
+    assert scan["sellA"][0]
+    # 10.000 A no pool: saem 10.000 * 1,1M / 1,01M de B, que valem 10.000 A no peg
+    assert scan["amountIn"][0] == pytest.approx(10_000)
+    assert scan["amountOut"][0] == pytest.approx(1.1e10 / 1.01e6)
+    assert scan["grossProfit"][0] == pytest.approx(1.1e10 / 1.01e6 - 10_000)
+    assert scan["netProfit"][0] == pytest.approx(891.0891, rel=1e-6)
+    assert scan["priceImpact"][0] == pytest.approx(10_000 / 1.01e6)
+
+
+def test_below_peg_buys_token_a():
+    scan = scan_pools([1.1e6], [1e6], fee=0.0, **GRID)
+    assert scan["deviation"][0] == pytest.approx(1 / 1.1 - 1)
+    assert not scan["sellA"][0]
+    # 10.000 B no pool: saem 10.000 * 1,1M / 1,01M de A, vendidos no peg
+    assert scan["amountIn"][0] == pytest.approx(10_000)
+    assert scan["amountOut"][0] == pytest.approx(1.1e10 / 1.01e6)
+    assert scan["netProfit"][0] == pytest.approx(1.1e10 / 1.01e6 - 10_000)
+
+
+def test_zero_reserve_pools_are_excluded():
+    scan = scan_pools([0, 1e6, 1e6], [1e6, 0, 1.1e6], **GRID)
+    assert list(scan["spot"][:2]) == [0, 0]
+    assert np.isneginf(scan["netProfit"][:2]).all()
+    assert list(scan["priceImpact"][:2]) == [0, 0]
+    order, _ = rank_opportunities(scan)
+    assert list(order) == [2]
+
+
+def test_fee_and_gas_make_trades_unprofitable():
+    # Spot 1,002: sem taxa, vender A rende acima do peg; com 0,25% de taxa, 1,002 * 0,9975 < 1
+    near_peg = dict(reserve_a=[1e6], reserve_b=[1.002e6], **GRID)
+    assert scan_pools(fee=0.0, **near_peg)["netProfit"][0] > 0
+    with_fee = scan_pools(fee=0.0025, **near_peg)
+    assert with_fee["netProfit"][0] < 0
+    assert len(rank_opportunities(with_fee, min_profit=0.01)[0]) == 0
+
+    # Com taxa: 9.975 A efetivos rendem 9.975 * 1,1M / 1.009.975 de B, cerca de 863,6 acima do peg
+    gross = 9_975 * 1.1e6 / 1_009_975 - 10_000
+    scan = scan_pools([1e6], [1.1e6], fee=0.0025, gas_cost=800, **GRID)
+    assert scan["grossProfit"][0] == pytest.approx(gross)
+    assert scan["netProfit"][0] == pytest.approx(gross - 800)
+    assert list(rank_opportunities(scan)[0]) == [0]
+    # Gas acima do lucro bruto do melhor trade
+    scan = scan_pools([1e6], [1.1e6], fee=0.0025, gas_cost=900, **GRID)
+    assert scan["netProfit"][0] == pytest.approx(gross - 900)
+    assert len(rank_opportunities(scan)[0]) == 0
+
+
+def test_rank_orders_by_profit_and_assigns_urgency():
+    profit = [1.5, 15, 4, 1.5, 1.5, 0.5, 50, -np.inf]
+    deviation = [0.0015, 0.0015, 0.0015, 0.006, -0.0025, 0.01, 0.0005, 0.2]
+    order, urgency = rank_opportunities(
+        {"netProfit": np.array(profit), "deviation": np.array(deviation)}, min_profit=1.0, min_deviation=0.001
+    )
+    # Abaixo do lucro mínimo (5), do desvio mínimo (6) ou sem reservas (7) ficam de fora; empates mantêm a ordem
+    assert list(order) == [1, 2, 0, 3, 4]
+    # high: lucro >= 10x o mínimo ou desvio >= 5x; medium: 3x ou 2x (desvio em valor absoluto)
+    assert list(urgency) == ["high", "medium", "low", "high", "medium"]
@@ -0,0 +1,44 @@
+"""O blueprint assíncrono descreve e consulta a rede padrão configurada, não a BSC Testnet fixa"""
+import json
+
+import requests
+
+
+def test_status_uses_default_network(fake_rpc, api, tmp_path):
+    _, url, _ = fake_rpc(chain_id=56)
+    networks_file = tmp_path / "networks.json"
+    networks_file.write_text(json.dumps([{"chainId": 56, "name": "BSC Mainnet", "rpcUrls": [url]}]))
+    base_url = api(url, DEFAULT_CHAIN_ID=56, NETWORKS_FILE=networks_file)
+
+    sync_status = requests.get(base_url + "/api/status", timeout=60).json()
+    async_status = requests.get(base_url + "/api/async/status", timeout=60).json()
+    assert async_status["status"] == "success"
+    assert async_status["network"]["name"] == "BSC Mainnet"
+    assert async_status["network"]["chainId"] == 56
+    assert async_status["network"]["rpcUrl"] == url
+    assert async_status["contracts"] == sync_status["contracts"]
+
+    pools = requests.get(base_url + "/api/async/pools", timeout=60).json()
+    assert pools["status"] == "success" and pools["totalPools"] == 30
+
+
+def test_other_chain_rejected(fake_rpc, api):
+    _, url, _ = fake_rpc()
+    base_url = api(url)
+    assert requests.get(base_url + "/api/async/status", params={"chainId": 97}, timeout=60).status_code == 200
+    response = requests.get(base_url + "/api/async/pools", params={"chainId": 56}, timeout=60)
+    assert response.status_code == 400
+    assert response.json()["supportedChainIds"] == [97]
+
+
+def test_async_routes_fail_over_to_next_endpoint(fake_rpc, api):
+    failing, failing_url, _ = fake_rpc()
+    _, good_url, _ = fake_rpc()
+    failing.faults.set(status=503)
+    base_url = api(f"{failing_url},{good_url}")
+
+    status = requests.get(base_url + "/api/async/status", timeout=60).json()
+    assert status["status"] == "success"
+    assert status["network"]["rpcUrl"] == good_url
+    pools = requests.get(base_url + "/api/async/pools", timeout=60).json()
+    assert pools["status"] == "success" and pools["totalPools"] == 30
@@ -0,0 +1,89 @@
+"""POST /api/tokens/<token>/balances (saldos em NDJSON) contra o RPC simulado"""
+import json
+
+import requests
+
+TOKEN = "0x000000000000000000000000000000000000abcd"
+
+
+def holder(index):
+    return f"0x{index:040x}"
+
+
+def read_ndjson(response):
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.iter_lines() if line]
+    return lines[:-1], lines[-1]
+
+
+def test_ndjson_body_returns_balances_in_input_order(fake_rpc, api):
+    server, url, stats = fake_rpc(block_time=600)
+    base_url = api(url, MULTICALL_CHUNK_SIZE=50, INDEXER_ENABLED="false")
+    # Os três formatos de linha aceitos, uma linha em branco e um endereço inválido
+    lines = []
+    for index in range(1, 121):
+        address = holder(index)
+        lines.append([address, json.dumps(address), json.dumps({"address": address})][index % 3])
+    lines.insert(10, "")
+    lines.insert(20, "não-é-endereço")
+    body = "\n".join(lines).encode()
+
+    stats.reset()
+    response = requests.post(
+        base_url + f"/api/tokens/{TOKEN}/balances", data=body,
+        headers={"Content-Type": "application/x-ndjson"}, stream=True, timeout=60
+    )
+    entries, summary = read_ndjson(response)
+
+    assert len(entries) == 121
+    invalid = entries.pop(19)
+    assert invalid == {"address": "não-é-endereço", "balance": None, "error": "endereço inválido"}
+    assert [entry["address"].lower() for entry in entries] == [holder(index) for index in range(1, 121)]
+    assert [int(entry["balance"]) for entry in entries] == [index * 10 ** 15 for index in range(1, 121)]
+    assert summary["status"] == "success"
+    assert (summary["totalHolders"], summary["failed"]) == (121, 1)
+    assert summary["block"] == server.chain.block_number()
+    # Um aggregate3 por lote de MULTICALL_CHUNK_SIZE linhas
+    functions = stats.snapshot()["functions"]
+    assert functions["balanceOf"] == 120
+    assert functions["aggregate3"] == 3
+
+
+def test_json_body_at_a_finalized_block_is_archived(fake_rpc, api):
+    server, url, stats = fake_rpc(block_time=600)
+    base_url = api(url, FINALITY_DEPTH=5, INDEXER_ENABLED="false")
+    block = server.chain.block_number() - 10
+    holders = [holder(index) for index in range(1, 31)]
+
+    def post(body):
+        response = requests.post(
+            base_url + f"/api/tokens/{TOKEN}/balances", params={"block": block}, json=body, stream=True, timeout=60
+        )
+        return read_ndjson(response)
+
+    stats.reset()
+    entries, summary = post(holders)
+    assert [int(entry["balance"]) for entry in entries] == [index * 10 ** 15 for index in range(1, 31)]
+    assert summary["block"] == block
+    assert stats.snapshot()["functions"]["balanceOf"] == 30
+
+    # Mesmos saldos no mesmo bloco finalizado: nenhuma chamada ao RPC
+    stats.reset()
+    assert post({"holders": holders}) == (entries, summary)
+    assert stats.snapshot()["methods"].get("eth_call", 0) == 0
+
+
+def test_invalid_requests_are_rejected(fake_rpc, api):
+    _, url, _ = fake_rpc(block_time=600)
+    base_url = api(url, BALANCES_MAX_JSON_SIZE=1000, INDEXER_ENABLED="false")
+
+    response = requests.post(base_url + "/api/tokens/0x123/balances", json=[holder(1)], timeout=60)
+    assert response.status_code == 400
+    response = requests.post(base_url + f"/api/tokens/{TOKEN}/balances", json={"holder": holder(1)}, timeout=60)
+    assert response.status_code == 400
+    # JSON grande demais: o corpo deve ir em NDJSON
+    response = requests.post(
+        base_url + f"/api/tokens/{TOKEN}/balances", json=[holder(index) for index in range(100)], timeout=60
+    )
+    assert response.status_code == 413
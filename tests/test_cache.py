@@ -0,0 +1,122 @@
+"""LRUCache, TTLCache e TokenMetadataCache (utils/cache.py): ordem de descarte, expiração e estatísticas"""
+import time
+
+from prometheus_client import REGISTRY
+
+from utils.cache import LRUCache, TTLCache, TokenMetadataCache
+from utils.shared_cache import MemoryBackend
+
+TOKEN = "0xA991a6642ee368683A8308D79a3B6a46c535D851"
+METADATA = {"name": "BRZ Stable", "symbol": "BRZ", "decimals": 18}
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(maxsize=3)
+    for key in "abc":
+        cache.set(key, key.upper())
+    # Ler "a" e regravar "b" os tornam recentes: "c" é o próximo a sair
+    assert cache.get("a") == "A"
+    cache.set("b", "B2")
+    cache.set("d", "D")
+    assert cache.get("c") is None
+    cache.set("e", "E")
+    assert cache.get("a") is None
+    assert [cache.get(key) for key in "bde"] == ["B2", "D", "E"]
+    assert len(cache) == 3
+
+    cache.delete("b")
+    assert cache.get("b", "padrão") == "padrão"
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_lru_stats_and_metrics():
+    def exported(result):
+        return REGISTRY.get_sample_value("brzstable_cache_requests_total", {"cache": "test_lru", "result": result}) or 0
+
+    before = exported("hit"), exported("miss")
+    cache = LRUCache(maxsize=2, name="test_lru")
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+    assert cache.stats() == {"size": 1, "maxSize": 2, "hits": 2, "misses": 1, "hitRatio": 0.6667}
+    assert (exported("hit") - before[0], exported("miss") - before[1]) == (2, 1)
+    # Sem consultas, a taxa de acerto é zero (sem divisão por zero)
+    assert LRUCache().stats()["hitRatio"] == 0.0
+
+
+def test_ttl_entries_expire():
+    cache = TTLCache(maxsize=10, ttl=0.2)
+    cache.set("short", 1, ttl=0.05)
+    cache.set("default", 2)
+    cache.set("long", 3, ttl=60)
+    time.sleep(0.1)
+    assert cache.get("short") is None
+    assert cache.get("default") == 2
+    time.sleep(0.15)
+    assert cache.get("default") is None
+    assert cache.get("long") == 3
+    # Entradas expiradas saem do cache na leitura
+    assert len(cache) == 1
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_ttl_entries_expire_when_the_block_changes():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("supply", 100, block=10)
+    cache.set("unversioned", 1)
+    assert cache.get("supply", block=10) == 100
+    # Sem bloco na leitura, vale o TTL
+    assert cache.get("supply") == 100
+    assert cache.get("supply", block=11) is None
+    assert cache.get("supply", block=10) is None
+    # Entrada sem bloco vale para qualquer bloco
+    assert cache.get("unversioned", block=11) == 1
+
+
+def test_ttl_eviction_follows_lru_order():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_token_metadata_cache():
+    cache = TokenMetadataCache(maxsize=10, supply_ttl=60)
+    assert cache.get_metadata(TOKEN) is None
+    cache.set_metadata(TOKEN, METADATA)
+    cache.set_supply(TOKEN, 10 ** 27, block=5)
+    assert cache.get_metadata(TOKEN) == METADATA
+    assert cache.get_supply(TOKEN, block=5) == 10 ** 27
+    # Metadados não dependem do bloco; o totalSupply de outro bloco precisa ser lido de novo
+    assert cache.get_supply(TOKEN, block=6) is None
+    assert cache.get_metadata(TOKEN) == METADATA
+
+    stats = cache.stats()
+    assert (stats["metadata"]["hits"], stats["metadata"]["misses"]) == (2, 1)
+    assert (stats["totalSupply"]["hits"], stats["totalSupply"]["misses"]) == (1, 1)
+
+    cache.clear()
+    assert cache.get_metadata(TOKEN) is None
+
+
+def test_token_metadata_cache_falls_back_to_the_shared_backend():
+    backend = MemoryBackend()
+    writer = TokenMetadataCache(backend=backend, namespace="97:")
+    reader = TokenMetadataCache(backend=backend, namespace="97:")
+    other_chain = TokenMetadataCache(backend=backend, namespace="56:")
+    writer.set_metadata(TOKEN, METADATA)
+    writer.set_supply(TOKEN, 42, block=7)
+
+    # Outro worker encontra no backend e guarda no próprio LRU
+    assert reader.get_metadata(TOKEN) == METADATA
+    assert reader.get_supply(TOKEN, block=7) == 42
+    assert reader.metadata.get(TOKEN) == METADATA
+    assert reader.get_supply(TOKEN, block=8) is None
+    # O namespace separa as redes
+    assert other_chain.get_metadata(TOKEN) is None
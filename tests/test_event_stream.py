@@ -0,0 +1,134 @@
+"""EventBroker, Subscription e BlockEventProducer (utils/event_stream.py), sem socket"""
+from utils.event_stream import BlockEventProducer, EventBroker, StreamEvent, Subscription, parse_event_id
+
+TOKEN_A = "0x5Fc088c2890fAB8c481cFB6D0d16f15A7f75c760"
+TOKEN_B = "0xA991a6642ee368683A8308D79a3B6a46c535D851"
+
+
+def drain(subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+    return [event.id for event in events]
+
+
+def test_subscriptions_filter_by_topic_and_token():
+    broker = EventBroker()
+    everything, _ = broker.subscribe()
+    prices, _ = broker.subscribe(topics=["price"])
+    token_b, _ = broker.subscribe(token=TOKEN_B.lower())
+
+    broker.publish(StreamEvent(1, 0, "price", {"pool": "a"}, tokens=[TOKEN_A]))
+    broker.publish(StreamEvent(1, 1, "price", {"pool": "b"}, tokens=[TOKEN_B]))
+    # Sem tokens, o evento vale para qualquer filtro de token
+    broker.publish(StreamEvent(1, 2, "alerts", {"alerts": []}))
+
+    assert drain(everything) == ["1-0", "1-1", "1-2"]
+    assert drain(prices) == ["1-0", "1-1"]
+    # O filtro de token não diferencia maiúsculas de minúsculas (endereços com checksum)
+    assert drain(token_b) == ["1-1", "1-2"]
+    assert broker.wants("price") and broker.wants("arbitrage")
+
+    broker.unsubscribe(everything)
+    broker.unsubscribe(token_b)
+    assert not broker.wants("arbitrage")
+    assert broker.latest("price") == {"pool": "b"}
+    assert broker.latest("arbitrage") is None
+
+
+def test_last_event_id_replays_newer_events_in_order():
+    broker = EventBroker(history_size=4)
+    for block, sequence, topic in [(9, 0, "price"), (10, 0, "price"), (10, 1, "alerts"), (10, 2, "price"), (11, 0, "price")]:
+        broker.publish(StreamEvent(block, sequence, topic, {}))
+
+    _, replay = broker.subscribe(last_event_id="10-0")
+    assert [event.id for event in replay] == ["10-1", "10-2", "11-0"]
+    # A retomada respeita o filtro de tópico do novo assinante
+    _, replay = broker.subscribe(topics=["price"], last_event_id="9-5")
+    assert [event.id for event in replay] == ["10-0", "10-2", "11-0"]
+    # Sem Last-Event-ID (ou inválido), nada é reenviado; 9-0 já saiu do histórico
+    assert broker.subscribe()[1] == []
+    assert broker.subscribe(last_event_id="abc")[1] == []
+    assert [event.id for event in broker.subscribe(last_event_id="0-0")[1]][0] == "10-0"
+
+
+def test_parse_event_id():
+    assert parse_event_id("123-4") == (123, 4)
+    assert parse_event_id(None) is None
+    assert parse_event_id("123") is None
+    assert parse_event_id("a-b") is None
+
+
+def test_slow_consumer_is_dropped_when_its_queue_fills():
+    broker = EventBroker(queue_size=2)
+    slow, _ = broker.subscribe()
+    fast, _ = broker.subscribe()
+    for sequence in range(3):
+        broker.publish(StreamEvent(1, sequence, "price", {}))
+        drain(fast)
+
+    assert slow.dropped
+    assert not fast.dropped
+    assert broker.stats()["droppedSubscribers"] == 1
+    # Depois de descartado não recebe mais nada, e o contador não volta a subir
+    broker.publish(StreamEvent(2, 0, "price", {}))
+    assert drain(slow) == ["1-0", "1-1"]
+    assert drain(fast) == ["2-0"]
+    assert broker.stats() == {"subscribers": 2, "published": 4, "droppedSubscribers": 1, "history": 4}
+
+    # Assinantes descartados não contam como interessados no tópico
+    broker.unsubscribe(fast)
+    assert not broker.wants("price")
+
+
+def test_subscription_ignores_events_outside_its_filters_even_when_full():
+    subscription = Subscription(topics=["alerts"], queue_size=1)
+    subscription.offer(StreamEvent(1, 0, "alerts", {}))
+    subscription.offer(StreamEvent(1, 1, "price", {}))
+    assert not subscription.dropped
+
+
+class FakeHead:
+    def __init__(self, block):
+        self.block = block
+
+    def latest(self):
+        return self.block
+
+
+def test_producer_republishes_only_on_change():
+    broker = EventBroker()
+    head = FakeHead(100)
+    prices = {"a": 1.0, "b": 2.0}
+    requested = []
+
+    def collect(block_number, topics):
+        requested.append((block_number, topics))
+        return [("price", pool, {"pool": pool, "price": price}, [TOKEN_A]) for pool, price in prices.items()]
+
+    producer = BlockEventProducer(broker, head, collect, ["price", "alerts"])
+    subscription, _ = broker.subscribe(topics=["price"])
+
+    producer.produce_once()
+    events = [subscription.queue.get_nowait() for _ in range(2)]
+    assert [event.id for event in events] == ["100-0", "100-1"]
+    assert events[0].data == {"block": 100, "pool": "a", "price": 1.0}
+    assert events[0].encode() == 'id: 100-0\nevent: price\ndata: {"block":100,"pool":"a","price":1.0}\n\n'
+    # Só os tópicos com assinantes são lidos
+    assert requested == [(100, ["price"])]
+
+    # Mesmo bloco: nenhuma leitura
+    producer.produce_once()
+    assert len(requested) == 1
+
+    # Bloco novo: só o pool cujo preço mudou é publicado, com sequência a partir de 0
+    head.block = 101
+    prices["b"] = 2.5
+    producer.produce_once()
+    assert drain(subscription) == ["101-0"]
+    assert broker.latest("price") == {"block": 101, "pool": "b", "price": 2.5}
+
+    head.block = 102
+    producer.produce_once()
+    assert drain(subscription) == []
+    assert producer.last_block == 102
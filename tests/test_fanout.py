@@ -0,0 +1,50 @@
+"""Prazo total do fan-out: resultados parciais, erros de timeout dos itens e itens que não chegam a começar"""
+import threading
+import time
+
+from utils.fanout import bounded_map, get_executor
+from utils.singleflight import SingleFlightTimeout
+
+WORKERS = get_executor()._max_workers
+
+
+def test_deadline_returns_partial_results():
+    def fn(item):
+        time.sleep(0.5 if item == 3 else 0)
+        return item
+
+    results, complete = bounded_map(fn, range(6), deadline=0.2)
+    assert results == [0, 1, 2]
+    assert complete is False
+
+
+def test_item_timeout_error_is_not_the_deadline():
+    errors = []
+
+    def fn(item):
+        if item == 1:
+            raise SingleFlightTimeout("leitura coalescida expirou")
+        return item
+
+    results, complete = bounded_map(fn, range(4), deadline=5, on_error=lambda item, e: errors.append(item))
+    assert results == [0, 2, 3]
+    assert complete is True
+    assert errors == [1]
+
+
+def test_items_after_deadline_never_start():
+    started = []
+    lock = threading.Lock()
+
+    def fn(item):
+        with lock:
+            started.append(item)
+        time.sleep(0.2)
+        return item
+
+    # No máximo duas "ondas" começam dentro do prazo; as demais ficam na fila e são descartadas
+    results, complete = bounded_map(fn, range(WORKERS * 4), deadline=0.3)
+    time.sleep(0.6)
+    assert complete is False
+    assert len(results) <= WORKERS * 2
+    assert len(started) <= WORKERS * 2
@@ -0,0 +1,76 @@
+"""Consultas históricas (?block=) e cache permanente dos blocos finalizados, contra o RPC simulado"""
+import time
+
+import requests
+
+API_ENV = dict(FINALITY_DEPTH=5, RESPONSE_CACHE_MAXSIZE=0, STALE_MAX_AGE=0, INDEXER_ENABLED="false")
+
+
+def eth_calls(stats):
+    return stats.snapshot()["methods"].get("eth_call", 0)
+
+
+def test_finalized_block_is_read_once_and_survives_restart(fake_rpc, api):
+    server, url, stats = fake_rpc(pools=10, block_time=0.1)
+    block = server.chain.block_number()
+    base_url = api(url, **API_ENV)
+    # Espera o bloco passar da profundidade de finalidade (5 blocos de 0,1s)
+    time.sleep(1.5)
+
+    stats.reset()
+    response = requests.get(base_url + "/api/pools", params={"block": block, "limit": 10}, timeout=60)
+    assert response.status_code == 200
+    assert response.json()["block"] == block
+    assert len(response.json()["pools"]) == 10
+    assert eth_calls(stats) > 0
+
+    # Mesmo bloco em hexadecimal: tudo vem do arquivo, inclusive depois de reiniciar a API
+    stats.reset()
+    again = requests.get(base_url + "/api/pools", params={"block": hex(block), "limit": 10}, timeout=60)
+    assert again.json()["pools"] == response.json()["pools"]
+    assert eth_calls(stats) == 0
+
+    archive = requests.get(base_url + "/api/monitor/system", timeout=60).json()["cache"]["archive"]
+    assert archive["backend"] == "archive"
+    assert archive["hits"] > 0
+
+    restarted = api(url, **API_ENV)
+    stats.reset()
+    after_restart = requests.get(restarted + "/api/pools", params={"block": block, "limit": 10}, timeout=60)
+    assert after_restart.json()["pools"] == response.json()["pools"]
+    assert eth_calls(stats) == 0
+
+
+def test_recent_block_is_not_archived(fake_rpc, api):
+    # Blocos de 10s: o bloco atual continua dentro da profundidade de finalidade durante o teste
+    server, url, stats = fake_rpc(pools=10, block_time=10)
+    base_url = api(url, **API_ENV, CACHE_MAXSIZE=0)
+    block = server.chain.block_number()
+
+    for _ in range(2):
+        stats.reset()
+        response = requests.get(base_url + "/api/status", params={"block": block}, timeout=60)
+        assert response.status_code == 200
+        assert response.json()["block"] == block
+        assert eth_calls(stats) > 0
+
+
+def test_invalid_block_queries_are_rejected(fake_rpc, api):
+    server, url, _ = fake_rpc(pools=10, block_time=600)
+    base_url = api(url, **API_ENV)
+    head = server.chain.block_number()
+
+    for path, params in [
+        ("/api/pools", {"block": "abc"}),
+        ("/api/pools", {"block": "-1"}),
+        ("/api/status", {"block": head + 1000}),
+        # Fora das rotas históricas e com todas as redes ao mesmo tempo
+        ("/api/arbitrage/opportunities", {"block": head}),
+        ("/api/status", {"block": head, "chainId": "all"})
+    ]:
+        response = requests.get(base_url + path, params=params, timeout=60)
+        assert response.status_code == 400, (path, params)
+        assert response.json()["status"] == "error"
+
+    # Tags continuam aceitas
+    assert requests.get(base_url + "/api/stablecoins", params={"block": "latest"}, timeout=60).status_code == 200
@@ -0,0 +1,69 @@
+"""O indexador relê o item de topics[1] de cada log e descarta tópicos que não são IDs existentes"""
+import time
+
+from web3 import Web3
+
+from benchmarks.fake_rpc import LIQUIDITY_MANAGER_ADDRESS, STABLECOIN_FACTORY_ADDRESS, derive_id
+from routes.automation import LIQUIDITY_MANAGER_ABI, STABLECOIN_FACTORY_ABI
+from utils.indexer import EventIndexer
+
+EVENT = Web3.keccak(text="PoolUpdated(bytes32)")
+
+
+def make_indexer(url, tmp_path):
+    contracts = {
+        "MULTI_LIQUIDITY_MANAGER": Web3.to_checksum_address(LIQUIDITY_MANAGER_ADDRESS),
+        "STABLECOIN_FACTORY": Web3.to_checksum_address(STABLECOIN_FACTORY_ADDRESS)
+    }
+    return EventIndexer(
+        Web3(Web3.HTTPProvider(url)), str(tmp_path / "index.db"), contracts,
+        LIQUIDITY_MANAGER_ABI, STABLECOIN_FACTORY_ABI,
+        multicall_address="0xcA11bde05977b3631167028862bE2a173976CA11"
+    )
+
+
+def indexed_pools(indexer):
+    rows, _ = indexer.query_pools(LIQUIDITY_MANAGER_ADDRESS)
+    return {row["pool_id"]: row for row in rows}
+
+
+def test_first_topic_is_item_id(fake_rpc, tmp_path):
+    server, url, _ = fake_rpc(pools=5, stablecoins=2, block_time=0.1)
+    chain = server.chain
+    indexer = make_indexer(url, tmp_path)
+    indexer.sync_once()
+    assert len(indexed_pools(indexer)) == 5
+    time.sleep(0.3)
+
+    # Pool novo, pool existente desativado e logs cujo topics[1] não é um poolId
+    new_id = derive_id("pool", "novo")
+    chain.pools[new_id] = chain.pools[chain.pool_ids[0]][:4] + (True, 1_800_000_000, 97)
+    chain.pool_ids.append(new_id)
+    updated_id = chain.pool_ids[1]
+    chain.pools[updated_id] = chain.pools[updated_id][:4] + (False,) + chain.pools[updated_id][5:]
+    not_an_id = bytes(12) + bytes.fromhex(chain.tokens[0][2:])
+    chain.add_log(LIQUIDITY_MANAGER_ADDRESS, [EVENT, new_id])
+    chain.add_log(LIQUIDITY_MANAGER_ADDRESS, [EVENT, updated_id])
+    chain.add_log(LIQUIDITY_MANAGER_ADDRESS, [EVENT, not_an_id])
+    chain.add_log(LIQUIDITY_MANAGER_ADDRESS, [EVENT])
+    time.sleep(0.3)
+    indexer.sync_once()
+
+    pools = indexed_pools(indexer)
+    assert len(pools) == 6
+    assert pools[new_id.hex()]["is_active"] == 1
+    assert pools[updated_id.hex()]["is_active"] == 0
+    assert not_an_id.hex() not in pools
+
+
+def test_change_without_log_is_not_seen(fake_rpc, tmp_path):
+    server, url, _ = fake_rpc(pools=3, stablecoins=1, block_time=0.1)
+    chain = server.chain
+    indexer = make_indexer(url, tmp_path)
+    indexer.sync_once()
+    time.sleep(0.3)
+
+    pool_id = chain.pool_ids[1]
+    chain.pools[pool_id] = chain.pools[pool_id][:4] + (False,) + chain.pools[pool_id][5:]
+    indexer.sync_once()
+    assert indexed_pools(indexer)[pool_id.hex()]["is_active"] == 1
@@ -0,0 +1,72 @@
+"""FastJSONProvider deve gerar o mesmo JSON da stdlib, inclusive com inteiros uint256, sem sair do orjson"""
+import json
+from collections import namedtuple
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from utils import json_provider
+from utils.json_provider import FastJSONProvider
+
+pytestmark = pytest.mark.skipif(json_provider.orjson is None, reason="orjson não instalado")
+
+Pool = namedtuple("Pool", "tokenA liquidityAmount")
+
+PAYLOAD = {
+    "status": "success",
+    "pools": [
+        {"liquidityAmount": 10 ** 30, "reserves": (2 ** 64, 2 ** 64 - 1), "isActive": True, "price": 1.0001},
+        {"liquidityAmount": -2 ** 200, "nested": [[2 ** 100]], "createdAt": 1700000000, "pair": None}
+    ],
+    "record": Pool("0x5Fc088c2890fAB8c481cFB6D0d16f15A7f75c760", 10 ** 25),
+    "totalPools": 2
+}
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.json.compact = True
+    return app
+
+
+def test_big_ints_match_stdlib(app, monkeypatch):
+    calls = []
+    monkeypatch.setattr(FastJSONProvider, "dumps", lambda self, obj, **kwargs: calls.append(obj))
+    with app.app_context():
+        body = app.json.dumps_bytes(PAYLOAD)
+    # Nenhum fallback para a stdlib (super().dumps)
+    assert calls == []
+    assert json.loads(body) == json.loads(json.dumps(PAYLOAD))
+    assert b"1000000000000000000000000000000" in body
+    assert b"18446744073709551616" in body
+
+
+def test_payload_is_not_modified(app):
+    payload = {"values": [10 ** 30], "small": [1, 2]}
+    with app.app_context():
+        app.json.dumps_bytes(payload)
+    assert payload == {"values": [10 ** 30], "small": [1, 2]}
+
+
+def test_big_int_strings(app):
+    app.json.big_int_as_string = True
+    with app.test_request_context():
+        data = json.loads(app.json.dumps_bytes(PAYLOAD))
+    assert data["pools"][0]["liquidityAmount"] == str(10 ** 30)
+    assert data["totalPools"] == 2
+
+
+def test_datetime_uses_flask_format(app):
+    moment = datetime(2024, 1, 2, 3, 4, 5)
+    with app.app_context():
+        assert json.loads(app.json.dumps_bytes({"at": moment})) == json.loads(DefaultJSONProvider(app).dumps({"at": moment}))
+
+
+def test_unsupported_types_raise(app):
+    with app.app_context(), pytest.raises(TypeError):
+        app.json.dumps_bytes({"value": object()})
+
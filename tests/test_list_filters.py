@@ -0,0 +1,102 @@
+"""?active= e ?token= de /pools e /stablecoins valem com ou sem o índice SQLite"""
+import time
+
+import pytest
+import requests
+from web3 import Web3
+
+
+def get(base_url, path, **params):
+    response = requests.get(base_url + path, params=params, timeout=60)
+    return response.status_code, response.json()
+
+
+def pool_keys(body):
+    return sorted(pool["poolId"] for pool in body["pools"])
+
+
+@pytest.fixture
+def chain_api(fake_rpc, api):
+    server, url, _ = fake_rpc(pools=30, stablecoins=10)
+    return server.chain, api(url, INDEXER_ENABLED="false")
+
+
+def expected_pools(chain, active=None, token=None, ordered=False):
+    pool_ids = [
+        pool_id.hex() for pool_id, info in chain.pools.items()
+        if (active is None or info[4] == active) and (token is None or token in (info[0], info[1]))
+    ]
+    return pool_ids if ordered else sorted(pool_ids)
+
+
+def collect_pages(base_url, path, limit, **filters):
+    """Segue nextCursor até o fim; toda página antes da última vem completa"""
+    pool_ids, cursor = [], None
+    while True:
+        params = dict(filters, limit=limit, **({"cursor": cursor} if cursor else {}))
+        status, body = get(base_url, path, **params)
+        assert status == 200
+        pool_ids.extend(pool["poolId"] for pool in body["pools"])
+        cursor = body["nextCursor"]
+        if cursor is None:
+            return pool_ids
+        assert len(body["pools"]) == limit
+
+
+@pytest.mark.parametrize("prefix", ["/api", "/api/async"])
+def test_pool_filters_on_chain(chain_api, prefix):
+    chain, base_url = chain_api
+    token = chain.tokens[0]
+    status, body = get(base_url, prefix + "/pools", active="false")
+    assert status == 200 and pool_keys(body) == expected_pools(chain, active=False)
+    status, body = get(base_url, prefix + "/pools", token=token)
+    assert status == 200 and pool_keys(body) == expected_pools(chain, token=token)
+    status, body = get(base_url, prefix + "/pools", active="true", token=token)
+    assert status == 200 and pool_keys(body) == expected_pools(chain, active=True, token=token)
+    status, body = get(base_url, prefix + "/pools")
+    assert len(body["pools"]) == len(chain.pools)
+
+
+@pytest.mark.parametrize("prefix", ["/api", "/api/async"])
+def test_filters_apply_before_pagination(chain_api, prefix):
+    chain, base_url = chain_api
+    token = chain.tokens[0]
+    assert collect_pages(base_url, prefix + "/pools", 2, active="false") == expected_pools(chain, active=False, ordered=True)
+    assert collect_pages(base_url, prefix + "/pools", 1, token=token) == expected_pools(chain, token=token, ordered=True)
+    assert collect_pages(base_url, prefix + "/pools", 4, active="true") == expected_pools(chain, active=True, ordered=True)
+
+
+@pytest.mark.parametrize("prefix", ["/api", "/api/async"])
+def test_stablecoin_filters_on_chain(chain_api, prefix):
+    chain, base_url = chain_api
+    collateral = chain.tokens[1]
+    status, body = get(base_url, prefix + "/stablecoins", token=collateral)
+    expected = [info for info in chain.stablecoins.values() if info[3][2] == collateral]
+    assert status == 200 and len(body["stablecoins"]) == len(expected) > 0
+    status, body = get(base_url, prefix + "/stablecoins", active="false")
+    assert status == 200 and body["stablecoins"] == []
+
+
+@pytest.mark.parametrize("prefix", ["/api", "/api/async"])
+def test_invalid_filters_rejected(chain_api, prefix):
+    _, base_url = chain_api
+    assert get(base_url, prefix + "/pools", active="talvez")[0] == 400
+    assert get(base_url, prefix + "/stablecoins", token="nao-e-endereco")[0] == 400
+
+
+def test_pool_filters_match_index(fake_rpc, api):
+    server, url, _ = fake_rpc(pools=30, stablecoins=10, block_time=0.5)
+    chain = server.chain
+    base_url = api(url, INDEXER_ENABLED="true", INDEXER_INTERVAL="0.2")
+    deadline = time.monotonic() + 30
+    while get(base_url, "/api/pools")[1].get("source") != "index":
+        assert time.monotonic() < deadline, "índice não ficou pronto"
+        time.sleep(0.2)
+
+    token = Web3.to_checksum_address(chain.tokens[0])
+    status, body = get(base_url, "/api/pools", active="false", token=token)
+    assert status == 200 and body["source"] == "index"
+    assert pool_keys(body) == expected_pools(chain, active=False, token=chain.tokens[0])
+    # Mesma paginação do caminho sem índice (test_filters_apply_before_pagination)
+    assert collect_pages(base_url, "/api/pools", 2, active="false") == expected_pools(chain, active=False, ordered=True)
+    assert collect_pages(base_url, "/api/pools", 4, active="true") == expected_pools(chain, active=True, ordered=True)
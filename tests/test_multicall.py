@@ -0,0 +1,74 @@
+"""Leituras agregadas em Multicall3 aggregate3: mesmos valores das chamadas diretas, falhas isoladas e poucas idas ao RPC"""
+import requests
+from web3 import Web3
+
+from benchmarks.fake_rpc import LIQUIDITY_MANAGER_ADDRESS, MULTICALL3_ADDRESS, derive_id
+from routes.automation import ERC20_ABI, LIQUIDITY_MANAGER_ABI
+from utils.multicall import Call, aggregate
+
+
+def contracts(url, chain):
+    w3 = Web3(Web3.HTTPProvider(url))
+    manager = w3.eth.contract(address=Web3.to_checksum_address(LIQUIDITY_MANAGER_ADDRESS), abi=LIQUIDITY_MANAGER_ABI)
+    token = w3.eth.contract(address=Web3.to_checksum_address(chain.tokens[0]), abi=ERC20_ABI)
+    return w3, manager, token
+
+
+def reads(manager, token, chain):
+    return [
+        token.functions.name(),
+        token.functions.totalSupply(),
+        manager.functions.getPoolInfo(chain.pool_ids[0]),
+        manager.functions.getPoolInfo(derive_id("pool", "inexistente")),
+        manager.functions.getTokenPrice(chain.pool_ids[1], True)
+    ]
+
+
+def test_matches_direct_calls_and_isolates_failures(fake_rpc):
+    server, url, stats = fake_rpc(pools=5)
+    w3, manager, token = contracts(url, server.chain)
+    functions = reads(manager, token, server.chain)
+    stats.reset()
+    results = aggregate(w3, [Call.from_function(function) for function in functions])
+    assert stats.snapshot()["methods"]["eth_call"] == 1
+
+    for function, (success, value) in zip(functions, results):
+        if function.fn_name == "getPoolInfo" and function.args[0] not in server.chain.pools:
+            assert (success, value) == (False, None)
+        else:
+            assert success and value == function.call()
+
+
+def test_chunks(fake_rpc):
+    server, url, stats = fake_rpc(pools=5)
+    w3, manager, token = contracts(url, server.chain)
+    calls = [Call.from_function(function) for function in reads(manager, token, server.chain)]
+    stats.reset()
+    results = aggregate(w3, calls, chunk_size=2)
+    assert stats.snapshot()["methods"]["eth_call"] == 3
+    assert [success for success, _ in results] == [True, True, True, False, True]
+
+
+def test_falls_back_without_multicall(fake_rpc):
+    server, url, stats = fake_rpc(pools=5)
+    w3, manager, token = contracts(url, server.chain)
+    functions = reads(manager, token, server.chain)
+    missing = "0x000000000000000000000000000000000000dead"
+    assert missing != MULTICALL3_ADDRESS
+    results = aggregate(w3, [Call.from_function(function) for function in functions], multicall_address=missing)
+    assert [success for success, _ in results] == [True, True, True, False, True]
+    assert results[2][1] == functions[2].call()
+
+
+def test_pools_route_round_trips(fake_rpc, api):
+    _, url, stats = fake_rpc(pools=200, stablecoins=10)
+    # Sem caches: a listagem inteira é lida da chain
+    base_url = api(url, RESPONSE_CACHE_MAXSIZE=0, STALE_MAX_AGE=0, CHAIN_READ_TTL=0, TOKEN_CACHE_MAXSIZE=0)
+    stats.reset()
+    body = requests.get(base_url + "/api/pools", timeout=60).json()
+    upstream = stats.snapshot()
+    assert body["totalPools"] == 200
+    # ~800 leituras (pools, preços e metadados dos tokens) em um punhado de eth_calls
+    assert upstream["functions"]["getPoolInfo"] == upstream["functions"]["getTokenPrice"] == 200
+    assert upstream["methods"]["eth_call"] == upstream["functions"]["aggregate3"]
+    assert upstream["rpcCalls"] <= 10
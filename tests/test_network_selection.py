@@ -0,0 +1,57 @@
+"""?chainId= nas rotas de monitoramento, preço e stream: a rede pedida ou 400, nunca a padrão em silêncio"""
+import json
+
+import pytest
+import requests
+
+TOKEN = "0xA991a6642ee368683A8308D79a3B6a46c535D851"
+
+
+@pytest.fixture
+def two_networks(fake_rpc, api, tmp_path):
+    _, default_url, _ = fake_rpc(chain_id=97)
+    _, other_url, _ = fake_rpc(chain_id=56)
+    networks_file = tmp_path / "networks.json"
+    networks_file.write_text(json.dumps([{"chainId": 56, "name": "BSC Mainnet", "rpcUrls": [other_url]}]))
+    return api(default_url, NETWORKS_FILE=networks_file), default_url, other_url
+
+
+def test_monitor_reports_requested_network(two_networks):
+    base_url, default_url, other_url = two_networks
+    for path, params in (("/api/monitor/system", {"chainId": 56}), ("/api/56/monitor/system", None)):
+        blockchain = requests.get(base_url + path, params=params, timeout=60).json()["blockchain"]
+        assert blockchain["chainId"] == 56 and blockchain["network"] == "BSC Mainnet"
+        assert [endpoint["url"] for endpoint in blockchain["rpcEndpoints"]] == [other_url]
+
+    blockchain = requests.get(base_url + "/api/monitor/system", timeout=60).json()["blockchain"]
+    assert blockchain["chainId"] == 97
+    assert [endpoint["url"] for endpoint in blockchain["rpcEndpoints"]] == [default_url]
+
+
+def test_monitor_rpc_metrics_are_per_network(fake_rpc, api, tmp_path):
+    _, default_url, default_stats = fake_rpc(chain_id=97)
+    _, other_url, other_stats = fake_rpc(chain_id=56)
+    networks_file = tmp_path / "networks.json"
+    networks_file.write_text(json.dumps([{"chainId": 56, "name": "BSC Mainnet", "rpcUrls": [other_url]}]))
+    base_url = api(default_url, NETWORKS_FILE=networks_file, BLOCK_POLL_INTERVAL=600)
+    for _ in range(3):
+        assert requests.get(base_url + "/api/56/status", timeout=60).status_code == 200
+    requests.get(base_url + "/api/status", timeout=60)
+
+    # Chamadas e latência de RPC contam só a rede pedida (as mesmas que chegaram ao RPC dela)
+    metrics = requests.get(base_url + "/api/56/monitor/system", timeout=60).json()["metrics"]
+    assert metrics["rpc"]["calls"] == other_stats.snapshot()["rpcCalls"] > 0
+    before = default_stats.snapshot()["rpcCalls"]
+    metrics = requests.get(base_url + "/api/monitor/system", timeout=60).json()["metrics"]
+    assert before <= metrics["rpc"]["calls"] <= default_stats.snapshot()["rpcCalls"]
+    assert metrics["headBlocks"].keys() == {"56", "97"}
+
+
+@pytest.mark.parametrize("path", [f"/api/price/{TOKEN}", f"/api/price/{TOKEN}/history", "/api/stream"])
+def test_default_network_only_routes(two_networks, path):
+    base_url, _, _ = two_networks
+    response = requests.get(base_url + path, params={"chainId": 56}, timeout=60)
+    assert response.status_code == 400
+    assert response.json()["supportedChainIds"] == [97]
+    if path != "/api/stream":
+        assert requests.get(base_url + path, params={"chainId": 97}, timeout=60).status_code == 200
@@ -0,0 +1,142 @@
+"""Buffers circulares, agregados OHLC e persistência do histórico de preços (utils/price_history.py)"""
+import logging
+import os
+
+import pytest
+
+from utils.price_history import (
+    HEADER, OHLC_RECORD, RAW_RECORD, PoolPriceSeries, PriceHistory, PriceSampler, RingBuffer, invert_point
+)
+
+POOL = "ab" * 32
+TOKEN_A = "0x5Fc088c2890fAB8c481cFB6D0d16f15A7f75c760"
+TOKEN_B = "0xA991a6642ee368683A8308D79a3B6a46c535D851"
+
+
+def test_ring_wraps_around_keeping_the_newest_records():
+    ring = RingBuffer(RAW_RECORD, 3)
+    assert ring.last() is None
+    assert list(ring) == []
+    for block in range(1, 6):
+        ring.append(block, float(block), block / 10)
+    assert ring.written == 5
+    assert len(ring) == 3
+    assert [record[0] for record in ring] == [3, 4, 5]
+    assert ring.last() == (5, 5.0, 0.5)
+
+    ring.replace_last(6, 6.0, 0.6)
+    assert [record[0] for record in ring] == [3, 4, 6]
+
+
+def test_ohlc_buckets_roll_over_by_minute_and_hour():
+    series = PoolPriceSeries(raw_capacity=16, bucket_capacity=16)
+    # 3 amostras no minuto 3600..3659, 1 no seguinte e 1 na hora seguinte
+    for block, (timestamp, price) in enumerate([(3600, 1.0), (3610, 1.5), (3650, 0.8), (3660, 1.1), (7200, 0.9)]):
+        series.record(block, timestamp, price)
+
+    minutes = series.points(0, 10 ** 9, "1m")
+    assert minutes == [
+        {"time": 3600, "open": 1.0, "high": 1.5, "low": 0.8, "close": 0.8},
+        {"time": 3660, "open": 1.1, "high": 1.1, "low": 1.1, "close": 1.1},
+        {"time": 7200, "open": 0.9, "high": 0.9, "low": 0.9, "close": 0.9},
+    ]
+    hours = series.points(0, 10 ** 9, "1h")
+    assert hours == [
+        {"time": 3600, "open": 1.0, "high": 1.5, "low": 0.8, "close": 1.1},
+        {"time": 7200, "open": 0.9, "high": 0.9, "low": 0.9, "close": 0.9},
+    ]
+    # Intervalo fechado nos dois extremos; a resolução raw devolve cada amostra
+    assert [point["time"] for point in series.points(3610, 3660, "1m")] == [3660]
+    assert [point["block"] for point in series.points(3610, 3660, "raw")] == [1, 2, 3]
+    assert series.latest() == (4, 7200.0, 0.9)
+
+
+def test_invert_point_swaps_high_and_low():
+    point = {"time": 60, "open": 2.0, "high": 4.0, "low": 0.5, "close": 1.0}
+    assert invert_point(point) == {"time": 60, "open": 0.5, "high": 2.0, "low": 0.25, "close": 1.0}
+    # Preço zero (pool sem liquidez) não divide por zero
+    assert invert_point(dict(point, low=0.0, close=0.0))["high"] == 0.0
+    assert point["open"] == 2.0
+
+
+def test_mmap_history_survives_reopen(tmp_path):
+    directory = str(tmp_path / "history")
+    history = PriceHistory(directory, raw_capacity=4, bucket_capacity=4)
+    assert history.series(POOL) is None
+    history.set_pools({POOL: (TOKEN_A, TOKEN_B)})
+    for block in range(6):
+        history.record(POOL, block, 60.0 * block, 1 + block / 100)
+
+    # Outro processo (ou um reinício) enxerga as mesmas séries e o índice de pools
+    reopened = PriceHistory(directory, raw_capacity=4, bucket_capacity=4)
+    series = reopened.series(POOL)
+    assert [point["block"] for point in series.points(0, 10 ** 9, "raw")] == [2, 3, 4, 5]
+    assert len(series.buckets["1m"]) == 4
+    assert reopened.pools_for_token(TOKEN_B.lower()) == [(POOL, TOKEN_A, True)]
+
+    reopened.record(POOL, 6, 360.0, 1.06)
+    assert history.series(POOL).latest() == (6, 360.0, 1.06)
+
+
+def test_capacity_change_resets_the_file_with_a_warning(tmp_path, caplog):
+    path = str(tmp_path / "pool.raw.ring")
+    ring = RingBuffer(RAW_RECORD, 4, path)
+    ring.append(1, 1.0, 1.0)
+    assert len(RingBuffer(RAW_RECORD, 4, path)) == 1
+
+    with caplog.at_level(logging.WARNING):
+        resized = RingBuffer(RAW_RECORD, 8, path)
+    assert "histórico descartado" in caplog.text
+    assert resized.capacity == 8
+    assert len(resized) == 0
+    assert os.path.getsize(path) == HEADER.size + RAW_RECORD.size * 8
+
+    # Arquivo novo não gera aviso
+    caplog.clear()
+    with caplog.at_level(logging.WARNING):
+        RingBuffer(OHLC_RECORD, 4, str(tmp_path / "pool.1m.ring"))
+    assert caplog.text == ""
+
+
+class FakeHead:
+    def __init__(self, block):
+        self.block = block
+
+    def latest(self):
+        return self.block
+
+
+def test_sampler_records_once_per_block_and_refreshes_pools():
+    history = PriceHistory()
+    head = FakeHead(100)
+    listed = []
+    pools = {POOL: (TOKEN_A, TOKEN_B), "cd" * 32: (TOKEN_B, TOKEN_A)}
+
+    def list_pools():
+        listed.append(head.block)
+        return pools
+
+    sampler = PriceSampler(
+        history, head, list_pools, lambda pool_ids: [1.0 if pool_id == POOL else None for pool_id in pool_ids],
+        pools_refresh_blocks=10
+    )
+    sampler.sample_once()
+    sampler.sample_once()
+    assert len(history.series(POOL).raw) == 1
+    # Leitura que falhou (None) não grava amostra
+    assert history.series("cd" * 32) is None
+
+    head.block = 105
+    sampler.sample_once()
+    head.block = 110
+    sampler.sample_once()
+    assert listed == [100, 110]
+    assert [point["block"] for point in history.series(POOL).points(0, float("inf"), "raw")] == [100, 105, 110]
+
+
+def test_sampler_without_pools_only_advances_the_block():
+    history = PriceHistory()
+    sampler = PriceSampler(history, FakeHead(7), dict, lambda pool_ids: pytest.fail("sem pools"))
+    sampler.sample_once()
+    assert sampler.last_block == 7
+    assert history.pools == {}
@@ -0,0 +1,71 @@
+"""ETag do cache de respostas por bloco: muda com o bloco e com clear() (ex: /contracts/update)"""
+import requests
+from flask import Flask, jsonify
+
+from benchmarks.fake_rpc import LIQUIDITY_MANAGER_ADDRESS
+from utils.chain_head import BlockResponseCache
+
+
+class FixedHead:
+    def __init__(self, block_number):
+        self.block_number = block_number
+        self.updated_at = 1_700_000_000
+
+    def latest(self):
+        return self.block_number
+
+
+def make_app(head, cache):
+    app = Flask(__name__)
+    version = {"value": 1}
+
+    @app.route("/pools")
+    @cache.cached
+    def pools():
+        return jsonify({"version": version["value"]})
+
+    return app.test_client(), version
+
+
+def test_etag_changes_after_clear_in_same_block():
+    head = FixedHead(100)
+    cache = BlockResponseCache(head)
+    client, version = make_app(head, cache)
+
+    first = client.get("/pools")
+    etag = first.headers["ETag"]
+    assert client.get("/pools", headers={"If-None-Match": etag}).status_code == 304
+
+    version["value"] = 2
+    cache.clear()
+    response = client.get("/pools", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.get_json() == {"version": 2}
+    assert response.headers["ETag"] != etag
+    assert client.get("/pools", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+
+def test_etag_changes_with_block():
+    head = FixedHead(100)
+    cache = BlockResponseCache(head)
+    client, _ = make_app(head, cache)
+    etag = client.get("/pools").headers["ETag"]
+    head.block_number = 101
+    response = client.get("/pools", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["X-Block-Number"] == "101"
+
+
+def test_contracts_update_invalidates_etag(fake_rpc, api):
+    _, url, _ = fake_rpc(block_time=600)
+    base_url = api(url)
+    first = requests.get(base_url + "/api/pools", timeout=60)
+    etag = first.headers["ETag"]
+    assert requests.get(base_url + "/api/pools", headers={"If-None-Match": etag}, timeout=60).status_code == 304
+
+    # Mesmo bloco: a atualização dos contratos invalida as ETags emitidas antes dela
+    update = {"liquidityManager": LIQUIDITY_MANAGER_ADDRESS}
+    assert requests.post(base_url + "/api/contracts/update", json=update, timeout=60).ok
+    response = requests.get(base_url + "/api/pools", headers={"If-None-Match": etag}, timeout=60)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
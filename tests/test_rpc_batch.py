@@ -0,0 +1,91 @@
+"""RPCBatch/BatchResult (utils/rpc_batch.py) contra o RPC simulado, inclusive lotes rejeitados pelo nó"""
+import pytest
+from web3 import HTTPProvider, Web3
+
+from benchmarks.fake_rpc import CHAIN_ID, LIQUIDITY_MANAGER_ADDRESS
+from utils.rpc_batch import RPCBatch
+from utils.rpc_pool import PooledHTTPProvider
+
+TOKEN = "0x000000000000000000000000000000000000abcd"
+TOTAL_SUPPLY = "0x18160ddd"
+GET_POOL_INFO = "0x09f2c019"
+
+
+def queue_calls(batch):
+    """Sete chamadas heterogêneas; retorna os resultados na ordem em que foram enfileiradas"""
+    return [
+        batch.block_number(),
+        batch.chain_id(),
+        batch.get_balance(TOKEN),
+        # calldata em bytes e em hex: os dois chegam ao nó com o prefixo 0x
+        batch.eth_call(TOKEN, bytes.fromhex(TOTAL_SUPPLY[2:])),
+        batch.eth_call(TOKEN, TOTAL_SUPPLY, block_identifier=1),
+        batch.eth_call(LIQUIDITY_MANAGER_ADDRESS, GET_POOL_INFO + "00" * 32),
+        batch.add("eth_unknownMethod", [])
+    ]
+
+
+def assert_results(server, results):
+    block, chain_id, balance, supply, historical_supply, reverted, unknown = results
+    assert block.result() == server.chain.block_number()
+    assert chain_id.result() == CHAIN_ID
+    assert balance.result() == 10 ** 18
+    assert int.from_bytes(supply.result(), "big") == 10 ** 27 + 0xabcd
+    assert historical_supply.result() == supply.result()
+    # Erros ficam isolados na própria chamada
+    with pytest.raises(ValueError, match="execution reverted"):
+        reverted.result()
+    with pytest.raises(ValueError, match="method not found"):
+        unknown.result()
+
+
+def test_batch_is_one_post_with_results_in_order(fake_rpc):
+    server, url, stats = fake_rpc(block_time=60)
+    batch = RPCBatch(Web3(PooledHTTPProvider([url])))
+    results = queue_calls(batch)
+    assert len(batch) == 7
+    with pytest.raises(RuntimeError):
+        results[0].result()
+
+    batch.execute()
+    assert len(batch) == 0
+    assert_results(server, results)
+    snapshot = stats.snapshot()
+    assert snapshot["httpRequests"] == 1
+    assert snapshot["rpcCalls"] == 7
+    assert snapshot["functions"]["totalSupply"] == 2
+
+
+def test_rejected_batch_is_split_until_accepted(fake_rpc):
+    server, url, stats = fake_rpc(block_time=60, max_batch_size=3)
+    batch = RPCBatch(Web3(PooledHTTPProvider([url])))
+    results = queue_calls(batch)
+    batch.execute()
+
+    assert_results(server, results)
+    snapshot = stats.snapshot()
+    # 7 rejeitado -> 3 aceito + 4 rejeitado -> 2 + 2 aceitos
+    assert snapshot["rejectedBatches"] == 2
+    assert snapshot["httpRequests"] == 5
+    assert snapshot["rpcCalls"] == 7
+
+
+def test_batch_max_size_splits_before_sending(fake_rpc):
+    server, url, stats = fake_rpc(block_time=60, max_batch_size=3)
+    batch = RPCBatch(Web3(PooledHTTPProvider([url], batch_max_size=3)))
+    results = queue_calls(batch)
+    batch.execute()
+
+    assert_results(server, results)
+    assert stats.snapshot()["rejectedBatches"] == 0
+    assert stats.snapshot()["httpRequests"] == 3
+
+
+def test_provider_without_batches_sends_calls_one_by_one(fake_rpc):
+    server, url, stats = fake_rpc(block_time=60)
+    batch = RPCBatch(Web3(HTTPProvider(url)))
+    results = queue_calls(batch)
+    batch.execute()
+
+    assert_results(server, results)
+    assert stats.snapshot()["httpRequests"] == 7
@@ -0,0 +1,54 @@
+"""Com o RPC limitando as chamadas por segundo, o orçamento recusa só a classe bulk e o RPC nunca responde 429"""
+import time
+
+import requests
+
+from benchmarks.rpc_budget import run_clients, summarize
+
+RATE_LIMIT = 20
+CLIENTS = {"bulk": 16, "interactive": 4, "critical": 4}
+
+
+def run_mix(fake_rpc, api, **env):
+    """Carga mista de benchmarks/rpc_budget.py por 8s; retorna (resumo por classe, 429 do RPC, métricas do orçamento)"""
+    _, url, stats = fake_rpc(pools=100, stablecoins=10, latency_ms=10, block_time=0.5, rate_limit=RATE_LIMIT)
+    base_url = api(
+        url,
+        BLOCK_POLL_INTERVAL=0.5,
+        # Sem caches de resposta e de leituras: cada requisição depende do orçamento
+        RESPONSE_CACHE_MAXSIZE=0,
+        STALE_MAX_AGE=0,
+        CHAIN_READ_TTL=0,
+        MULTICALL_CHUNK_SIZE=20,
+        # Metadados dos tokens principais lidos em background ao subir o worker, como em produção
+        WARMUP_ON_BOOT="true",
+        **env
+    )
+    # Aguarda o aquecimento e a janela do limite do RPC zerar depois da inicialização
+    time.sleep(3)
+    stats.reset()
+    report = summarize(run_clients(base_url, CLIENTS, 8))
+    throttled = stats.snapshot()["throttled"]
+    budget = requests.get(base_url + "/api/monitor/system", timeout=60).json()["metrics"]["rpcBudget"]
+    return report, throttled, budget
+
+
+def test_without_budget_upstream_throttles(fake_rpc, api):
+    _, throttled, _ = run_mix(fake_rpc, api, RPC_RATE_LIMIT=0)
+    assert throttled > 0
+
+
+def test_sheds_only_bulk_under_rate_limit(fake_rpc, api):
+    report, throttled, budget = run_mix(
+        fake_rpc, api,
+        # Janela fixa no RPC: rajada + reposição em um segundo não podem passar do limite
+        RPC_RATE_LIMIT=RATE_LIMIT / 2,
+        RPC_RATE_BURST=RATE_LIMIT / 2,
+        RPC_BUDGET_MAX_WAIT=1
+    )
+    assert report["bulk"]["shed503"] > 0
+    assert report["interactive"]["shed503"] == 0
+    assert report["critical"]["requests"] > 0
+    assert report["critical"]["ok"] == report["critical"]["requests"]
+    assert budget.get("critical", {}).get("shed", 0) == 0
+    assert throttled == 0
@@ -0,0 +1,114 @@
+"""Pool de endpoints contra vários RPCs simulados: roteamento por latência, failover e hedge (só quando ativado)"""
+import asyncio
+import time
+
+from web3 import AsyncWeb3, Web3
+
+from utils.circuit_breaker import CircuitBreaker
+from utils.rpc_budget import RPCBudget
+from utils.rpc_pool import AsyncPooledHTTPProvider, PooledHTTPProvider
+
+
+def requests_to(stats):
+    return stats.snapshot()["httpRequests"]
+
+
+def test_routes_to_fastest_endpoint(fake_rpc):
+    _, slow_url, slow = fake_rpc(latency_ms=80)
+    _, fast_url, fast = fake_rpc(latency_ms=2)
+    w3 = Web3(PooledHTTPProvider([slow_url, fast_url]))
+    for _ in range(20):
+        w3.eth.block_number
+    # Cada endpoint ainda não medido é explorado uma vez; depois, só o mais rápido
+    assert requests_to(slow) == 1
+    assert requests_to(fast) == 19
+
+
+def test_fails_over_errors_and_stalls(fake_rpc):
+    failing, failing_url, _ = fake_rpc()
+    stalled, stalled_url, _ = fake_rpc()
+    _, good_url, good = fake_rpc()
+    failing.faults.set(status=503)
+    stalled.faults.set(stall=2)
+    provider = PooledHTTPProvider([failing_url, stalled_url, good_url], request_timeout=0.3)
+    w3 = Web3(provider)
+
+    started = time.monotonic()
+    assert w3.eth.block_number > 0
+    assert time.monotonic() - started < 1.5
+    # Endpoints com falha ficam em cooldown e não são tentados de novo a cada chamada
+    started = time.monotonic()
+    for _ in range(5):
+        w3.eth.block_number
+    assert time.monotonic() - started < 0.3
+    assert requests_to(good) == 6
+    assert provider.ranked_endpoints()[0].url == good_url
+
+
+def test_hedge_disabled_by_default(fake_rpc):
+    _, slow_url, _ = fake_rpc(latency_ms=300)
+    _, fast_url, fast = fake_rpc()
+    w3 = Web3(PooledHTTPProvider([slow_url, fast_url], hedge_delay=0.05))
+    w3.eth.block_number
+    assert requests_to(fast) == 0
+
+
+def test_hedge_cuts_tail_latency(fake_rpc):
+    _, slow_url, _ = fake_rpc(latency_ms=1000)
+    _, fast_url, fast = fake_rpc()
+    w3 = Web3(PooledHTTPProvider([slow_url, fast_url], hedge=True, hedge_delay=0.05))
+    started = time.monotonic()
+    w3.eth.block_number
+    assert time.monotonic() - started < 0.5
+    assert requests_to(fast) == 1
+
+
+def test_hedge_only_with_spare_bulk_budget(fake_rpc):
+    _, slow_url, _ = fake_rpc(latency_ms=300)
+    _, fast_url, fast = fake_rpc()
+    budget = RPCBudget(rate=0.01, burst=10)
+    w3 = Web3(PooledHTTPProvider([slow_url, fast_url], hedge=True, hedge_delay=0.05, budget=budget))
+    # Abaixo da reserva da classe bulk (30% do bucket): a leitura normal ainda passa, o hedge não
+    budget.bucket(fast_url).take(8)
+    assert budget.try_acquire(fast_url, priority="interactive")
+    w3.eth.block_number
+    assert requests_to(fast) == 0
+
+
+def test_async_provider_fails_over_and_shares_endpoint_stats(fake_rpc):
+    failing, failing_url, _ = fake_rpc()
+    stalled, stalled_url, _ = fake_rpc()
+    _, good_url, good = fake_rpc()
+    failing.faults.set(status=503)
+    stalled.faults.set(stall=2)
+    pooled = PooledHTTPProvider([failing_url, stalled_url, good_url], request_timeout=0.3)
+    aw3 = AsyncWeb3(AsyncPooledHTTPProvider(pooled))
+
+    async def read(times):
+        return [await aw3.eth.block_number for _ in range(times)]
+
+    started = time.monotonic()
+    assert all(block > 0 for block in asyncio.run(read(6)))
+    assert time.monotonic() - started < 1.5
+    assert requests_to(good) == 6
+    # As falhas vistas pelo cliente assíncrono afastam os endpoints também do síncrono
+    assert pooled.ranked_endpoints()[0].url == good_url
+    Web3(pooled).eth.block_number
+    assert requests_to(good) == 7
+
+
+def test_async_provider_opens_the_shared_circuit(fake_rpc):
+    failing, failing_url, _ = fake_rpc()
+    failing.faults.set(status=503)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    aw3 = AsyncWeb3(AsyncPooledHTTPProvider(PooledHTTPProvider([failing_url], breaker=breaker)))
+
+    async def read():
+        try:
+            await aw3.eth.block_number
+        except Exception as e:
+            return type(e).__name__
+
+    assert asyncio.run(read()) == "RetryableRPCError"
+    assert asyncio.run(read()) == "RetryableRPCError"
+    assert asyncio.run(read()) == "CircuitOpenError"
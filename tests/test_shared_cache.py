@@ -0,0 +1,156 @@
+"""Contrato dos backends de cache (memory, shm, redis, archive) e leituras da chain compartilhadas entre workers"""
+import os
+import time
+
+import pytest
+
+from utils.multicall import Call
+from utils.shared_cache import (
+    ArchiveBackend, CacheBackend, ChainReadCache, MemoryBackend, RedisBackend, SharedMemoryBackend
+)
+
+TARGET = "0x00000000000000000000000000000000000b3001"
+
+
+@pytest.fixture
+def redis_server():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis, fakeredis.FakeServer()
+
+
+@pytest.fixture(params=["memory", "shm", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(maxsize=100)
+    if request.param == "shm":
+        return SharedMemoryBackend(str(tmp_path / "shm"), maxsize=100)
+    fakeredis, server = request.getfixturevalue("redis_server")
+    return RedisBackend(client=fakeredis.FakeRedis(server=server))
+
+
+def test_backend_round_trip(backend):
+    # uint256 acima de 64 bits, bytes e tuplas (que voltam como listas nos backends msgpack)
+    value = [2 ** 255 + 7, -2 ** 70, b"\x00\x01", "BRZ", True, None, [1, 2]]
+    assert backend.get_many(["a", "b"]) == [None, None]
+    backend.set_many([("a", value), ("b", 18)], ttl=60)
+    assert backend.get_many(["a", "b", "c"]) == [value, 18, None]
+    assert backend.get("b") == 18
+
+    backend.delete("a")
+    assert backend.get("a") is None
+    backend.clear()
+    assert backend.get("b") is None
+
+    stats = backend.stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 5
+    assert stats["errors"] == 0
+
+
+def test_backend_ttl_expiry(backend):
+    backend.set("short", 1, ttl=0.2)
+    backend.set("forever", 2)
+    assert backend.get("short") == 1
+    time.sleep(0.3)
+    assert backend.get("short") is None
+    assert backend.get("forever") == 2
+
+
+def test_backend_block_expiry(backend):
+    backend.set("pool", "info", ttl=60, block=100)
+    assert backend.get("pool", block=100) == "info"
+    # Entrada de um bloco mais novo (gravada por outro worker) continua válida
+    assert backend.get("pool", block=99) == "info"
+    assert backend.get("pool") == "info"
+    assert backend.get("pool", block=101) is None
+
+
+def test_archive_backend(tmp_path):
+    path = str(tmp_path / "archive.db")
+    archive = ArchiveBackend(path)
+    assert archive.get_many(["k1", "k2"]) == [None, None]
+    archive.set_many([("k1", b"\x01"), ("k2", b"\x02")], ttl=0.01)
+    time.sleep(0.05)
+    # Sem expiração: a chave já inclui o bloco finalizado
+    assert archive.get_many(["k1", "k2"]) == [b"\x01", b"\x02"]
+    # Valor existente não é sobrescrito (estado de bloco finalizado não muda)
+    archive.set("k1", b"\xff")
+    assert archive.get("k1") == b"\x01"
+
+    # Sobrevive a um reinício do processo
+    assert ArchiveBackend(path).get("k2") == b"\x02"
+
+    archive.delete("k1")
+    assert archive.get("k1") is None
+    archive.clear()
+    assert archive.get("k2") is None
+
+
+def test_shm_prunes_oldest_files(tmp_path):
+    directory = str(tmp_path / "shm")
+    backend = SharedMemoryBackend(directory, maxsize=5, prune_every=1000)
+    now = time.time()
+    for i in range(10):
+        backend.set(f"k{i}", i)
+        os.utime(backend._path(f"k{i}"), (now - 100 + i, now - 100 + i))
+    orphan = os.path.join(directory, "orfao.123.456.tmp")
+    open(orphan, "wb").close()
+    os.utime(orphan, (now - 120, now - 120))
+
+    backend.prune()
+    assert sorted(os.listdir(directory)) == sorted(os.path.basename(backend._path(f"k{i}")) for i in range(5, 10))
+    assert backend.get_many([f"k{i}" for i in range(10)]) == [None] * 5 + list(range(5, 10))
+
+
+def test_shm_prunes_on_write(tmp_path):
+    backend = SharedMemoryBackend(str(tmp_path / "shm"), maxsize=3, prune_every=4)
+    for i in range(8):
+        backend.set(f"k{i}", i)
+    assert len(os.listdir(backend.directory)) <= 4
+
+
+def test_redis_errors_are_cache_misses(redis_server):
+    fakeredis, server = redis_server
+    backend = RedisBackend(client=fakeredis.FakeRedis(server=server))
+    backend.set("k", 1)
+    server.connected = False
+    assert backend.get("k") is None
+    backend.set("k", 2)
+    assert backend.stats()["errors"] == 2
+    server.connected = True
+    assert backend.get("k") == 1
+
+
+def test_backend_interface_is_abstract():
+    class Incomplete(CacheBackend):
+        def get_many(self, keys, block=None):
+            return [None] * len(keys)
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+@pytest.mark.parametrize("kind", ["shm", "redis"])
+def test_only_one_worker_pays_the_rpc_call(kind, tmp_path, request):
+    if kind == "shm":
+        backends = [SharedMemoryBackend(str(tmp_path / "shm")) for _ in range(2)]
+    else:
+        fakeredis, server = request.getfixturevalue("redis_server")
+        backends = [RedisBackend(client=fakeredis.FakeRedis(server=server)) for _ in range(2)]
+    # Um ChainReadCache por worker, cada um com sua própria coalescência (processos diferentes)
+    workers = [ChainReadCache(backend, 56, ttl=60) for backend in backends]
+    rpc_calls = []
+
+    def run(calls):
+        rpc_calls.extend(calls)
+        return [(True, int.to_bytes(2 ** 200, 32, "big")) for _ in calls]
+
+    calls = [Call(TARGET, bytes.fromhex("3cd7d2c9"), decoder=lambda data: int.from_bytes(data, "big"))]
+    for worker in workers:
+        assert worker.aggregate(run, calls, block=10) == [(True, 2 ** 200)]
+    assert len(rpc_calls) == 1
+
+    # Bloco novo: a entrada anterior não vale mais e um único worker lê de novo
+    for worker in workers:
+        assert worker.aggregate(run, calls, block=11) == [(True, 2 ** 200)]
+    assert len(rpc_calls) == 2
@@ -0,0 +1,138 @@
+"""Coalescência de leituras idênticas simultâneas (utils/singleflight.py), isolada e na API contra o RPC simulado"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from utils.singleflight import SingleFlight, SingleFlightTimeout
+
+
+def run_together(count, fn):
+    """Executa fn(i) em `count` threads liberadas ao mesmo tempo; retorna os resultados (ou exceções)"""
+    barrier = threading.Barrier(count)
+
+    def call(index):
+        barrier.wait()
+        try:
+            return fn(index)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(count) as executor:
+        return list(executor.map(call, range(count)))
+
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    executions = []
+
+    def read():
+        executions.append(1)
+        time.sleep(0.2)
+        return "bloco 10"
+
+    assert run_together(8, lambda _: flight.do(("eth_call", "a"), read)) == ["bloco 10"] * 8
+    assert len(executions) == 1
+    # Terminada a leitura, a chave é liberada (não é um cache)
+    assert flight.in_flight() == 0
+    flight.do(("eth_call", "a"), read)
+    assert len(executions) == 2
+
+
+def test_followers_receive_the_leader_exception():
+    flight = SingleFlight()
+
+    def failing():
+        time.sleep(0.2)
+        raise ConnectionError("RPC fora do ar")
+
+    results = run_together(4, lambda _: flight.do(("eth_call", "b"), failing))
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert flight.in_flight() == 0
+
+
+def test_follower_gives_up_after_timeout():
+    flight = SingleFlight(timeout=0.05)
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        time.sleep(0.3)
+        return 1
+
+    leader = threading.Thread(target=flight.do, args=(("eth_call", "c"), slow))
+    leader.start()
+    started.wait()
+    with pytest.raises(SingleFlightTimeout):
+        flight.do(("eth_call", "c"), slow)
+    leader.join()
+
+
+def test_do_many_runs_only_the_missing_keys():
+    flight = SingleFlight()
+    # Os dois chamadores pedem "b" ao mesmo tempo: só um lote inclui a chave
+    requested = (["a", "b"], ["b", "c"])
+    batches = []
+
+    def call(index):
+        keys = requested[index]
+
+        def run(led):
+            batches.append([keys[i] for i in led])
+            time.sleep(0.2)
+            return [f"v{keys[i]}" for i in led]
+        return flight.do_many([("eth_call", key) for key in keys], run)
+
+    assert run_together(2, call) == [["va", "vb"], ["vb", "vc"]]
+    assert sorted(key for batch in batches for key in batch) == ["a", "b", "c"]
+
+
+def test_async_callers_join_a_thread_in_flight():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def read():
+        started.set()
+        time.sleep(0.2)
+        return 42
+
+    leader = threading.Thread(target=flight.do, args=(("eth_call", "d"), read))
+    leader.start()
+    started.wait()
+
+    async def follower():
+        async def never():
+            raise AssertionError("a leitura deveria ser reaproveitada")
+        return await asyncio.gather(*(flight.do_async(("eth_call", "d"), never) for _ in range(3)))
+
+    assert asyncio.run(follower()) == [42, 42, 42]
+    leader.join()
+
+
+def test_api_coalesces_identical_upstream_reads(fake_rpc, api):
+    # Sem caches de resposta e de leituras: só a coalescência evita chamadas repetidas
+    _, url, stats = fake_rpc(pools=20, latency_ms=150, block_time=600)
+    base_url = api(url, RESPONSE_CACHE_MAXSIZE=0, STALE_MAX_AGE=0, CACHE_MAXSIZE=0, INDEXER_ENABLED="false")
+
+    def get(index):
+        # Query strings diferentes: respostas distintas, mas as mesmas leituras na chain
+        response = requests.get(base_url + "/api/pools", params={"limit": 20, "n": index}, timeout=60)
+        assert response.status_code == 200
+        return len(response.json()["pools"])
+
+    assert get(-1) == 20
+    stats.reset()
+    assert get(-2) == 20
+    sequential = stats.snapshot()["rpcCalls"]
+    assert sequential > 0
+
+    stats.reset()
+    assert run_together(8, get) == [20] * 8
+    concurrent = stats.snapshot()["rpcCalls"]
+    assert concurrent < 8 * sequential / 2
+
+    coalesced = requests.get(base_url + "/api/monitor/system", timeout=60).json()["metrics"]["coalesced"]
+    assert coalesced["eth_call"]["follower"] > 0
@@ -0,0 +1,96 @@
+"""Resposta anterior servida por prazo excedido, circuito aberto ou falha do RPC; a leitura em background usa o próprio contexto"""
+import threading
+import time
+
+from flask import Flask, g, jsonify, request
+
+from utils.chain_head import StaleResponseCache
+from utils.circuit_breaker import CircuitBreaker, mark_degraded, request_degraded
+
+
+def make_app(breaker=None, latency_budget=0.2):
+    app = Flask(__name__)
+    stale = StaleResponseCache(lambda: None, lambda: breaker, latency_budget=latency_budget)
+    state = {"version": 1, "delay": 0, "fail": False, "seen": [], "degraded": []}
+    finished = threading.Event()
+
+    @app.before_request
+    def select_network():
+        g.network = request.args.get("chainId")
+
+    @app.after_request
+    def record_degraded(response):
+        state["degraded"].append(request_degraded())
+        return response
+
+    @app.route("/status")
+    @stale.fallback
+    def status():
+        if state["fail"]:
+            mark_degraded()
+        time.sleep(state["delay"])
+        state["seen"].append((request.args.get("chainId"), g.get("network")))
+        finished.set()
+        return jsonify({"version": state["version"]})
+
+    return app.test_client(), state, finished
+
+
+def test_timeout_serves_previous_response_and_refreshes_in_background():
+    client, state, finished = make_app()
+    assert client.get("/status?chainId=97").get_json() == {"version": 1}
+
+    state.update(version=2, delay=0.6, fail=True)
+    finished.clear()
+    body = client.get("/status?chainId=97").get_json()
+    assert body["stale"] is True
+    assert body["staleReason"] == "timeout"
+    assert body["version"] == 1
+    # A falha marcada pela leitura em background não vaza para a requisição que já respondeu
+    assert state["degraded"][-1] is False
+
+    # A leitura segue depois que a requisição terminou, com o próprio request e g
+    assert finished.wait(2)
+    assert state["seen"][-1] == ("97", "97")
+
+
+def test_background_refresh_updates_the_snapshot():
+    client, state, finished = make_app()
+    client.get("/status")
+    state.update(version=2, delay=0.4)
+    finished.clear()
+    assert client.get("/status").get_json()["staleReason"] == "timeout"
+    # Enquanto a leitura não volta, as próximas recebem a resposta anterior na hora
+    assert client.get("/status").get_json()["staleReason"] == "refreshing"
+    assert finished.wait(2)
+    time.sleep(0.05)
+
+    state["delay"] = 0
+    assert client.get("/status").get_json() == {"version": 2}
+
+
+def test_circuit_open_serves_previous_response():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    client, state, finished = make_app(breaker)
+    client.get("/status?chainId=56")
+
+    breaker.record_failure()
+    state["version"] = 2
+    finished.clear()
+    body = client.get("/status?chainId=56").get_json()
+    assert body["stale"] is True
+    assert body["staleReason"] == "circuit_open"
+    assert body["version"] == 1
+    assert finished.wait(2)
+    assert state["seen"][-1] == ("56", "56")
+
+
+def test_rpc_error_marks_the_waiting_request():
+    client, state, _ = make_app()
+    client.get("/status")
+    state.update(version=2, fail=True)
+    body = client.get("/status").get_json()
+    assert body["staleReason"] == "rpc_error"
+    assert body["version"] == 1
+    # A leitura terminou dentro do prazo: a falha vale para a requisição que esperou por ela
+    assert state["degraded"][-1] is True
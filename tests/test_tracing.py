@@ -0,0 +1,39 @@
+"""O trace por cabeçalho (X-Debug-Trace) só vale quando habilitado e, com token, com X-Debug-Token"""
+import pytest
+from flask import Flask, jsonify
+
+from utils.tracing import RequestTracer
+
+
+def make_app(**options):
+    app = Flask(__name__)
+    RequestTracer(app, **options)
+
+    @app.route("/status")
+    def status():
+        return jsonify({"status": "success"})
+
+    return app.test_client()
+
+
+def traced(response):
+    return "X-RPC-Calls" in response.headers or "_trace" in response.get_json()
+
+
+def test_header_ignored_by_default():
+    client = make_app()
+    assert not traced(client.get("/status", headers={"X-Debug-Trace": "1"}))
+
+
+def test_header_enabled_without_token():
+    client = make_app(header_enabled=True)
+    assert traced(client.get("/status", headers={"X-Debug-Trace": "1"}))
+
+
+@pytest.mark.parametrize("token, expected", [(None, False), ("errado", False), ("segredo", True)])
+def test_header_requires_token(token, expected):
+    client = make_app(header_enabled=True, token="segredo")
+    headers = {"X-Debug-Trace": "1"}
+    if token is not None:
+        headers["X-Debug-Token"] = token
+    assert traced(client.get("/status", headers=headers)) is expected
@@ -0,0 +1,31 @@
+"""O import da aplicação não chama o RPC; com WARMUP_ON_BOOT o aquecimento roda em background em cada worker"""
+import subprocess
+import sys
+import time
+
+import requests
+
+from benchmarks.cold_start import ROOT, benchmark_env
+
+
+def test_import_does_not_wait_for_rpc(fake_rpc):
+    server, url, stats = fake_rpc()
+    server.faults.set(stall=30)
+    env = dict(benchmark_env(url, warm=True), RPC_REQUEST_TIMEOUT="30", ARCHIVE_CACHE_PATH="")
+    started = time.monotonic()
+    subprocess.run([sys.executable, "-c", "import app"], cwd=ROOT, env=env, check=True, timeout=60)
+    assert time.monotonic() - started < 15
+    assert stats.snapshot()["httpRequests"] == 0
+
+
+def test_workers_warm_in_background(fake_rpc, api):
+    _, url, _ = fake_rpc()
+    base_url = api(url, WARMUP_ON_BOOT="true")
+    deadline = time.monotonic() + 30
+    while True:
+        startup = requests.get(base_url + "/api/monitor/system", timeout=60).json()["clients"]["startup"]
+        if "warmupMs" in startup:
+            break
+        assert time.monotonic() < deadline, "aquecimento não terminou"
+        time.sleep(0.2)
+    assert set(startup["warmupMs"]) == {"contracts", "tokenMetadata"}
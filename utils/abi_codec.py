@@ -0,0 +1,246 @@
+import re
+from collections import namedtuple
+from eth_abi.decoding import ContextFramesBytesIO
+from eth_abi.registry import registry
+from eth_utils import function_abi_to_4byte_selector
+from utils.multicall import Call, abi_type, checksum_address
+
+
+def _record_name(name):
+    """Nome da classe do registro (ex: getStablecoinInfo -> StablecoinInfo, config -> Config)"""
+    name = re.sub(r"^get(?=[A-Z])", "", name or "") or "Record"
+    return name[0].upper() + name[1:]
+
+
+def compile_normalizer(param, record_name):
+    """Função que converte o valor decodificado pelo eth_abi no formato da API.
+
+    Endereços recebem checksum (memoizado), arrays viram listas e tuplas viram
+    registros (namedtuple) com os nomes dos componentes da ABI, preservando o
+    acesso por índice. Retorna None quando o valor já está no formato final.
+    """
+    param_type = param["type"]
+    if param_type.endswith("]"):
+        inner = compile_normalizer(dict(param, type=param_type[:param_type.rindex("[")]), record_name)
+        if inner is None:
+            return list
+        return lambda values: [inner(value) for value in values]
+    if param_type == "tuple":
+        record = _record_class(param, record_name)
+        normalizers = [compile_normalizer(c, _record_name(c["name"])) for c in param["components"]]
+        if not any(normalizers):
+            return lambda value: record._make(value)
+        normalizers = [normalizer or (lambda value: value) for normalizer in normalizers]
+        return lambda value: record._make([normalize(v) for normalize, v in zip(normalizers, value)])
+    if param_type == "address":
+        return checksum_address
+    return None
+
+
+def _record_class(param, record_name):
+    names = [c["name"] or f"field{i}" for i, c in enumerate(param["components"])]
+    return namedtuple(record_name, names, rename=True)
+
+
+class MalformedReturn(ValueError):
+    """Retorno fora do formato canônico da ABI; o decoder do eth_abi decide (e levanta o erro dele)"""
+
+
+class UnsupportedType(Exception):
+    """Tipo fora do subconjunto do decoder direto (ex: fixed); a função usa sempre o decoder do eth_abi"""
+
+
+def _word(data, position):
+    if position < 0 or position + 32 > len(data):
+        raise MalformedReturn(f"palavra em {position} além do fim do retorno ({len(data)} bytes)")
+    return int.from_bytes(data[position:position + 32], "big")
+
+
+def _bounded(limit):
+    """Decoder de palavra sem sinal que rejeita valores acima de `limit` (largura ou padding inválidos)"""
+    def decode(data, position):
+        value = _word(data, position)
+        if value >= limit:
+            raise MalformedReturn(f"valor em {position} fora da largura do tipo")
+        return value
+    return decode
+
+
+def _signed(bits):
+    low, high = -(1 << (bits - 1)), 1 << (bits - 1)
+
+    def decode(data, position):
+        _word(data, position)
+        value = int.from_bytes(data[position:position + 32], "big", signed=True)
+        if not low <= value < high:
+            raise MalformedReturn(f"valor em {position} fora da largura do tipo")
+        return value
+    return decode
+
+
+def _offset(data, base, cursor):
+    """Posição absoluta apontada pelo offset em `cursor` (relativo a `base`), validada contra o tamanho"""
+    offset = _word(data, cursor)
+    if offset % 32 or base + offset + 32 > len(data):
+        raise MalformedReturn(f"offset {offset} inválido em {cursor}")
+    return base + offset
+
+
+def compile_decoder(param, record_name):
+    """Decodificador direto (sem o despacho genérico do eth_abi) para um parâmetro da ABI.
+
+    Retorna (dinâmico, tamanho do head, função(data, posição)) e já produz o
+    valor final: endereços com checksum, listas e registros. Só aceita o
+    formato canônico: palavras além do fim, offsets fora do retorno, bool
+    diferente de 0/1, inteiros fora da largura e padding não zerado levantam
+    MalformedReturn, e FunctionCodec.decode repassa o retorno ao eth_abi.
+    Tipos fora do subconjunto usado pelas ABIs da API (ex: fixed) levantam
+    UnsupportedType e a função usa sempre o decoder do eth_abi.
+    """
+    param_type = param["type"]
+    if param_type.endswith("]"):
+        inner_param = dict(param, type=param_type[:param_type.rindex("[")])
+        inner_dynamic, inner_size, inner = compile_decoder(inner_param, record_name)
+        length = param_type[param_type.rindex("[") + 1:-1]
+
+        def decode_items(data, start, count):
+            if start + count * (32 if inner_dynamic else inner_size) > len(data):
+                raise MalformedReturn(f"array de {count} itens além do fim do retorno")
+            if inner_dynamic:
+                return [inner(data, _offset(data, start, start + 32 * i)) for i in range(count)]
+            return [inner(data, start + inner_size * i) for i in range(count)]
+
+        if not length:
+            return True, 32, lambda data, position: decode_items(data, position + 32, _word(data, position))
+        count = int(length)
+        return inner_dynamic, 32 if inner_dynamic else inner_size * count, \
+            lambda data, position: decode_items(data, position, count)
+    if param_type == "tuple":
+        record = _record_class(param, record_name)
+        components = [compile_decoder(c, _record_name(c["name"])) for c in param["components"]]
+        dynamic = any(component[0] for component in components)
+
+        def decode_tuple(data, position):
+            values = []
+            cursor = position
+            for component_dynamic, size, decode in components:
+                if component_dynamic:
+                    values.append(decode(data, _offset(data, position, cursor)))
+                    cursor += 32
+                else:
+                    values.append(decode(data, cursor))
+                    cursor += size
+            return record._make(values)
+
+        return dynamic, 32 if dynamic else sum(component[1] for component in components), decode_tuple
+    if param_type == "address":
+        padding = _bounded(1 << 160)
+
+        def decode_address(data, position):
+            padding(data, position)
+            return checksum_address("0x" + data[position + 12:position + 32].hex())
+        return False, 32, decode_address
+    if param_type == "bool":
+        flag = _bounded(2)
+        return False, 32, lambda data, position: flag(data, position) == 1
+    if param_type.startswith("uint"):
+        return False, 32, _bounded(1 << int(param_type[len("uint"):] or 256))
+    if param_type.startswith("int"):
+        return False, 32, _signed(int(param_type[len("int"):] or 256))
+    if param_type in ("bytes", "string"):
+        def decode_bytes(data, position):
+            length = _word(data, position)
+            padded = position + 32 + (length + 31) // 32 * 32
+            if padded > len(data) or any(data[position + 32 + length:padded]):
+                raise MalformedReturn(f"{param_type} truncado ou com padding inválido em {position}")
+            value = data[position + 32:position + 32 + length]
+            return value.decode("utf-8") if param_type == "string" else value
+        return True, 32, decode_bytes
+    if param_type.startswith("bytes"):
+        size = int(param_type[len("bytes"):])
+
+        def decode_fixed(data, position):
+            _word(data, position)
+            if any(data[position + size:position + 32]):
+                raise MalformedReturn(f"{param_type} com padding inválido em {position}")
+            return data[position:position + size]
+        return False, 32, decode_fixed
+    raise UnsupportedType(param_type)
+
+
+class FunctionCodec:
+    """Seletor e encoder/decoder eth_abi de uma função, montados uma única vez a partir da ABI"""
+
+    __slots__ = (
+        "name", "abi", "selector", "input_types", "output_types", "_encoder", "_decoder", "_normalizers", "_fast"
+    )
+
+    def __init__(self, abi):
+        self.name = abi["name"]
+        self.abi = abi
+        self.selector = bytes(function_abi_to_4byte_selector(abi))
+        self.input_types = [abi_type(i) for i in abi["inputs"]]
+        self.output_types = [abi_type(o) for o in abi["outputs"]]
+        self._encoder = registry.get_tuple_encoder(*self.input_types)
+        self._decoder = registry.get_tuple_decoder(*self.output_types)
+        self._normalizers = [
+            compile_normalizer(output, _record_name(output["name"] or self.name))
+            for output in abi["outputs"]
+        ]
+        try:
+            self._fast = compile_decoder(
+                {"type": "tuple", "components": abi["outputs"]}, _record_name(self.name)
+            )[2]
+        except UnsupportedType:
+            self._fast = None
+
+    def encode(self, *args):
+        """Calldata (seletor + argumentos codificados)"""
+        return self.selector + self._encoder(args)
+
+    def decode(self, return_data):
+        """Decodifica o retorno no mesmo formato de Call.decode (valor único ou tupla)"""
+        return_data = bytes(return_data)
+        values = None
+        if self._fast is not None:
+            try:
+                values = self._fast(return_data, 0)
+            except (MalformedReturn, UnicodeDecodeError):
+                # Retorno curto ou fora do formato canônico: o eth_abi decide, com os erros dele
+                values = None
+        if values is None:
+            values = self._decoder(ContextFramesBytesIO(return_data))
+            values = [
+                normalize(value) if normalize is not None else value
+                for normalize, value in zip(self._normalizers, values)
+            ]
+        return values[0] if len(values) == 1 else tuple(values)
+
+    def call(self, target, *args):
+        """Leitura pronta para ser agregada via Multicall3"""
+        return Call(target, self.encode(*args), decoder=self.decode)
+
+    def read(self, w3, target, *args, block_identifier="latest"):
+        """Executa a leitura com um único eth_call"""
+        return self.decode(w3.eth.call({"to": checksum_address(target), "data": self.encode(*args)}, block_identifier))
+
+    async def read_async(self, aw3, target, *args, block_identifier="latest"):
+        """Versão de read() para AsyncWeb3"""
+        raw = await aw3.eth.call({"to": checksum_address(target), "data": self.encode(*args)}, block_identifier)
+        return self.decode(raw)
+
+
+class ContractCodec:
+    """Codecs pré-compilados de todas as funções de uma ABI, acessíveis por nome (ex: codec.getPoolInfo)"""
+
+    def __init__(self, abi):
+        self.functions = {
+            item["name"]: FunctionCodec(item)
+            for item in abi if item.get("type") == "function"
+        }
+
+    def __getattr__(self, name):
+        try:
+            return self.functions[name]
+        except KeyError:
+            raise AttributeError(name) from None
@@ -0,0 +1,67 @@
+import numpy as np
+
+
+def scan_pools(reserve_a, reserve_b, target=1.0, fee=0.0025, gas_cost=0.0, grid_size=32, max_trade_fraction=0.2):
+    """Avalia, de forma vetorizada, a melhor arbitragem contra o peg em cada pool de produto constante.
+
+    reserve_a/reserve_b são as reservas já normalizadas por decimais; o preço
+    spot do token A é reserve_b / reserve_a (em unidades do token B). Para cada
+    pool é testada uma grade geométrica de tamanhos de trade (até
+    max_trade_fraction da reserva de entrada): se A está acima do peg, vende-se
+    A ao pool; se está abaixo, compra-se A do pool. O lucro é medido em token B
+    contra o preço alvo, descontando a taxa do pool e o custo de gas.
+    """
+    reserve_a = np.asarray(reserve_a, dtype=np.float64)
+    reserve_b = np.asarray(reserve_b, dtype=np.float64)
+    count = reserve_a.shape[0]
+    valid = (reserve_a > 0) & (reserve_b > 0)
+
+    spot = np.divide(reserve_b, reserve_a, out=np.zeros(count), where=valid)
+    deviation = (spot - target) / target
+    sell_a = deviation > 0
+
+    reserve_in = np.where(sell_a, reserve_a, reserve_b)
+    reserve_out = np.where(sell_a, reserve_b, reserve_a)
+    fractions = np.geomspace(1e-5, max_trade_fraction, grid_size)
+
+    # Matrizes (pools x tamanhos de trade); pools sem reservas geram 0/0 e são descartados abaixo
+    amount_in = reserve_in[:, None] * fractions[None, :]
+    effective_in = amount_in * (1 - fee)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        amount_out = effective_in * reserve_out[:, None] / (reserve_in[:, None] + effective_in)
+    gross = np.where(sell_a[:, None], amount_out - amount_in * target, amount_out * target - amount_in)
+    net = gross - gas_cost
+
+    best = np.argmax(np.nan_to_num(net, nan=-np.inf), axis=1)
+    rows = np.arange(count)
+    best_net = net[rows, best]
+    best_net[~valid] = -np.inf
+    best_effective = effective_in[rows, best]
+
+    return {
+        "spot": spot,
+        "deviation": deviation,
+        "sellA": sell_a,
+        "amountIn": amount_in[rows, best],
+        "amountOut": amount_out[rows, best],
+        "grossProfit": gross[rows, best],
+        "netProfit": best_net,
+        "priceImpact": np.divide(best_effective, reserve_in + best_effective, out=np.zeros(count), where=valid)
+    }
+
+
+def rank_opportunities(scan, min_profit=1.0, min_deviation=0.001):
+    """Índices dos pools lucrativos ordenados por lucro líquido, e a urgência de cada um"""
+    abs_deviation = np.abs(scan["deviation"])
+    candidates = np.flatnonzero((scan["netProfit"] >= min_profit) & (abs_deviation >= min_deviation))
+    order = candidates[np.argsort(-scan["netProfit"][candidates], kind="stable")]
+
+    profit = scan["netProfit"][order]
+    deviation = abs_deviation[order]
+    urgency = np.select(
+        [(profit >= 10 * min_profit) | (deviation >= 5 * min_deviation),
+         (profit >= 3 * min_profit) | (deviation >= 2 * min_deviation)],
+        ["high", "medium"],
+        default="low"
+    )
+    return order, urgency
@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+from utils.metrics import record_cache
+
+
+class LRUCache:
+    """Cache LRU limitado e thread-safe com contadores de acertos e falhas (exportados se houver `name`)"""
+
+    def __init__(self, maxsize=1024, name=None):
+        self.maxsize = maxsize
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self._record(True)
+                return self._data[key]
+            self._record(False)
+            return default
+
+    def _record(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self.name is not None:
+            record_cache(self.name, hit)
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxSize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / total, 4) if total else 0.0
+        }
+
+
+class TTLCache(LRUCache):
+    """Cache LRU cujas entradas expiram por tempo ou quando o bloco de referência muda"""
+
+    def __init__(self, maxsize=1024, ttl=15, name=None):
+        super().__init__(maxsize, name)
+        self.ttl = ttl
+
+    def get(self, key, default=None, block=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at, entry_block = entry
+                stale_block = block is not None and entry_block is not None and entry_block != block
+                if time.monotonic() < expires_at and not stale_block:
+                    self._data.move_to_end(key)
+                    self._record(True)
+                    return value
+                del self._data[key]
+            self._record(False)
+            return default
+
+    def set(self, key, value, block=None, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        super().set(key, (value, expires_at, block))
+
+
+class TokenMetadataCache:
+    """Cache de metadados ERC20 em dois níveis, indexado pelo endereço com checksum.
+
+    name, symbol e decimals nunca mudam após o deploy e ficam em um LRU pelo
+    tempo de vida do processo; totalSupply tem TTL curto e é invalidado quando
+    um bloco diferente é informado. Com um `backend` compartilhado (shm ou
+    Redis, ver utils/shared_cache.py), as falhas locais são buscadas nele antes
+    de ir ao RPC, e o que for lido da rede é gravado nos dois níveis.
+    """
+
+    def __init__(self, maxsize=1024, supply_ttl=15, backend=None, namespace=""):
+        self.metadata = LRUCache(maxsize, name="token_metadata")
+        self.supply = TTLCache(maxsize, supply_ttl, name="token_supply")
+        self.supply_ttl = supply_ttl
+        self.backend = backend
+        self.namespace = namespace
+
+    def get_metadata(self, address):
+        metadata = self.metadata.get(address)
+        if metadata is None and self.backend is not None:
+            metadata = self.backend.get(f"{self.namespace}token:{address}")
+            if metadata is not None:
+                self.metadata.set(address, metadata)
+        return metadata
+
+    def set_metadata(self, address, metadata):
+        self.metadata.set(address, metadata)
+        if self.backend is not None:
+            self.backend.set(f"{self.namespace}token:{address}", metadata)
+
+    def get_supply(self, address, block=None):
+        total_supply = self.supply.get(address, block=block)
+        if total_supply is None and self.backend is not None:
+            total_supply = self.backend.get(f"{self.namespace}supply:{address}", block=block)
+            if total_supply is not None:
+                self.supply.set(address, total_supply, block=block)
+        return total_supply
+
+    def set_supply(self, address, total_supply, block=None):
+        self.supply.set(address, total_supply, block=block)
+        if self.backend is not None:
+            self.backend.set(f"{self.namespace}supply:{address}", total_supply, ttl=self.supply_ttl, block=block)
+
+    def clear(self):
+        self.metadata.clear()
+        self.supply.clear()
+
+    def stats(self):
+        return {
+            "metadata": self.metadata.stats(),
+            "totalSupply": self.supply.stats()
+        }
@@ -0,0 +1,354 @@
+import json
+import os
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextvars import Context
+from datetime import datetime, timezone
+from functools import wraps
+from flask import Response, current_app, g, make_response, request
+from utils.cache import LRUCache
+from utils.circuit_breaker import request_degraded
+from utils.metrics import record_head, record_stale
+from utils.rpc_budget import current_priority, set_priority
+from utils.singleflight import SingleFlight, SingleFlightTimeout
+
+
+class BlockHeadTracker:
+    """Acompanha o bloco mais recente da rede em uma thread de background.
+
+    A thread é iniciada sob demanda e reiniciada se o processo mudar de PID,
+    de modo que cada worker do gunicorn tenha exatamente um poller. Consultas
+    simultâneas (ex: várias requisições com a leitura em memória expirada)
+    compartilham um único eth_blockNumber via `flight`.
+    """
+
+    def __init__(self, w3, interval=3.0, chain_id=None, flight=None):
+        self.w3 = w3
+        self.chain_id = chain_id
+        self.flight = flight or SingleFlight()
+        self._chain_key = chain_id if chain_id is not None else id(self)
+        self.interval = interval
+        self.stale_after = max(interval * 3, 10)
+        self.block_number = None
+        self.updated_at = None
+        self.last_success = None
+        self.last_error = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="block-head-tracker", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # O bloco atual versiona caches e respostas: tem prioridade no orçamento do RPC
+        set_priority("critical")
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                logging.warning(f"Erro ao consultar bloco mais recente: {e}")
+            self._stop.wait(self.interval)
+
+    def _flight_key(self):
+        # Por prioridade: uma consulta crítica não fica presa à fila (ou à recusa) de uma de listagem
+        return ("block_number", self._chain_key, current_priority())
+
+    def poll(self):
+        """Consulta o bloco atual na rede; propaga a exceção em caso de falha"""
+        try:
+            block_number = self.flight.do(self._flight_key(), lambda: self.w3.eth.block_number)
+        except Exception as e:
+            self.last_error = str(e)
+            raise
+        return self.observe(block_number)
+
+    async def poll_async(self, aw3):
+        """Versão de poll() com AsyncWeb3, coalescida com as consultas síncronas"""
+        try:
+            block_number = await self.flight.do_async(self._flight_key(), lambda: aw3.eth.block_number)
+        except Exception as e:
+            self.last_error = str(e)
+            raise
+        return self.observe(block_number)
+
+    def observe(self, block_number):
+        """Registra um bloco lido por outro caminho (ex: um lote JSON-RPC)"""
+        now = time.time()
+        self.last_success = now
+        self.last_error = None
+        if block_number != self.block_number:
+            self.block_number = block_number
+            self.updated_at = now
+            record_head(block_number, now, self.chain_id)
+        return block_number
+
+    def is_fresh(self):
+        return self.last_success is not None and time.time() - self.last_success < self.stale_after
+
+    def latest(self):
+        """Retorna o bloco em memória, consultando a rede apenas se ainda não houver leitura recente"""
+        self.start()
+        if not self.is_fresh():
+            return self.poll()
+        return self.block_number
+
+
+class BlockResponseCache:
+    """Cache de respostas GET indexado pelo bloco atual, com ETag/Last-Modified derivados dele.
+
+    O ETag é `<bloco>-<geração>`: clear() (ex: após /contracts/update) avança
+    a geração, então ETags emitidos antes não recebem 304 mesmo que o bloco
+    ainda seja o mesmo.
+
+    `tracker` é um BlockHeadTracker ou uma função que retorna o da rede da
+    requisição (None quando a resposta não deve ser cacheada). Requisições
+    idênticas que chegam juntas em um bloco novo são coalescidas: só a
+    primeira executa a view e as demais recebem a mesma resposta (inclusive
+    erros); respostas em streaming são geradas por cada requisição.
+    `finalize(response)` ajusta a resposta da view antes de ela ser
+    compartilhada (ex: 503 com Retry-After quando o RPC recusou a leitura).
+    """
+
+    def __init__(self, tracker, maxsize=256, flight=None, finalize=None):
+        self.tracker = tracker
+        self.flight = flight or SingleFlight()
+        self.finalize = finalize
+        self._cache = LRUCache(maxsize, name="responses")
+        self.generation = 0
+
+    def clear(self):
+        self.generation += 1
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
+
+    def cached(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Permite decorar tanto views síncronas quanto async
+            handler = current_app.ensure_sync(view)
+            tracker = self.tracker() if callable(self.tracker) else self.tracker
+            if tracker is None:
+                return handler(*args, **kwargs)
+            try:
+                block_number = tracker.latest()
+            except Exception:
+                # Sem bloco conhecido não há como versionar a resposta
+                return handler(*args, **kwargs)
+
+            generation = self.generation
+            key = (request.path, request.query_string)
+            entry = self._cache.get(key)
+            if entry is None or entry[:2] != (block_number, generation):
+                rendered = []
+
+                def render():
+                    response = make_response(handler(*args, **kwargs))
+                    if self.finalize is not None:
+                        response = self.finalize(response)
+                    rendered.append(response)
+                    if response.is_streamed:
+                        return None
+                    if response.status_code != 200 or response.cache_control.no_store:
+                        # Não cacheável, mas idêntica para quem estiver esperando
+                        return ("shared", response.status_code, response.get_data(), list(response.headers.items()))
+                    shared = (block_number, generation, response.get_data(), response.mimetype, tracker.updated_at)
+                    if generation == self.generation:
+                        self._cache.set(key, shared)
+                    return shared
+
+                try:
+                    shared = self.flight.do(("response",) + key + (block_number, generation), render)
+                except SingleFlightTimeout:
+                    shared = render()
+                if rendered and (shared is None or shared[0] == "shared"):
+                    return rendered[0]
+                if shared is None:
+                    return make_response(handler(*args, **kwargs))
+                if shared[0] == "shared":
+                    _, status, body, headers = shared
+                    return Response(body, status=status, headers=headers)
+                entry = shared
+
+            block_number, generation, body, mimetype, updated_at = entry
+            response = Response(body, mimetype=mimetype)
+            response.set_etag(f"{block_number}-{generation}")
+            if updated_at is not None:
+                response.last_modified = datetime.fromtimestamp(updated_at, tz=timezone.utc)
+            response.headers["Cache-Control"] = "no-cache"
+            response.headers["X-Block-Number"] = str(block_number)
+            return response.make_conditional(request)
+        return wrapper
+
+
+class StaleResponseCache:
+    """Última resposta boa de cada rota GET, servida quando a leitura nova atrasa ou o RPC está fora.
+
+    Havendo uma resposta anterior guardada, a view roda em uma thread de
+    background e a requisição espera no máximo `latency_budget` segundos. Se a
+    leitura nova não terminar nesse prazo, falhar (5xx) ou depender de
+    leituras que falharam no RPC, ou se o circuito do RPC estiver aberto, a
+    requisição recebe a resposta anterior com "stale": true, a idade e o bloco
+    de origem; a leitura em andamento continua e, ao terminar, atualiza a
+    resposta guardada (stale-while-revalidate). Sem resposta anterior (ou com
+    uma mais velha que `max_age`) a view roda normalmente na própria
+    requisição. `tracker` e `breaker` são funções que retornam o
+    BlockHeadTracker e o CircuitBreaker da rede da requisição (ou None).
+
+    Com `fallback(degraded=False)` a resposta anterior só substitui leituras
+    que passaram do prazo: falhas do RPC chegam ao cliente (ex: um
+    monitoramento que deve mostrar a conexão caída).
+    """
+
+    def __init__(self, tracker, breaker, latency_budget=2.0, max_age=3600.0, maxsize=256, max_workers=32):
+        self.tracker = tracker
+        self.breaker = breaker
+        self.latency_budget = latency_budget
+        self.max_age = max_age
+        self.max_workers = max_workers
+        self._snapshots = LRUCache(maxsize, name="snapshots")
+        # Leituras que passaram do prazo e seguem em background, no máximo uma por chave
+        self._refreshing = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+
+    @property
+    def executor(self):
+        # Threads não sobrevivem ao fork: cada worker cria o seu executor
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stale-refresh")
+                self._executor_pid = os.getpid()
+                self._refreshing = {}
+            return self._executor
+
+    def clear(self):
+        self._snapshots.clear()
+
+    def stats(self):
+        return dict(self._snapshots.stats(), refreshing=len(self._refreshing), latencyBudgetSeconds=self.latency_budget)
+
+    def _render(self, key, handler, args, kwargs):
+        """Executa a view e guarda a resposta se ela for boa; retorna (resposta, degradada)"""
+        response = make_response(handler(*args, **kwargs))
+        degraded = response.status_code >= 500 or request_degraded()
+        if not degraded and response.status_code == 200 and not response.is_streamed and not response.cache_control.no_store:
+            block = response.headers.get("X-Block-Number")
+            if block is None:
+                tracker = self.tracker()
+                block = tracker.block_number if tracker is not None else None
+            self._snapshots.set(key, (response.get_data(), response.mimetype, time.time(), int(block) if block is not None else None))
+        return response, degraded
+
+    def _submit(self, executor, key, handler, args, kwargs):
+        """Executa _render em `executor`, em um contexto de requisição próprio.
+
+        A requisição original pode terminar (e desmontar seu request e g) antes
+        da leitura; a thread recebe uma cópia do caminho, dos cabeçalhos e do
+        que já foi selecionado em g (rede, bloco, prioridade) e retorna
+        (resposta, degradada, estado de g) para quem ainda estiver esperando.
+        """
+        app = current_app._get_current_object()
+        environ = {
+            "path": request.path,
+            "query_string": request.query_string.decode("latin-1"),
+            "method": request.method,
+            "headers": list(request.headers.items())
+        }
+        selected = public_state()
+
+        def run():
+            with app.test_request_context(**environ):
+                for name, value in selected.items():
+                    setattr(g, name, value)
+                response, degraded = self._render(key, handler, args, kwargs)
+                return response, degraded, public_state()
+
+        return executor.submit(Context().run, run)
+
+    def _background(self, key, future):
+        """Mantém a leitura em andamento como a atualização da chave até ela terminar"""
+        with self._lock:
+            self._refreshing[key] = future
+
+        def done(_):
+            with self._lock:
+                if self._refreshing.get(key) is future:
+                    del self._refreshing[key]
+        future.add_done_callback(done)
+
+    def _stale(self, snapshot, reason):
+        body, mimetype, created, block = snapshot
+        age = time.time() - created
+        data = json.loads(body)
+        if isinstance(data, dict):
+            data.update(stale=True, staleAgeSeconds=round(age, 1), sourceBlock=block, staleReason=reason)
+        response = current_app.json.response(data)
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["Age"] = str(int(age))
+        response.headers["Warning"] = '110 - "Response is Stale"'
+        if block is not None:
+            response.headers["X-Block-Number"] = str(block)
+        record_stale(reason)
+        return response
+
+    def fallback(self, view=None, degraded=True):
+        if view is None:
+            return lambda view: self.fallback(view, degraded=degraded)
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            handler = current_app.ensure_sync(view)
+            key = (request.path, request.query_string)
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None and time.time() - snapshot[2] > self.max_age:
+                snapshot = None
+            if snapshot is None:
+                return self._render(key, handler, args, kwargs)[0]
+
+            executor = self.executor
+            breaker = self.breaker() if degraded else None
+            refreshing = key in self._refreshing
+            circuit_open = breaker is not None and breaker.is_open()
+            if refreshing or circuit_open:
+                # Uma leitura anterior ainda não voltou ou o RPC está fora: resposta anterior na hora
+                if not refreshing:
+                    self._background(key, self._submit(executor, key, handler, args, kwargs))
+                return self._stale(snapshot, "circuit_open" if circuit_open else "refreshing")
+
+            future = self._submit(executor, key, handler, args, kwargs)
+            try:
+                response, failed, state = future.result(timeout=self.latency_budget)
+            except FutureTimeout:
+                self._background(key, future)
+                return self._stale(snapshot, "timeout")
+            except Exception as e:
+                logging.error(f"Erro ao atualizar {request.path}, servindo a resposta anterior: {e}")
+                return self._stale(snapshot, "error")
+            # Falhas do RPC e Retry-After do orçamento da leitura valem para esta requisição
+            for name, value in state.items():
+                setattr(g, name, value)
+            if failed and degraded:
+                return self._stale(snapshot, "rpc_error")
+            return response
+        return wrapper
+
+
+def public_state():
+    """Atributos de g definidos pelas rotas (os privados, com _, são de métricas e tracing)"""
+    return {name: value for name, value in vars(g).items() if not name.startswith("_")}
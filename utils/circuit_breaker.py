@@ -0,0 +1,114 @@
+import threading
+import time
+import logging
+from flask import g, has_request_context
+
+# Estados do circuito: closed (normal), open (chamadas recusadas) e half_open (uma chamada de teste)
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """O circuito do RPC está aberto: a chamada foi recusada sem chegar à rede"""
+
+
+def mark_degraded():
+    """Marca a requisição atual como dependente de uma leitura que falhou no RPC"""
+    if has_request_context():
+        g.rpc_failed = True
+
+
+def request_degraded():
+    """Se alguma leitura da requisição atual falhou no RPC (ou foi recusada pelo circuito)"""
+    return has_request_context() and bool(g.get("rpc_failed"))
+
+
+class CircuitBreaker:
+    """Circuit breaker das chamadas ao RPC de uma rede (todos os endpoints).
+
+    Após `failure_threshold` chamadas seguidas que falharam em todos os
+    endpoints, o circuito abre e novas chamadas falham na hora com
+    CircuitOpenError, em vez de esperarem o timeout de um nó travado. Passado
+    `reset_timeout`, uma única chamada de teste é liberada (half_open): se
+    tiver sucesso o circuito fecha, se falhar volta a abrir.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=15.0, name=""):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.label = f"RPC {name}" if name else "RPC"
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.last_failure = None
+        self.times_opened = 0
+        self.rejected = 0
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, name=""):
+        return cls(config.BREAKER_FAILURE_THRESHOLD, config.BREAKER_RESET_TIMEOUT, name=name)
+
+    def is_open(self):
+        """Se as chamadas estão sendo recusadas (aberto e ainda dentro de reset_timeout)"""
+        return self.state == OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def before_call(self):
+        """Libera a chamada ou levanta CircuitOpenError; threshold <= 0 desativa o circuito"""
+        if self.failure_threshold <= 0 or self.state == CLOSED:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probe_started = None
+            # Uma chamada de teste por vez; se ela não voltar (ex: erro não transitório), outra após reset_timeout
+            if self.state == HALF_OPEN and (self._probe_started is None or now - self._probe_started >= self.reset_timeout):
+                self._probe_started = now
+                return
+            if self.state == CLOSED:
+                return
+            self.rejected += 1
+        mark_degraded()
+        raise CircuitOpenError(f"Circuito do {self.label} aberto após {self.failures} falhas seguidas")
+
+    def record_success(self):
+        if self.state == CLOSED and not self.failures:
+            return
+        with self._lock:
+            if self.state != CLOSED:
+                logging.info(f"Circuito do {self.label} fechado")
+            self.state = CLOSED
+            self.failures = 0
+            self._probe_started = None
+
+    def record_failure(self):
+        mark_degraded()
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self.failures += 1
+            self.last_failure = time.time()
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                if self.state == CLOSED:
+                    self.times_opened += 1
+                    logging.warning(f"Circuito do {self.label} aberto após {self.failures} falhas seguidas")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probe_started = None
+
+    def stats(self):
+        state = self.state
+        if state == OPEN and not self.is_open():
+            # Aguardando a próxima chamada para testar o RPC
+            state = HALF_OPEN
+        return {
+            "state": state,
+            "consecutiveFailures": self.failures,
+            "failureThreshold": self.failure_threshold,
+            "resetTimeoutSeconds": self.reset_timeout,
+            "openSeconds": round(time.monotonic() - self.opened_at, 1) if self.state != CLOSED and self.opened_at else None,
+            "lastFailure": self.last_failure,
+            "timesOpened": self.times_opened,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,127 @@
+import threading
+import time
+import logging
+from web3 import AsyncWeb3, Web3
+from utils.cache import LRUCache
+from utils.circuit_breaker import CircuitBreaker
+from utils.rpc_budget import RPCBudget
+from utils.rpc_pool import AsyncPooledHTTPProvider, PooledHTTPProvider
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+class ClientRegistry:
+    """Clientes Web3 e instâncias de contrato compartilhados por todas as rotas da aplicação.
+
+    Os clientes são criados no primeiro acesso; as conexões HTTP do
+    PooledHTTPProvider são abertas por processo, então a aplicação pode ser
+    carregada com `gunicorn --preload`. O aquecimento (warm_async) roda em
+    background em cada worker, sem atrasar o import nem o boot.
+    Instâncias de contrato (caras de construir a partir da ABI) são memoizadas
+    por endereço e ABI. Os clientes síncrono e assíncrono usam o mesmo pool de
+    endpoints, o mesmo orçamento de chamadas por endpoint (`budget`, ver
+    utils/rpc_budget.py) e o mesmo circuit breaker (`breaker`, ver
+    utils/circuit_breaker.py).
+    """
+
+    def __init__(self, config, rpc_urls=None, contract_cache_size=512, budget=None, breaker=None, chain_id=None):
+        self.config = config
+        self.chain_id = chain_id
+        self.rpc_urls = rpc_urls or config.BSC_RPC_URLS
+        self.budget = budget or RPCBudget.from_config(config)
+        self.breaker = breaker or CircuitBreaker.from_config(config)
+        self._w3 = None
+        self._async_w3 = None
+        self._contracts = LRUCache(contract_cache_size, name="contracts")
+        self._warmers = []
+        self._lock = threading.Lock()
+        self.startup = {}
+
+    @property
+    def w3(self):
+        if self._w3 is None:
+            with self._lock:
+                if self._w3 is None:
+                    self._w3 = Web3(PooledHTTPProvider(
+                        self.rpc_urls,
+                        request_timeout=self.config.RPC_REQUEST_TIMEOUT,
+                        max_attempts=self.config.RPC_MAX_ATTEMPTS,
+                        hedge=self.config.RPC_HEDGE_ENABLED,
+                        hedge_delay=self.config.RPC_HEDGE_DELAY,
+                        ewma_alpha=self.config.RPC_EWMA_ALPHA,
+                        batch_max_size=self.config.RPC_BATCH_MAX_SIZE,
+                        budget=self.budget,
+                        breaker=self.breaker,
+                        chain=str(self.chain_id) if self.chain_id is not None else ""
+                    ))
+        return self._w3
+
+    @property
+    def async_w3(self):
+        if self._async_w3 is None:
+            # Mesmo pool de endpoints do cliente síncrono (latência, failover, orçamento e circuito)
+            pooled = self.w3.provider
+            with self._lock:
+                if self._async_w3 is None:
+                    self._async_w3 = AsyncWeb3(AsyncPooledHTTPProvider(pooled))
+        return self._async_w3
+
+    def contract(self, address, abi):
+        """Instância de contrato memoizada; None para o endereço zero (contrato não implantado)"""
+        if address == ZERO_ADDRESS:
+            return None
+        key = (address, id(abi))
+        contract = self._contracts.get(key)
+        if contract is None:
+            contract = self.w3.eth.contract(address=Web3.to_checksum_address(address), abi=abi)
+            self._contracts.set(key, contract)
+        return contract
+
+    def async_contract(self, address, abi):
+        """Versão de contract() para o cliente AsyncWeb3"""
+        if address == ZERO_ADDRESS:
+            return None
+        key = ("async", address, id(abi))
+        contract = self._contracts.get(key)
+        if contract is None:
+            contract = self.async_w3.eth.contract(address=Web3.to_checksum_address(address), abi=abi)
+            self._contracts.set(key, contract)
+        return contract
+
+    def add_warmer(self, name, fn):
+        """Registra uma etapa de aquecimento executada por warm() (ex: ABIs, metadados de tokens)"""
+        self._warmers.append((name, fn))
+
+    def warm(self):
+        """Executa os aquecimentos registrados; falhas (ex: RPC fora do ar) não impedem a inicialização"""
+        timings = {}
+        for name, fn in self._warmers:
+            started = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:
+                logging.warning(f"Falha ao aquecer {name}: {e}")
+            timings[name] = round((time.perf_counter() - started) * 1000, 2)
+        return timings
+
+    def warm_async(self):
+        """Executa warm() em uma thread de background; retorna a thread"""
+        def run():
+            started = time.perf_counter()
+            self.startup["warmupMs"] = self.warm()
+            self.startup["warmupTotalMs"] = round((time.perf_counter() - started) * 1000, 2)
+
+        thread = threading.Thread(target=run, name="clients-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def init_app(self, app):
+        app.extensions["clients"] = self
+
+    def stats(self):
+        return {
+            "contracts": self._contracts.stats(),
+            "budget": self.budget.stats(),
+            "breaker": self.breaker.stats(),
+            "startup": self.startup
+        }
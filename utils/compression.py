@@ -0,0 +1,57 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli é opcional
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/x-ndjson", "text/plain", "text/html", "text/csv"}
+
+
+class ResponseCompressor:
+    """Comprime respostas com brotli ou gzip conforme o Accept-Encoding do cliente.
+
+    Apenas respostas 200 completas (não streamadas) de tipos textuais acima
+    de min_size bytes são comprimidas; o ETag passa a ser fraco, já que o
+    corpo enviado depende da codificação negociada.
+    """
+
+    def __init__(self, app=None, min_size=1024, gzip_level=6, brotli_quality=4):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.after_request(self.compress_response)
+
+    def available_encodings(self):
+        return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+    def compress(self, data, encoding):
+        if encoding == "br":
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def compress_response(self, response):
+        response.vary.add("Accept-Encoding")
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or "Content-Encoding" in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        encoding = request.accept_encodings.best_match(self.available_encodings())
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        response.set_data(self.compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag is not None and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,183 @@
+import json
+import os
+import queue
+import threading
+import logging
+from collections import deque
+from utils.rpc_budget import set_priority
+
+
+class StreamEvent:
+    """Evento publicado no stream; o id "<bloco>-<sequência>" permite retomar via Last-Event-ID"""
+
+    __slots__ = ("id", "order", "topic", "data", "tokens")
+
+    def __init__(self, block_number, sequence, topic, data, tokens=()):
+        self.id = f"{block_number}-{sequence}"
+        self.order = (block_number, sequence)
+        self.topic = topic
+        self.data = data
+        self.tokens = frozenset(token.lower() for token in tokens)
+
+    def encode(self):
+        return f"id: {self.id}\nevent: {self.topic}\ndata: {json.dumps(self.data, separators=(',', ':'))}\n\n"
+
+
+def parse_event_id(event_id):
+    """Converte um Last-Event-ID em (bloco, sequência); None se ausente ou inválido"""
+    try:
+        block_number, sequence = event_id.split("-", 1)
+        return int(block_number), int(sequence)
+    except (AttributeError, ValueError):
+        return None
+
+
+class Subscription:
+    """Fila limitada de um cliente; se encher, o cliente é marcado como lento e desconectado"""
+
+    def __init__(self, topics=None, token=None, queue_size=100):
+        self.topics = set(topics) if topics else None
+        self.token = token.lower() if token else None
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = False
+
+    def matches(self, event):
+        if self.topics is not None and event.topic not in self.topics:
+            return False
+        return self.token is None or not event.tokens or self.token in event.tokens
+
+    def offer(self, event):
+        if self.dropped or not self.matches(event):
+            return
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped = True
+
+
+class EventBroker:
+    """Distribui eventos do produtor a todos os assinantes do worker e guarda um histórico curto para retomada"""
+
+    def __init__(self, history_size=500, queue_size=100):
+        self.queue_size = queue_size
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+        self._latest = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, event):
+        with self._lock:
+            self._history.append(event)
+            self._latest[event.topic] = event
+            self.published += 1
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            was_dropped = subscription.dropped
+            subscription.offer(event)
+            if subscription.dropped and not was_dropped:
+                self.dropped += 1
+
+    def subscribe(self, topics=None, token=None, last_event_id=None):
+        """Registra um assinante; retorna (assinatura, eventos do histórico posteriores ao Last-Event-ID)"""
+        subscription = Subscription(topics, token, self.queue_size)
+        resume_after = parse_event_id(last_event_id)
+        with self._lock:
+            self._subscribers.add(subscription)
+            replay = [
+                event for event in self._history
+                if resume_after is not None and event.order > resume_after and subscription.matches(event)
+            ]
+        return subscription, replay
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def wants(self, topic):
+        """Indica se algum assinante ativo recebe o tópico"""
+        with self._lock:
+            return any(s.topics is None or topic in s.topics for s in self._subscribers if not s.dropped)
+
+    def has_subscribers(self):
+        with self._lock:
+            return bool(self._subscribers)
+
+    def latest(self, topic):
+        """Dados do último evento publicado no tópico, ou None"""
+        event = self._latest.get(topic)
+        return event.data if event is not None else None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "published": self.published,
+                "droppedSubscribers": self.dropped,
+                "history": len(self._history)
+            }
+
+
+class BlockEventProducer:
+    """Produtor único por worker: a cada novo bloco lê os dados uma vez e publica o que mudou.
+
+    `collect(block_number, topics)` deve retornar uma lista de
+    (tópico, chave, dados, tokens) apenas para os tópicos pedidos; eventos
+    com a mesma (tópico, chave) só são republicados quando os dados mudam.
+    Sem assinantes, nenhuma leitura é feita.
+    """
+
+    def __init__(self, broker, head_tracker, collect, topics, interval=3.0):
+        self.broker = broker
+        self.head_tracker = head_tracker
+        self.collect = collect
+        self.topics = list(topics)
+        self.interval = interval
+        self.last_block = None
+        self.last_error = None
+        self._last_payloads = {}
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="block-event-producer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # Preços e alertas em tempo real para os assinantes do stream
+        set_priority("critical")
+        while not self._stop.is_set():
+            try:
+                if self.broker.has_subscribers():
+                    self.produce_once()
+                    self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logging.error(f"Erro no produtor de eventos: {e}")
+            self._stop.wait(self.interval)
+
+    def produce_once(self):
+        block_number = self.head_tracker.latest()
+        if block_number == self.last_block:
+            return
+        topics = [topic for topic in self.topics if self.broker.wants(topic)]
+        sequence = 0
+        for topic, key, data, tokens in self.collect(block_number, topics):
+            payload = json.dumps(data, sort_keys=True, default=str)
+            if self._last_payloads.get((topic, key)) == payload:
+                continue
+            self._last_payloads[(topic, key)] = payload
+            self.broker.publish(StreamEvent(block_number, sequence, topic, {"block": block_number, **data}, tokens))
+            sequence += 1
+        self.last_block = block_number
@@ -0,0 +1,132 @@
+import contextvars
+import itertools
+import os
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(max_workers=8):
+    """Executor compartilhado e limitado do worker atual (recriado após fork)"""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fanout")
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def chunked(items, size):
+    """Divide uma sequência em lotes de no máximo `size` itens"""
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def ichunked(items, size):
+    """Versão preguiçosa de chunked para iteráveis de tamanho desconhecido (ex: um upload lido aos poucos)"""
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bounded_imap(fn, items, max_workers=8, deadline=None, on_error=None):
+    """Aplica fn a cada item em paralelo e produz os resultados em ordem, assim que ficam prontos.
+
+    Itens que lançam exceção são omitidos (e repassados a on_error). Se o prazo
+    total de `deadline` segundos expirar, concurrent.futures.TimeoutError é
+    lançado para o consumidor e os itens que ainda não começaram são
+    cancelados. Itens já em execução não são interrompidos: terminam em
+    segundo plano (limitados pelos timeouts do próprio fn, ex: o do RPC) e o
+    resultado é descartado.
+    """
+    items = list(items)
+    executor = get_executor(max_workers)
+    started = time.monotonic()
+    expires = None if deadline is None else started + deadline
+
+    def run(item):
+        # Item que sai da fila depois do prazo (cancel() perdeu a corrida) não faz nenhuma chamada
+        if expires is not None and time.monotonic() >= expires:
+            raise FutureTimeout(f"Prazo de {deadline}s excedido antes do início")
+        return fn(item)
+
+    # Cada tarefa roda em uma cópia do contexto atual (ex: trace RPC da requisição)
+    futures = [executor.submit(contextvars.copy_context().run, run, item) for item in items]
+    try:
+        for index, (item, future) in enumerate(zip(items, futures)):
+            timeout = None if expires is None else max(0, expires - time.monotonic())
+            try:
+                result = future.result(timeout=timeout)
+            except Exception as e:
+                # Prazo total: o resultado não ficou pronto (um TimeoutError do próprio item é só um erro do item)
+                if isinstance(e, FutureTimeout) and not future.done():
+                    logging.warning(
+                        f"Prazo de {deadline}s excedido: {len(items) - index} de {len(items)} itens pendentes"
+                    )
+                    raise
+                if on_error is not None:
+                    on_error(item, e)
+                else:
+                    logging.error(f"Erro ao processar item {item!r}: {e}")
+                continue
+            yield result
+    finally:
+        # Consumidor encerrou (prazo, erro ou cliente desconectado): liberar o executor
+        for future in futures:
+            future.cancel()
+
+
+def bounded_map(fn, items, max_workers=8, deadline=None, on_error=None):
+    """Versão não incremental de bounded_imap.
+
+    Retorna (resultados, completo), onde completo indica que nenhum item
+    expirou antes do prazo.
+    """
+    results = []
+    try:
+        for result in bounded_imap(fn, items, max_workers, deadline, on_error):
+            results.append(result)
+    except FutureTimeout:
+        return results, False
+    return results, True
+
+
+def windowed_imap(fn, items, max_workers=8, window=None, on_error=None):
+    """Como bounded_imap, mas consome `items` aos poucos, à medida que os resultados são entregues.
+
+    No máximo `window` itens (padrão: 2 x max_workers) ficam em execução ou à
+    espera do consumidor, então a memória não depende do tamanho da entrada.
+    Não há prazo total (a entrada pode ser longa); cada item é limitado pelos
+    timeouts do próprio fn.
+    """
+    executor = get_executor(max_workers)
+    window = window or max_workers * 2
+    iterator = iter(items)
+    pending = deque()
+    try:
+        while True:
+            for item in itertools.islice(iterator, window - len(pending)):
+                pending.append((item, executor.submit(contextvars.copy_context().run, fn, item)))
+            if not pending:
+                return
+            item, future = pending.popleft()
+            try:
+                result = future.result()
+            except Exception as e:
+                if on_error is not None:
+                    on_error(item, e)
+                else:
+                    logging.error(f"Erro ao processar item {item!r}: {e}")
+                continue
+            yield result
+    finally:
+        for _, future in pending:
+            future.cancel()
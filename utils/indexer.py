@@ -0,0 +1,338 @@
+import fcntl
+import os
+import sqlite3
+import threading
+import logging
+from web3 import Web3
+from utils.multicall import Call, aggregate
+from utils.rpc_budget import set_priority
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    source TEXT NOT NULL,
+    contract TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL,
+    PRIMARY KEY (source, contract)
+);
+CREATE TABLE IF NOT EXISTS pools (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    contract TEXT NOT NULL,
+    pool_id TEXT NOT NULL,
+    token_a TEXT NOT NULL,
+    token_b TEXT NOT NULL,
+    pair_address TEXT NOT NULL,
+    liquidity_amount TEXT NOT NULL,
+    is_active INTEGER NOT NULL,
+    created_at INTEGER NOT NULL,
+    network_id INTEGER NOT NULL,
+    first_seen_block INTEGER NOT NULL,
+    updated_block INTEGER NOT NULL,
+    UNIQUE (contract, pool_id)
+);
+CREATE INDEX IF NOT EXISTS pools_token_a ON pools (contract, token_a);
+CREATE INDEX IF NOT EXISTS pools_token_b ON pools (contract, token_b);
+CREATE TABLE IF NOT EXISTS stablecoins (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    contract TEXT NOT NULL,
+    stablecoin_id TEXT NOT NULL,
+    address TEXT NOT NULL,
+    liquidity_manager_address TEXT NOT NULL,
+    pool_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    collateral_token TEXT NOT NULL,
+    initial_supply TEXT NOT NULL,
+    collateral_ratio TEXT NOT NULL,
+    is_active INTEGER NOT NULL,
+    created_at INTEGER NOT NULL,
+    first_seen_block INTEGER NOT NULL,
+    updated_block INTEGER NOT NULL,
+    UNIQUE (contract, stablecoin_id)
+);
+CREATE INDEX IF NOT EXISTS stablecoins_address ON stablecoins (contract, address);
+CREATE INDEX IF NOT EXISTS stablecoins_collateral ON stablecoins (contract, collateral_token);
+"""
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+
+class EventIndexer:
+    """Indexador incremental dos eventos do liquidity manager e da stablecoin factory em SQLite (WAL).
+
+    Na primeira execução para um contrato, o registro é semeado a partir de
+    getAllPoolIds/getAllStablecoinIds no bloco atual. Depois, os logs são lidos
+    em lotes de eth_getLogs a partir do checkpoint e o item de cada log é
+    relido via Multicall3. Se o hash do bloco do checkpoint mudar (reorg), os
+    últimos `reorg_depth` blocos são desfeitos e reprocessados.
+
+    As ABIs dos contratos não declaram eventos, então o indexador assume que o
+    primeiro tópico indexado (topics[1]) de qualquer log do contrato é um
+    poolId/stablecoinId. Tópicos que não correspondem a um item existente
+    (leitura revertida ou endereço zero) são descartados; um evento que mude
+    um item sem indexar o seu ID não é visto até a próxima semeadura.
+    """
+
+    def __init__(self, w3, db_path, contracts, liquidity_manager_abi, factory_abi, interval=3.0,
+                 log_chunk=2000, reorg_depth=15, multicall_address=None, chunk_size=200):
+        self.w3 = w3
+        self.db_path = db_path
+        self.contracts = contracts
+        self.liquidity_manager_abi = liquidity_manager_abi
+        self.factory_abi = factory_abi
+        self.interval = interval
+        self.log_chunk = log_chunk
+        self.reorg_depth = reorg_depth
+        self.multicall_address = multicall_address
+        self.chunk_size = chunk_size
+        self.last_error = None
+        self._local = threading.local()
+        self._thread = None
+        self._pid = None
+        self._lock_file = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def connection(self):
+        """Conexão SQLite da thread atual (sqlite3 não compartilha conexões entre threads)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # Execução em background
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._lock_file = None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="event-indexer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _acquire_writer_lock(self):
+        """Apenas um worker por host escreve; os demais só leem o banco"""
+        if self._lock_file is not None:
+            return True
+        lock_file = open(f"{self.db_path}.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _run(self):
+        # Varredura de logs em lote: cede o orçamento do RPC às leituras das requisições
+        set_priority("bulk")
+        while not self._stop.is_set():
+            try:
+                if self._acquire_writer_lock():
+                    self.sync_once()
+                    self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logging.error(f"Erro no indexador de eventos: {e}")
+            self._stop.wait(self.interval)
+
+    def sync_once(self):
+        head = self.w3.eth.block_number
+        self._sync_source("pools", self.contracts["MULTI_LIQUIDITY_MANAGER"], head)
+        self._sync_source("stablecoins", self.contracts["STABLECOIN_FACTORY"], head)
+
+    # Sincronização
+
+    def _contract(self, source, address):
+        abi = self.liquidity_manager_abi if source == "pools" else self.factory_abi
+        return self.w3.eth.contract(address=Web3.to_checksum_address(address), abi=abi)
+
+    def _block_hash(self, block_number):
+        return self.w3.eth.get_block(block_number)["hash"].hex()
+
+    def get_checkpoint(self, source, address):
+        row = self.connection().execute(
+            "SELECT block_number, block_hash FROM checkpoints WHERE source = ? AND contract = ?",
+            (source, address.lower())
+        ).fetchone()
+        return (row["block_number"], row["block_hash"]) if row else None
+
+    def _save_checkpoint(self, conn, source, address, block_number):
+        conn.execute(
+            "INSERT INTO checkpoints (source, contract, block_number, block_hash) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (source, contract) DO UPDATE SET block_number = excluded.block_number, "
+            "block_hash = excluded.block_hash",
+            (source, address.lower(), block_number, self._block_hash(block_number))
+        )
+
+    def _sync_source(self, source, address, head):
+        if not address or address == ZERO_ADDRESS:
+            return
+        contract = self._contract(source, address)
+        checkpoint = self.get_checkpoint(source, address)
+
+        if checkpoint is None:
+            # Semear com o estado atual em vez de varrer a chain desde o gênesis
+            list_function = contract.functions.getAllPoolIds if source == "pools" else contract.functions.getAllStablecoinIds
+            item_ids = list_function().call(block_identifier=head)
+            # first_seen_block 0: o item já existia antes do indexador, nunca é desfeito por reorg
+            touched = {bytes(item_id): 0 for item_id in item_ids}
+            self._refresh(source, contract, touched, head)
+            logging.info(f"Indexador: {len(touched)} {source} semeados no bloco {head}")
+            return
+
+        from_block, checkpoint_hash = checkpoint
+        touched = {}
+        if self._block_hash(from_block) != checkpoint_hash:
+            from_block, touched = self._rollback(source, address, from_block)
+        if from_block >= head and not touched:
+            return
+
+        for start in range(from_block + 1, head + 1, self.log_chunk):
+            end = min(start + self.log_chunk - 1, head)
+            logs = self.w3.eth.get_logs({
+                "address": contract.address,
+                "fromBlock": start,
+                "toBlock": end
+            })
+            for log in logs:
+                # Sem eventos na ABI: topics[1] é tratado como o ID do item (ver docstring da classe)
+                if len(log["topics"]) > 1:
+                    touched.setdefault(bytes(log["topics"][1]), log["blockNumber"])
+        self._refresh(source, contract, touched, head)
+
+    def _rollback(self, source, address, checkpoint_block):
+        """Desfaz os últimos blocos após um reorg; retorna o novo ponto de partida e os itens a reler"""
+        target = max(0, checkpoint_block - self.reorg_depth)
+        table, id_column = ("pools", "pool_id") if source == "pools" else ("stablecoins", "stablecoin_id")
+        conn = self.connection()
+        with conn:
+            conn.execute(
+                f"DELETE FROM {table} WHERE contract = ? AND first_seen_block > ?",
+                (address.lower(), target)
+            )
+            rows = conn.execute(
+                f"SELECT {id_column} FROM {table} WHERE contract = ? AND updated_block > ?",
+                (address.lower(), target)
+            ).fetchall()
+        logging.warning(f"Indexador: reorg detectado em {source}, voltando do bloco {checkpoint_block} para {target}")
+        return target, {bytes.fromhex(row[id_column]): target for row in rows}
+
+    def _refresh(self, source, contract, touched, head):
+        """Relê via Multicall3 os itens tocados e grava tudo junto com o novo checkpoint"""
+        item_ids = list(touched)
+        info_function = contract.functions.getPoolInfo if source == "pools" else contract.functions.getStablecoinInfo
+        results = aggregate(
+            self.w3, [Call.from_function(info_function(item_id)) for item_id in item_ids],
+            chunk_size=self.chunk_size, block_identifier=head, multicall_address=self.multicall_address
+        ) if item_ids else []
+
+        conn = self.connection()
+        with conn:
+            for item_id, (success, info) in zip(item_ids, results):
+                if not success:
+                    continue
+                if source == "pools":
+                    self._upsert_pool(conn, contract.address, item_id, info, touched[item_id], head)
+                else:
+                    self._upsert_stablecoin(conn, contract.address, item_id, info, touched[item_id], head)
+            self._save_checkpoint(conn, source, contract.address, head)
+
+    @staticmethod
+    def _upsert_pool(conn, contract_address, pool_id, info, first_seen_block, head):
+        if info[0] == ZERO_ADDRESS:
+            # Tópico não corresponde a um pool existente (ou o pool deixou de existir após um reorg)
+            conn.execute("DELETE FROM pools WHERE contract = ? AND pool_id = ?", (contract_address.lower(), pool_id.hex()))
+            return
+        conn.execute(
+            "INSERT INTO pools (contract, pool_id, token_a, token_b, pair_address, liquidity_amount, is_active, "
+            "created_at, network_id, first_seen_block, updated_block) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (contract, pool_id) DO UPDATE SET token_a = excluded.token_a, token_b = excluded.token_b, "
+            "pair_address = excluded.pair_address, liquidity_amount = excluded.liquidity_amount, "
+            "is_active = excluded.is_active, created_at = excluded.created_at, network_id = excluded.network_id, "
+            "updated_block = excluded.updated_block",
+            (contract_address.lower(), pool_id.hex(), info[0], info[1], info[2], str(info[3]), int(info[4]),
+             info[5], info[6], first_seen_block, head)
+        )
+
+    @staticmethod
+    def _upsert_stablecoin(conn, contract_address, stablecoin_id, info, first_seen_block, head):
+        if info[0] == ZERO_ADDRESS:
+            conn.execute(
+                "DELETE FROM stablecoins WHERE contract = ? AND stablecoin_id = ?",
+                (contract_address.lower(), stablecoin_id.hex())
+            )
+            return
+        config = info[3]
+        conn.execute(
+            "INSERT INTO stablecoins (contract, stablecoin_id, address, liquidity_manager_address, pool_id, name, "
+            "symbol, collateral_token, initial_supply, collateral_ratio, is_active, created_at, first_seen_block, "
+            "updated_block) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (contract, stablecoin_id) DO UPDATE SET address = excluded.address, "
+            "liquidity_manager_address = excluded.liquidity_manager_address, pool_id = excluded.pool_id, "
+            "name = excluded.name, symbol = excluded.symbol, collateral_token = excluded.collateral_token, "
+            "initial_supply = excluded.initial_supply, collateral_ratio = excluded.collateral_ratio, "
+            "is_active = excluded.is_active, created_at = excluded.created_at, updated_block = excluded.updated_block",
+            (contract_address.lower(), stablecoin_id.hex(), info[0], info[1], bytes(info[2]).hex(), config[0],
+             config[1], config[2], str(config[3]), str(config[4]), int(config[5]), config[6], first_seen_block, head)
+        )
+
+    # Consultas
+
+    def ready(self, source, address):
+        return bool(address) and address != ZERO_ADDRESS and self.get_checkpoint(source, address) is not None
+
+    def _query(self, table, address, filters, params, offset, limit):
+        where = " AND ".join(["contract = ?"] + filters)
+        sql = f"SELECT * FROM {table} WHERE {where} ORDER BY seq LIMIT ? OFFSET ?"
+        # Buscar um item a mais para saber se existe próxima página
+        rows = self.connection().execute(
+            sql, [address.lower()] + params + [-1 if limit is None else limit + 1, offset]
+        ).fetchall()
+        if limit is not None and len(rows) > limit:
+            return rows[:limit], str(offset + limit)
+        return rows, None
+
+    def query_pools(self, address, active=None, token=None, offset=0, limit=None):
+        """Pools indexados, com filtros opcionais; retorna (linhas, próximo cursor)"""
+        filters, params = [], []
+        if active is not None:
+            filters.append("is_active = ?")
+            params.append(int(active))
+        if token is not None:
+            filters.append("(token_a = ? OR token_b = ?)")
+            params.extend([token, token])
+        return self._query("pools", address, filters, params, offset, limit)
+
+    def query_stablecoins(self, address, active=None, token=None, offset=0, limit=None):
+        """Stablecoins indexadas, com filtros opcionais; retorna (linhas, próximo cursor)"""
+        filters, params = [], []
+        if active is not None:
+            filters.append("is_active = ?")
+            params.append(int(active))
+        if token is not None:
+            filters.append("(address = ? OR collateral_token = ?)")
+            params.extend([token, token])
+        return self._query("stablecoins", address, filters, params, offset, limit)
+
+    def stats(self):
+        conn = self.connection()
+        return {
+            "dbPath": self.db_path,
+            "checkpoints": [dict(row) for row in conn.execute("SELECT * FROM checkpoints").fetchall()],
+            "pools": conn.execute("SELECT COUNT(*) FROM pools").fetchone()[0],
+            "stablecoins": conn.execute("SELECT COUNT(*) FROM stablecoins").fetchone()[0],
+            "lastError": self.last_error
+        }
@@ -0,0 +1,138 @@
+import json
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+# Maior inteiro representável sem perda em um double (Number do JavaScript)
+MAX_SAFE_INTEGER = 2 ** 53 - 1
+
+# Faixa de inteiros que o orjson serializa nativamente
+ORJSON_MIN_INT = -2 ** 63
+ORJSON_MAX_INT = 2 ** 64 - 1
+_SCALARS = frozenset((str, float, bool, type(None)))
+
+
+def stringify_big_ints(value):
+    """Converte inteiros fora da faixa segura do JavaScript em strings decimais"""
+    value_type = type(value)
+    if value_type is dict:
+        return {key: stringify_big_ints(item) for key, item in value.items()}
+    if value_type is list or isinstance(value, tuple):
+        return [stringify_big_ints(item) for item in value]
+    if value_type is int and (value > MAX_SAFE_INTEGER or value < -MAX_SAFE_INTEGER):
+        return str(value)
+    return value
+
+
+def fragment_big_ints(value):
+    """Envolve inteiros acima de 64 bits em orjson.Fragment (o número decimal exato, já serializado).
+
+    Só os containers que têm algo a converter são copiados; namedtuples (que o
+    orjson não serializa) viram listas, como na stdlib.
+    """
+    value_type = type(value)
+    if value_type is dict:
+        converted = None
+        for key, item in value.items():
+            item_type = type(item)
+            if item_type is int:
+                if ORJSON_MIN_INT <= item <= ORJSON_MAX_INT:
+                    continue
+                item = orjson.Fragment(str(item))
+            elif item_type in _SCALARS:
+                continue
+            else:
+                new_item = fragment_big_ints(item)
+                if new_item is item:
+                    continue
+                item = new_item
+            if converted is None:
+                converted = dict(value)
+            converted[key] = item
+        return value if converted is None else converted
+    if value_type is list or isinstance(value, tuple):
+        converted = None
+        for index, item in enumerate(value):
+            item_type = type(item)
+            if item_type is int:
+                if ORJSON_MIN_INT <= item <= ORJSON_MAX_INT:
+                    continue
+                item = orjson.Fragment(str(item))
+            elif item_type in _SCALARS:
+                continue
+            else:
+                new_item = fragment_big_ints(item)
+                if new_item is item:
+                    continue
+                item = new_item
+            if converted is None:
+                converted = list(value)
+            converted[index] = item
+        if converted is None and value_type is not list and value_type is not tuple:
+            return list(value)
+        return value if converted is None else converted
+    if value_type is int and not ORJSON_MIN_INT <= value <= ORJSON_MAX_INT:
+        return orjson.Fragment(str(value))
+    if isinstance(value, dict):
+        return fragment_big_ints(dict(value))
+    return value
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Provider JSON do Flask que usa orjson quando instalado, com fallback para o json da stdlib.
+
+    orjson só aceita inteiros de até 64 bits: valores uint256 (totalSupply,
+    liquidityAmount...) são convertidos antes em orjson.Fragment, mantendo
+    números JSON exatos sem sair do orjson. Com big_int_as_string (ou ?bigint=string na requisição), inteiros acima
+    de 2^53 são enviados como strings para não perder precisão no cliente.
+    """
+
+    big_int_as_string = False
+
+    def _wants_big_int_strings(self):
+        if has_request_context():
+            mode = request.args.get("bigint")
+            if mode is not None:
+                return mode == "string"
+        return self.big_int_as_string
+
+    def _orjson_options(self):
+        # Datas passam pelo default do Flask para manter o mesmo formato da stdlib
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.compact is False or (self.compact is None and self._app.debug):
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj):
+        if self._wants_big_int_strings():
+            # Não sobram inteiros acima de 2^53, dentro da faixa do orjson
+            obj = stringify_big_ints(obj)
+        elif orjson is not None:
+            obj = fragment_big_ints(obj)
+        if orjson is not None:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options())
+        return super().dumps(obj).encode()
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError as e:
+                # Manter o mesmo tipo de erro da stdlib para quem trata ValueError/JSONDecodeError
+                raise json.JSONDecodeError(str(e), e.doc, e.pos) from e
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
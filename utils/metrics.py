@@ -0,0 +1,309 @@
+import os
+import time
+from flask import Response, g, request
+from eth_utils import function_abi_to_4byte_selector
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+from prometheus_client.core import GaugeMetricFamily
+
+# Com PROMETHEUS_MULTIPROC_DIR definido (gunicorn com vários workers), cada
+# processo grava suas métricas em arquivos mmap e o /metrics agrega todos
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HTTP_REQUESTS = Counter(
+    "brzstable_http_requests_total", "Requisições HTTP atendidas", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "brzstable_http_request_duration_seconds", "Latência das requisições HTTP", ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_IN_FLIGHT = Gauge(
+    "brzstable_http_requests_in_flight", "Requisições HTTP em andamento", multiprocess_mode="livesum"
+)
+RPC_CALLS = Counter(
+    "brzstable_rpc_calls_total", "Chamadas JSON-RPC enviadas", ["chain", "method", "function", "outcome"]
+)
+RPC_LATENCY = Histogram(
+    "brzstable_rpc_call_duration_seconds", "Latência das chamadas JSON-RPC (incluindo failover)",
+    ["chain", "method", "function"], buckets=LATENCY_BUCKETS
+)
+RPC_IN_FLIGHT = Gauge(
+    "brzstable_rpc_calls_in_flight", "Chamadas JSON-RPC em andamento", multiprocess_mode="livesum"
+)
+MULTICALL_SUBCALLS = Counter(
+    "brzstable_multicall_subcalls_total", "Leituras agregadas em chamadas aggregate3", ["function"]
+)
+CACHE_REQUESTS = Counter(
+    "brzstable_cache_requests_total", "Consultas aos caches em memória", ["cache", "result"]
+)
+SINGLEFLIGHT_CALLS = Counter(
+    "brzstable_singleflight_calls_total",
+    "Leituras por papel na coalescência (leader executa, follower reaproveita, timeout desistiu)",
+    ["kind", "role"]
+)
+RPC_BUDGET = Counter(
+    "brzstable_rpc_budget_total",
+    "Chamadas ao RPC por prioridade no orçamento (admitted imediata, queued após espera, shed recusada)",
+    ["priority", "outcome"]
+)
+STALE_RESPONSES = Counter(
+    "brzstable_stale_responses_total",
+    "Respostas anteriores servidas no lugar de uma leitura nova (timeout, refreshing, circuit_open, rpc_error ou error)",
+    ["reason"]
+)
+CHAIN_HEAD_BLOCK = Gauge(
+    "brzstable_chain_head_block", "Bloco mais recente observado", ["chain"], multiprocess_mode="max"
+)
+CHAIN_HEAD_UPDATED = Gauge(
+    "brzstable_chain_head_updated_timestamp_seconds", "Momento em que o bloco mais recente mudou", ["chain"],
+    multiprocess_mode="max"
+)
+PROCESS_STARTED = Gauge(
+    "brzstable_process_start_timestamp_seconds", "Início do processo mais antigo da API", multiprocess_mode="min"
+)
+PROCESS_STARTED.set(time.time())
+
+# Seletor de 4 bytes -> nome da função, para rotular eth_call e subchamadas de multicall
+_function_selectors = {}
+
+
+def register_selector(selector, name):
+    _function_selectors[bytes(selector).hex()] = name
+
+
+def register_abi(abi):
+    for item in abi:
+        if item.get("type", "function") == "function" and "name" in item:
+            register_selector(function_abi_to_4byte_selector(item), item["name"])
+
+
+def function_label(call_data):
+    if not call_data:
+        return ""
+    if isinstance(call_data, str):
+        selector = call_data[2:10] if call_data.startswith("0x") else call_data[:8]
+    else:
+        selector = bytes(call_data[:4]).hex()
+    return _function_selectors.get(selector.lower(), "unknown")
+
+
+def rpc_function_label(method, params):
+    """Nome da função do contrato chamada por um eth_call, ou "" para outros métodos"""
+    if method != "eth_call" or not params or not isinstance(params[0], dict):
+        return ""
+    return function_label(params[0].get("data") or params[0].get("input"))
+
+
+class track_rpc:
+    """Mede uma chamada JSON-RPC na rede `chain`; defina `outcome` como "rpc_error" quando a resposta trouxer erro"""
+
+    def __init__(self, method, function="", chain=""):
+        self.method = method
+        self.function = function
+        self.chain = chain
+        self.outcome = "success"
+
+    def __enter__(self):
+        RPC_IN_FLIGHT.inc()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        RPC_IN_FLIGHT.dec()
+        outcome = "error" if exc_type is not None else self.outcome
+        RPC_CALLS.labels(self.chain, self.method, self.function, outcome).inc()
+        RPC_LATENCY.labels(self.chain, self.method, self.function).observe(time.perf_counter() - self._started)
+        return False
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_flight(kind, role):
+    SINGLEFLIGHT_CALLS.labels(kind, role).inc()
+
+
+def record_budget(priority, outcome):
+    RPC_BUDGET.labels(priority, outcome).inc()
+
+
+def record_stale(reason):
+    STALE_RESPONSES.labels(reason).inc()
+
+
+def record_head(block_number, updated_at, chain_id=None):
+    chain = str(chain_id) if chain_id is not None else ""
+    CHAIN_HEAD_BLOCK.labels(chain).set(block_number)
+    CHAIN_HEAD_UPDATED.labels(chain).set(updated_at)
+
+
+def init_app(app):
+    """Instrumenta latência, contagem e concorrência das requisições de todas as rotas"""
+
+    @app.before_request
+    def start_request_timer():
+        g._metrics_started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop("_metrics_started", None)
+        if started is not None:
+            HTTP_IN_FLIGHT.dec()
+            route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            HTTP_REQUESTS.labels(request.method, route, str(response.status_code)).inc()
+            HTTP_LATENCY.labels(request.method, route).observe(time.perf_counter() - started)
+        return response
+
+    @app.teardown_request
+    def finish_request(_exc):
+        # Exceções não tratadas não passam pelo after_request
+        if g.pop("_metrics_started", None) is not None:
+            HTTP_IN_FLIGHT.dec()
+
+
+def collector_registry():
+    if not MULTIPROCESS:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+class ChainHeadLagCollector:
+    """Idade do bloco mais recente de cada rede, vista pelo processo que atende o scrape"""
+
+    def __init__(self, head_trackers):
+        self.head_trackers = head_trackers
+
+    def collect(self):
+        lag = GaugeMetricFamily(
+            "brzstable_chain_head_lag_seconds", "Segundos desde a última mudança de bloco", labels=["chain"]
+        )
+        for chain_id, head_tracker in self.head_trackers.items():
+            if head_tracker.updated_at is not None:
+                lag.add_metric([str(chain_id)], time.time() - head_tracker.updated_at)
+        yield lag
+
+
+def metrics_response(head_trackers):
+    """head_trackers: {chainId: BlockHeadTracker}"""
+    local_registry = CollectorRegistry(auto_describe=False)
+    local_registry.register(ChainHeadLagCollector(head_trackers))
+    body = generate_latest(collector_registry()) + generate_latest(local_registry)
+    return Response(body, content_type=CONTENT_TYPE_LATEST)
+
+
+def _histogram_quantile(buckets, quantile):
+    # Mesma interpolação linear do histogram_quantile do PromQL
+    total = buckets[-1][1] if buckets else 0
+    if not total:
+        return None
+    rank = quantile * total
+    previous_bound, previous_count = 0.0, 0.0
+    for bound, count in buckets:
+        if count >= rank:
+            if bound == float("inf"):
+                return previous_bound
+            return previous_bound + (bound - previous_bound) * (rank - previous_count) / max(count - previous_count, 1e-9)
+        previous_bound, previous_count = bound, count
+    return previous_bound
+
+
+def summarize(chain_id=None):
+    """Resumo agregado (todos os workers em modo multiprocess) para /api/monitor/system.
+
+    Com chain_id, a seção rpc (chamadas, erros e latência) e headBlock são só
+    dessa rede; headBlocks traz o de cada rede observada. As demais seções
+    (http, caches, coalescência, orçamento e respostas anteriores) são globais.
+    """
+    chain = str(chain_id) if chain_id is not None else None
+    requests_total = http_errors = rpc_total = rpc_errors = 0.0
+    in_flight = {"http": 0.0, "rpc": 0.0}
+    cache = {}
+    flights = {}
+    budget = {}
+    stale = {}
+    latency_buckets = {"http": {}, "rpc": {}}
+    started = None
+    head_blocks = {}
+    for family in collector_registry().collect():
+        for sample in family.samples:
+            name, labels, value = sample.name, sample.labels, sample.value
+            if name == "brzstable_http_requests_total":
+                requests_total += value
+                if labels["status"].startswith("5"):
+                    http_errors += value
+            elif name == "brzstable_rpc_calls_total" and labels["method"] != "batch":
+                # O envelope "batch" só mede o POST; as chamadas internas já são contadas
+                if chain is not None and labels["chain"] != chain:
+                    continue
+                rpc_total += value
+                if labels["outcome"] != "success":
+                    rpc_errors += value
+            elif name == "brzstable_http_requests_in_flight":
+                in_flight["http"] += value
+            elif name == "brzstable_rpc_calls_in_flight":
+                in_flight["rpc"] += value
+            elif name == "brzstable_singleflight_calls_total":
+                roles = flights.setdefault(labels["kind"], {"leader": 0.0, "follower": 0.0, "timeout": 0.0})
+                roles[labels["role"]] += value
+            elif name == "brzstable_rpc_budget_total":
+                outcomes = budget.setdefault(labels["priority"], {"admitted": 0.0, "queued": 0.0, "shed": 0.0})
+                outcomes[labels["outcome"]] += value
+            elif name == "brzstable_stale_responses_total":
+                stale[labels["reason"]] = stale.get(labels["reason"], 0.0) + value
+            elif name == "brzstable_cache_requests_total":
+                cache.setdefault(labels["cache"], {"hit": 0.0, "miss": 0.0})[labels["result"]] += value
+            elif name in ("brzstable_http_request_duration_seconds_bucket", "brzstable_rpc_call_duration_seconds_bucket"):
+                kind = "http" if name.startswith("brzstable_http") else "rpc"
+                if kind == "rpc" and chain is not None and labels["chain"] != chain:
+                    continue
+                bound = float(labels["le"])
+                latency_buckets[kind][bound] = latency_buckets[kind].get(bound, 0.0) + value
+            elif name == "brzstable_process_start_timestamp_seconds":
+                started = value if started is None else min(started, value)
+            elif name == "brzstable_chain_head_block":
+                head_blocks[labels["chain"]] = max(head_blocks.get(labels["chain"], 0.0), value)
+
+    def quantiles(kind):
+        buckets = sorted(latency_buckets[kind].items())
+        return {
+            f"p{int(q * 100)}Ms": round(value * 1000, 2) if value is not None else None
+            for q, value in ((q, _histogram_quantile(buckets, q)) for q in (0.5, 0.95, 0.99))
+        }
+
+    return {
+        "uptimeSeconds": round(time.time() - started, 1) if started is not None else None,
+        "http": {
+            "requests": int(requests_total),
+            "errorRate": round(http_errors / requests_total, 4) if requests_total else 0.0,
+            "inFlight": int(in_flight["http"]),
+            "latency": quantiles("http")
+        },
+        "rpc": {
+            "calls": int(rpc_total),
+            "errorRate": round(rpc_errors / rpc_total, 4) if rpc_total else 0.0,
+            "inFlight": int(in_flight["rpc"]),
+            "latency": quantiles("rpc")
+        },
+        "cacheHitRatio": {
+            name: round(counts["hit"] / (counts["hit"] + counts["miss"]), 4) if counts["hit"] + counts["miss"] else 0.0
+            for name, counts in cache.items()
+        },
+        "coalesced": {
+            kind: {role: int(count) for role, count in roles.items()}
+            for kind, roles in flights.items()
+        },
+        "rpcBudget": {
+            priority: {outcome: int(count) for outcome, count in outcomes.items()}
+            for priority, outcomes in budget.items()
+        },
+        "staleResponses": {reason: int(count) for reason, count in stale.items()},
+        "headBlock": int(head_blocks[chain]) if head_blocks.get(chain) else None,
+        "headBlocks": {chain: int(block) for chain, block in head_blocks.items() if block}
+    }
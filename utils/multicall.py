@@ -0,0 +1,194 @@
+import asyncio
+import functools
+import logging
+from eth_abi import encode, decode
+from web3 import Web3
+from utils.metrics import MULTICALL_SUBCALLS, function_label, register_selector
+from utils.rpc_budget import RPCBudgetExceeded
+from utils.tracing import trace_subcalls, trace_timing
+
+# Multicall3 possui o mesmo endereço em praticamente todas as redes EVM (BSC mainnet e testnet incluídas)
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# aggregate3((address target, bool allowFailure, bytes callData)[])
+AGGREGATE3_SELECTOR = bytes.fromhex("82ad56cb")
+AGGREGATE3_INPUT_TYPES = ["(address,bool,bytes)[]"]
+AGGREGATE3_OUTPUT_TYPES = ["(bool,bytes)[]"]
+register_selector(AGGREGATE3_SELECTOR, "aggregate3")
+
+DEFAULT_CHUNK_SIZE = 200
+
+# O checksum (keccak do endereço) é caro e os mesmos endereços se repetem em todas as respostas
+checksum_address = functools.lru_cache(maxsize=8192)(Web3.to_checksum_address)
+
+
+def abi_type(param):
+    """Converte um parâmetro de ABI (JSON) no tipo canônico usado pelo eth_abi"""
+    param_type = param["type"]
+    if param_type.startswith("tuple"):
+        components = ",".join(abi_type(c) for c in param["components"])
+        return f"({components}){param_type[len('tuple'):]}"
+    return param_type
+
+
+def normalize_value(param, value):
+    """Aplica checksum em endereços decodificados, como o web3 faz em .call()"""
+    param_type = param["type"]
+    if param_type.endswith("]"):
+        inner = dict(param, type=param_type[:param_type.rindex("[")])
+        return [normalize_value(inner, v) for v in value]
+    if param_type == "tuple":
+        return tuple(normalize_value(c, v) for c, v in zip(param["components"], value))
+    if param_type == "address":
+        return checksum_address(value)
+    return value
+
+
+class Call:
+    """Leitura de contrato a ser agregada em um aggregate3.
+
+    O retorno é decodificado pelas `outputs` da ABI ou, se informado, por
+    `decoder` (ex: FunctionCodec.decode, pré-compilado).
+    """
+
+    __slots__ = ("target", "call_data", "outputs", "output_types", "decoder")
+
+    def __init__(self, target, call_data, outputs=None, decoder=None):
+        self.target = checksum_address(target)
+        self.call_data = bytes(call_data)
+        self.outputs = outputs
+        self.output_types = [abi_type(o) for o in outputs] if outputs is not None else None
+        self.decoder = decoder
+
+    @classmethod
+    def from_function(cls, contract_function):
+        """Cria a chamada a partir de um ContractFunction do web3 (ex: contract.functions.name())"""
+        call_data = Web3.to_bytes(hexstr=contract_function._encode_transaction_data())
+        return cls(contract_function.address, call_data, contract_function.abi["outputs"])
+
+    def decode(self, return_data):
+        """Decodifica o retorno no mesmo formato de ContractFunction.call()"""
+        if self.decoder is not None:
+            return self.decoder(return_data)
+        values = decode(self.output_types, return_data)
+        values = [normalize_value(o, v) for o, v in zip(self.outputs, values)]
+        return values[0] if len(values) == 1 else tuple(values)
+
+
+def encode_aggregate3(calls):
+    """Monta o calldata de aggregate3 com allowFailure em todas as chamadas"""
+    entries = [(call.target, True, call.call_data) for call in calls]
+    return AGGREGATE3_SELECTOR + encode(AGGREGATE3_INPUT_TYPES, [entries])
+
+
+def decode_aggregate3(calls, raw):
+    """Decodifica o retorno de aggregate3 em uma lista de (sucesso, valor)"""
+    with trace_timing("abiDecode"):
+        (entries,) = decode(AGGREGATE3_OUTPUT_TYPES, bytes(raw))
+        if len(entries) != len(calls):
+            raise ValueError(f"aggregate3 retornou {len(entries)} resultados para {len(calls)} chamadas")
+        return [_decode_entry(call, success, data) for call, (success, data) in zip(calls, entries)]
+
+
+def _decode_entry(call, success, return_data):
+    if not success:
+        return (False, None)
+    try:
+        return (True, call.decode(return_data))
+    except Exception as e:
+        # Ex: endereço sem código retorna sucesso com dados vazios
+        logging.debug(f"Falha ao decodificar retorno de {call.target}: {e}")
+        return (False, None)
+
+
+def _call_individually(w3, calls, block_identifier):
+    """Fallback sem Multicall3: uma eth_call por leitura, isolando falhas"""
+    results = []
+    for call in calls:
+        try:
+            raw = w3.eth.call({"to": call.target, "data": call.call_data}, block_identifier)
+            results.append(_decode_entry(call, True, raw))
+        except RPCBudgetExceeded:
+            # Sem orçamento de chamadas: a requisição inteira deve ser recusada, não cada leitura
+            raise
+        except Exception as e:
+            logging.debug(f"Falha na chamada para {call.target}: {e}")
+            results.append((False, None))
+    return results
+
+
+def _count_subcalls(calls):
+    functions = [function_label(call.call_data) for call in calls]
+    for function in functions:
+        MULTICALL_SUBCALLS.labels(function).inc()
+    trace_subcalls(functions)
+
+
+def aggregate_chunk(w3, calls, block_identifier="latest", multicall_address=MULTICALL3_ADDRESS):
+    """Executa um único aggregate3; recorre a chamadas individuais se o Multicall3 falhar"""
+    if not calls:
+        return []
+    _count_subcalls(calls)
+    try:
+        raw = w3.eth.call(
+            {"to": Web3.to_checksum_address(multicall_address), "data": encode_aggregate3(calls)},
+            block_identifier
+        )
+        return decode_aggregate3(calls, raw)
+    except RPCBudgetExceeded:
+        raise
+    except Exception as e:
+        logging.warning(f"Multicall3 indisponível em {multicall_address}, usando chamadas individuais: {e}")
+        return _call_individually(w3, calls, block_identifier)
+
+
+def aggregate(w3, calls, chunk_size=DEFAULT_CHUNK_SIZE, block_identifier="latest",
+              multicall_address=MULTICALL3_ADDRESS):
+    """Executa as chamadas em lotes de aggregate3, preservando a ordem; retorna lista de (sucesso, valor)"""
+    results = []
+    for start in range(0, len(calls), chunk_size):
+        chunk = calls[start:start + chunk_size]
+        results.extend(aggregate_chunk(w3, chunk, block_identifier, multicall_address))
+    return results
+
+
+async def _call_individually_async(aw3, calls, block_identifier):
+    """Fallback assíncrono sem Multicall3: eth_calls concorrentes, isolando falhas"""
+    async def call_one(call):
+        try:
+            raw = await aw3.eth.call({"to": call.target, "data": call.call_data}, block_identifier)
+            return _decode_entry(call, True, raw)
+        except RPCBudgetExceeded:
+            raise
+        except Exception as e:
+            logging.debug(f"Falha na chamada para {call.target}: {e}")
+            return (False, None)
+    return list(await asyncio.gather(*(call_one(call) for call in calls)))
+
+
+async def aggregate_chunk_async(aw3, calls, block_identifier="latest", multicall_address=MULTICALL3_ADDRESS):
+    """Versão assíncrona de aggregate_chunk para AsyncWeb3"""
+    if not calls:
+        return []
+    _count_subcalls(calls)
+    try:
+        raw = await aw3.eth.call(
+            {"to": Web3.to_checksum_address(multicall_address), "data": encode_aggregate3(calls)},
+            block_identifier
+        )
+        return decode_aggregate3(calls, raw)
+    except RPCBudgetExceeded:
+        raise
+    except Exception as e:
+        logging.warning(f"Multicall3 indisponível em {multicall_address}, usando chamadas individuais: {e}")
+        return await _call_individually_async(aw3, calls, block_identifier)
+
+
+async def aggregate_async(aw3, calls, chunk_size=DEFAULT_CHUNK_SIZE, block_identifier="latest",
+                          multicall_address=MULTICALL3_ADDRESS):
+    """Versão assíncrona de aggregate: os lotes são enviados concorrentemente"""
+    chunks = [calls[start:start + chunk_size] for start in range(0, len(calls), chunk_size)]
+    chunk_results = await asyncio.gather(*(
+        aggregate_chunk_async(aw3, chunk, block_identifier, multicall_address) for chunk in chunks
+    ))
+    return [result for chunk in chunk_results for result in chunk]
@@ -0,0 +1,243 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, has_request_context
+from utils.cache import TokenMetadataCache
+from utils.chain_head import BlockHeadTracker
+from utils.circuit_breaker import CircuitBreaker
+from utils.clients import ClientRegistry
+from utils.shared_cache import ChainReadCache, MemoryBackend
+from utils.singleflight import SingleFlight
+
+# Rede ativa fora do contexto da requisição (ex: tarefas de query() em outras threads)
+_current_network = ContextVar("network", default=None)
+
+# Chaves do JSON de redes -> chaves internas de CONTRACTS
+CONTRACT_KEYS = {
+    "mockUSDT": "MOCKUSDT",
+    "brzStable": "BRZSTABLE",
+    "liquidityManager": "MULTI_LIQUIDITY_MANAGER",
+    "stablecoinFactory": "STABLECOIN_FACTORY"
+}
+
+
+class Network:
+    """Rede EVM suportada: endpoints RPC, contratos e DEX, com clientes, bloco e cache próprios.
+
+    `cache_backend` (ver utils/shared_cache.py) é compartilhado entre as redes,
+    com chaves prefixadas pelo chainId, assim como `budget` (utils/rpc_budget.py):
+    redes que usam os mesmos endpoints RPC dividem o mesmo limite de chamadas.
+    `archive` é o cache permanente das leituras em blocos com mais de
+    `finality_depth` confirmações (consultas com ?block=).
+    """
+
+    def __init__(self, config, chain_id, name, rpc_urls, contracts, explorer=None, native_currency=None,
+                 dex=None, multicall_address=None, is_active=True, cache_backend=None, budget=None,
+                 archive=None, finality_depth=None):
+        self.chain_id = chain_id
+        self.name = name
+        self.contracts = contracts
+        self.explorer = explorer
+        self.native_currency = native_currency
+        self.dex = dex
+        self.multicall_address = multicall_address or config.MULTICALL3_ADDRESS
+        self.is_active = is_active
+        self.clients = ClientRegistry(
+            config, rpc_urls=rpc_urls, budget=budget, breaker=CircuitBreaker.from_config(config, name=str(chain_id)),
+            chain_id=chain_id
+        )
+        # Leituras idênticas simultâneas nesta rede (bloco atual, eth_calls) são feitas uma única vez
+        self.flight = SingleFlight(timeout=config.SINGLEFLIGHT_TIMEOUT)
+        self.head_tracker = BlockHeadTracker(
+            self.clients.w3, interval=config.BLOCK_POLL_INTERVAL, chain_id=chain_id, flight=self.flight
+        )
+        self.cache_backend = cache_backend or MemoryBackend(maxsize=config.CACHE_MAXSIZE)
+        self.finality_depth = config.FINALITY_DEPTH if finality_depth is None else finality_depth
+        self.chain_reads = ChainReadCache(
+            self.cache_backend, chain_id, ttl=config.CHAIN_READ_TTL, flight=self.flight, archive=archive
+        )
+        # O LRU local já cobre os metadados; um segundo nível só faz sentido se for compartilhado
+        self.token_cache = TokenMetadataCache(
+            maxsize=config.TOKEN_CACHE_MAXSIZE,
+            supply_ttl=config.TOKEN_SUPPLY_TTL,
+            backend=self.cache_backend if self.cache_backend.shared else None,
+            namespace=f"{chain_id}:"
+        )
+
+    @property
+    def w3(self):
+        return self.clients.w3
+
+    def is_final(self, block_number, head=None):
+        """Bloco com mais de finality_depth confirmações (estado imutável); False se o bloco atual for desconhecido"""
+        try:
+            head = self.head_tracker.latest() if head is None else head
+        except Exception:
+            return False
+        return block_number <= head - self.finality_depth
+
+    def is_connected(self):
+        """Bloco lido recentemente e circuito do RPC fechado (ou testando a reconexão)"""
+        return self.head_tracker.is_fresh() and not self.clients.breaker.is_open()
+
+    def describe(self):
+        return {
+            "chainId": self.chain_id,
+            "name": self.name,
+            "rpcUrl": self.w3.provider.endpoint_uri,
+            "explorer": self.explorer,
+            "nativeCurrency": self.native_currency,
+            "isActive": self.is_active,
+            "dex": self.dex
+        }
+
+
+class NetworkRegistry:
+    """Redes por chainId; a rede de cada requisição vem de /api/<chainId>/... ou ?chainId="""
+
+    def __init__(self, default):
+        self.default = default
+        self._networks = {default.chain_id: default}
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        self.max_workers = 8
+
+    @classmethod
+    def from_config(cls, config, default_network):
+        """Rede padrão (variáveis de ambiente) mais as redes de NETWORKS_FILE, se houver"""
+        registry = cls(default_network)
+        registry.max_workers = config.NETWORK_MAX_WORKERS
+        if not config.NETWORKS_FILE:
+            return registry
+        try:
+            with open(config.NETWORKS_FILE) as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Erro ao carregar redes de {config.NETWORKS_FILE}: {e}")
+            return registry
+        for entry in entries:
+            try:
+                registry.add(network_from_entry(config, entry, default_network))
+            except (KeyError, TypeError, ValueError) as e:
+                logging.error(f"Rede inválida em {config.NETWORKS_FILE}: {entry!r}: {e}")
+        return registry
+
+    def add(self, network):
+        if network.chain_id == self.default.chain_id:
+            # Entrada do arquivo para a rede padrão: substituí-la mantendo o mesmo dicionário de contratos
+            self.default.contracts.update(network.contracts)
+            network.contracts = self.default.contracts
+            self.default = network
+        self._networks[network.chain_id] = network
+
+    def get(self, chain_id):
+        try:
+            return self._networks.get(int(chain_id))
+        except (TypeError, ValueError):
+            return None
+
+    def __iter__(self):
+        return iter(list(self._networks.values()))
+
+    def __len__(self):
+        return len(self._networks)
+
+    def active(self):
+        return [network for network in self if network.is_active]
+
+    def current(self):
+        """Rede da requisição atual (ou da tarefa em execução em query()); a padrão se nenhuma"""
+        network = _current_network.get()
+        if network is None and has_request_context():
+            network = g.get("network")
+        return network or self.default
+
+    @contextmanager
+    def use(self, network):
+        token = _current_network.set(network)
+        try:
+            yield network
+        finally:
+            _current_network.reset(token)
+
+    def head_trackers(self):
+        return {network.chain_id: network.head_tracker for network in self}
+
+    @property
+    def executor(self):
+        # Executor próprio: as tarefas por rede usam o fan-out compartilhado internamente
+        with self._executor_lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="networks")
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def query(self, fn, networks=None, timeout=None):
+        """Executa fn(rede) em todas as redes ao mesmo tempo, com prazo por rede.
+
+        O tempo total é o da rede mais lenta (limitado a `timeout`), não a soma.
+        Retorna [(rede, resultado, erro, duração em ms)] na ordem das redes; em
+        caso de falha ou prazo excedido, resultado é None e erro descreve a causa.
+        """
+        networks = self.active() if networks is None else networks
+
+        def run(network):
+            started = time.perf_counter()
+            with self.use(network):
+                result = fn(network)
+            return result, (time.perf_counter() - started) * 1000
+
+        started = time.monotonic()
+        futures = [
+            (network, self.executor.submit(contextvars.copy_context().run, run, network))
+            for network in networks
+        ]
+        results = []
+        for network, future in futures:
+            remaining = None if timeout is None else max(0, started + timeout - time.monotonic())
+            try:
+                result, elapsed = future.result(timeout=remaining)
+                results.append((network, result, None, round(elapsed, 2)))
+            except FutureTimeout:
+                future.cancel()
+                logging.warning(f"Rede {network.chain_id} não respondeu em {timeout}s")
+                results.append((network, None, f"Prazo de {timeout}s excedido", round(timeout * 1000, 2)))
+            except Exception as e:
+                logging.error(f"Erro na rede {network.chain_id}: {e}")
+                results.append((network, None, str(e), round((time.monotonic() - started) * 1000, 2)))
+        return results
+
+
+def network_from_entry(config, entry, default_network):
+    """Cria uma Network a partir de uma entrada do arquivo de redes (formato de networks.example.json)"""
+    chain_id = int(entry["chainId"])
+    rpc_urls = entry.get("rpcUrls") or ([entry["rpcUrl"]] if entry.get("rpcUrl") else None)
+    if chain_id == default_network.chain_id:
+        rpc_urls = rpc_urls or default_network.clients.rpc_urls
+    if not rpc_urls:
+        raise ValueError("rpcUrls obrigatório")
+    zero = "0x0000000000000000000000000000000000000000"
+    contracts = {key: zero for key in CONTRACT_KEYS.values()}
+    if chain_id == default_network.chain_id:
+        contracts.update(default_network.contracts)
+    for name, address in (entry.get("contracts") or {}).items():
+        contracts[CONTRACT_KEYS[name]] = address
+    return Network(
+        config, chain_id, entry.get("name") or f"Chain {chain_id}", rpc_urls, contracts,
+        explorer=entry.get("explorer"),
+        native_currency=entry.get("nativeCurrency"),
+        dex=entry.get("dex"),
+        multicall_address=entry.get("multicall3"),
+        is_active=entry.get("isActive", True),
+        cache_backend=default_network.cache_backend,
+        budget=default_network.clients.budget,
+        archive=default_network.chain_reads.archive,
+        finality_depth=entry.get("finalityDepth")
+    )
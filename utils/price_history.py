@@ -0,0 +1,269 @@
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import logging
+from utils.rpc_budget import set_priority
+
+HEADER = struct.Struct("<QQ")  # total de registros já escritos, capacidade
+RAW_RECORD = struct.Struct("<qdd")  # bloco, timestamp, preço
+OHLC_RECORD = struct.Struct("<ddddd")  # início do bucket, open, high, low, close
+
+RESOLUTIONS = {"1m": 60, "1h": 3600}
+
+
+class RingBuffer:
+    """Buffer circular de registros de tamanho fixo sobre um bytearray ou um arquivo mapeado em memória.
+
+    Um arquivo existente com outro tamanho (raw_capacity ou bucket_capacity
+    alterados) é recriado vazio: o histórico gravado nele é descartado.
+    """
+
+    def __init__(self, record, capacity, path=None):
+        self.record = record
+        size = HEADER.size + record.size * capacity
+        if path is None:
+            self._buffer = bytearray(size)
+            HEADER.pack_into(self._buffer, 0, 0, capacity)
+        else:
+            new_file = not os.path.exists(path) or os.path.getsize(path) != size
+            if new_file and os.path.exists(path):
+                logging.warning(
+                    f"Capacidade de {path} mudou ({os.path.getsize(path)} bytes, esperado {size}); histórico descartado"
+                )
+            if new_file:
+                with open(path, "wb") as f:
+                    f.truncate(size)
+            with open(path, "r+b") as f:
+                self._buffer = mmap.mmap(f.fileno(), size)
+            if new_file:
+                HEADER.pack_into(self._buffer, 0, 0, capacity)
+        self.capacity = HEADER.unpack_from(self._buffer, 0)[1]
+
+    @property
+    def written(self):
+        return HEADER.unpack_from(self._buffer, 0)[0]
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+    def _offset(self, absolute_index):
+        return HEADER.size + (absolute_index % self.capacity) * self.record.size
+
+    def append(self, *values):
+        written = self.written
+        self.record.pack_into(self._buffer, self._offset(written), *values)
+        HEADER.pack_into(self._buffer, 0, written + 1, self.capacity)
+
+    def last(self):
+        written = self.written
+        if written == 0:
+            return None
+        return self.record.unpack_from(self._buffer, self._offset(written - 1))
+
+    def replace_last(self, *values):
+        self.record.pack_into(self._buffer, self._offset(self.written - 1), *values)
+
+    def __iter__(self):
+        written = self.written
+        for index in range(max(0, written - self.capacity), written):
+            yield self.record.unpack_from(self._buffer, self._offset(index))
+
+
+class PoolPriceSeries:
+    """Amostras brutas de preço de um pool e agregados OHLC de 1 minuto e 1 hora"""
+
+    def __init__(self, raw_capacity, bucket_capacity, directory=None, pool_id=None):
+        def path(suffix):
+            return os.path.join(directory, f"{pool_id}.{suffix}.ring") if directory else None
+        self.raw = RingBuffer(RAW_RECORD, raw_capacity, path("raw"))
+        self.buckets = {
+            name: RingBuffer(OHLC_RECORD, bucket_capacity, path(name)) for name in RESOLUTIONS
+        }
+
+    def record(self, block_number, timestamp, price):
+        self.raw.append(block_number, timestamp, price)
+        for name, seconds in RESOLUTIONS.items():
+            ring = self.buckets[name]
+            start = timestamp - timestamp % seconds
+            last = ring.last()
+            if last is not None and last[0] == start:
+                _, open_, high, low, _ = last
+                ring.replace_last(start, open_, max(high, price), min(low, price), price)
+            else:
+                ring.append(start, price, price, price, price)
+
+    def points(self, start, end, resolution):
+        """Série OHLC no intervalo [start, end]; na resolução raw cada amostra vira um ponto"""
+        if resolution == "raw":
+            return [
+                {"time": ts, "block": block, "open": price, "high": price, "low": price, "close": price}
+                for block, ts, price in self.raw if start <= ts <= end
+            ]
+        return [
+            {"time": bucket, "open": open_, "high": high, "low": low, "close": close}
+            for bucket, open_, high, low, close in self.buckets[resolution] if start <= bucket <= end
+        ]
+
+    def latest(self):
+        return self.raw.last()
+
+
+class PriceHistory:
+    """Armazém de séries de preço por pool, em memória ou persistido em arquivos mapeados (PRICE_HISTORY_DIR)"""
+
+    def __init__(self, directory=None, raw_capacity=4096, bucket_capacity=10080):
+        self.directory = directory
+        self.raw_capacity = raw_capacity
+        self.bucket_capacity = bucket_capacity
+        self.pools = {}
+        self._series = {}
+        self._pools_mtime = None
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _index_path(self):
+        return os.path.join(self.directory, "pools.json")
+
+    def set_pools(self, pools):
+        """Registra os tokens de cada pool ({poolId: (tokenA, tokenB)})"""
+        with self._lock:
+            self.pools = dict(pools)
+            if self.directory:
+                tmp_path = self._index_path() + ".tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(self.pools, f)
+                os.replace(tmp_path, self._index_path())
+
+    def _reload_pools(self):
+        # Workers que não amostram enxergam os pools gravados pelo worker que amostra
+        if not self.directory or not os.path.exists(self._index_path()):
+            return
+        mtime = os.path.getmtime(self._index_path())
+        if mtime != self._pools_mtime:
+            with open(self._index_path()) as f:
+                self.pools = {pool_id: tuple(tokens) for pool_id, tokens in json.load(f).items()}
+            self._pools_mtime = mtime
+
+    def series(self, pool_id, create=False):
+        with self._lock:
+            series = self._series.get(pool_id)
+            if series is None:
+                exists = self.directory and os.path.exists(os.path.join(self.directory, f"{pool_id}.raw.ring"))
+                if not create and not exists:
+                    return None
+                series = PoolPriceSeries(self.raw_capacity, self.bucket_capacity, self.directory, pool_id)
+                self._series[pool_id] = series
+            return series
+
+    def record(self, pool_id, block_number, timestamp, price):
+        self.series(pool_id, create=True).record(block_number, timestamp, price)
+
+    def pools_for_token(self, token_address):
+        """Pools que contêm o token; retorna [(poolId, tokenCotação, invertido)]"""
+        self._reload_pools()
+        token_address = token_address.lower()
+        matches = []
+        for pool_id, (token_a, token_b) in self.pools.items():
+            if token_a.lower() == token_address:
+                matches.append((pool_id, token_b, False))
+            elif token_b.lower() == token_address:
+                matches.append((pool_id, token_a, True))
+        return matches
+
+
+def invert_point(point):
+    """Converte um ponto OHLC de preço do token A para preço do token B"""
+    inverted = dict(point)
+    inverted.update({
+        "open": 1 / point["open"] if point["open"] else 0.0,
+        "high": 1 / point["low"] if point["low"] else 0.0,
+        "low": 1 / point["high"] if point["high"] else 0.0,
+        "close": 1 / point["close"] if point["close"] else 0.0
+    })
+    return inverted
+
+
+class PriceSampler:
+    """Registra getTokenPrice de todos os pools a cada novo bloco.
+
+    `list_pools()` deve retornar {poolId hex: (tokenA, tokenB)} e
+    `read_prices(pool_ids)` a lista de preços (float ou None) na mesma ordem.
+    Com persistência em disco, apenas um worker por host amostra (flock).
+    """
+
+    def __init__(self, history, head_tracker, list_pools, read_prices, interval=3.0, pools_refresh_blocks=100):
+        self.history = history
+        self.head_tracker = head_tracker
+        self.list_pools = list_pools
+        self.read_prices = read_prices
+        self.interval = interval
+        self.pools_refresh_blocks = pools_refresh_blocks
+        self.last_block = None
+        self.last_error = None
+        self._pools_block = None
+        self._thread = None
+        self._pid = None
+        self._lock_file = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._lock_file = None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="price-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _is_writer(self):
+        if not self.history.directory or self._lock_file is not None:
+            return True
+        lock_file = open(os.path.join(self.history.directory, "sampler.lock"), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _run(self):
+        # Amostras de preço alimentam o monitoramento do peg e a arbitragem
+        set_priority("critical")
+        while not self._stop.is_set():
+            try:
+                if self._is_writer():
+                    self.sample_once()
+                    self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logging.error(f"Erro no amostrador de preços: {e}")
+            self._stop.wait(self.interval)
+
+    def sample_once(self):
+        block_number = self.head_tracker.latest()
+        if block_number == self.last_block:
+            return
+        if self._pools_block is None or block_number - self._pools_block >= self.pools_refresh_blocks:
+            self.history.set_pools(self.list_pools())
+            self._pools_block = block_number
+
+        pool_ids = list(self.history.pools)
+        if not pool_ids:
+            self.last_block = block_number
+            return
+        timestamp = time.time()
+        for pool_id, price in zip(pool_ids, self.read_prices(pool_ids)):
+            if price is not None:
+                self.history.record(pool_id, block_number, timestamp, price)
+        self.last_block = block_number
@@ -0,0 +1,87 @@
+from hexbytes import HexBytes
+from web3 import Web3
+
+
+class BatchResult:
+    """Resultado de uma chamada enfileirada em um RPCBatch, disponível após execute()"""
+
+    __slots__ = ("method", "_value", "_error", "_done")
+
+    def __init__(self, method):
+        self.method = method
+        self._value = None
+        self._error = None
+        self._done = False
+
+    def result(self):
+        if not self._done:
+            raise RuntimeError(f"Lote ainda não executado ({self.method})")
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+def _hex_to_int(value):
+    return int(value, 16)
+
+
+def _block_param(block_identifier):
+    if isinstance(block_identifier, int):
+        return hex(block_identifier)
+    return block_identifier
+
+
+class RPCBatch:
+    """Coleta chamadas JSON-RPC heterogêneas e as envia em um único POST (array JSON-RPC 2.0).
+
+    Usa make_batch_request do provider quando disponível (PooledHTTPProvider),
+    que divide lotes grandes e associa as respostas pelo id; caso contrário
+    envia as chamadas uma a uma. Erros são isolados por chamada.
+    """
+
+    def __init__(self, w3):
+        self.provider = w3.provider
+        self._pending = []
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, method, params, formatter=None):
+        result = BatchResult(method)
+        self._pending.append((method, params, formatter, result))
+        return result
+
+    def block_number(self):
+        return self.add("eth_blockNumber", [], _hex_to_int)
+
+    def chain_id(self):
+        return self.add("eth_chainId", [], _hex_to_int)
+
+    def get_balance(self, address, block_identifier="latest"):
+        return self.add("eth_getBalance", [Web3.to_checksum_address(address), _block_param(block_identifier)], _hex_to_int)
+
+    def eth_call(self, to, data, block_identifier="latest"):
+        # Web3.to_hex sempre devolve o prefixo 0x (HexBytes.hex() deixou de incluí-lo no hexbytes 1.0)
+        transaction = {"to": Web3.to_checksum_address(to), "data": Web3.to_hex(HexBytes(data))}
+        return self.add("eth_call", [transaction, _block_param(block_identifier)], HexBytes)
+
+    def execute(self):
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        calls = [(method, params) for method, params, _, _ in pending]
+        if hasattr(self.provider, "make_batch_request"):
+            responses = self.provider.make_batch_request(calls)
+        else:
+            responses = [self.provider.make_request(method, params) for method, params in calls]
+
+        for (method, _, formatter, result), response in zip(pending, responses):
+            result._done = True
+            if "error" in response:
+                result._error = ValueError(response["error"])
+                continue
+            try:
+                value = response["result"]
+                result._value = formatter(value) if formatter is not None else value
+            except Exception as e:
+                result._error = e
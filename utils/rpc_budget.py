@@ -0,0 +1,332 @@
+import asyncio
+import json
+import math
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, has_request_context, jsonify
+from utils.metrics import record_budget
+
+# Classes de prioridade, da mais para a menos importante
+PRIORITIES = ("critical", "interactive", "bulk")
+DEFAULT_PRIORITY = "interactive"
+
+# Fração da capacidade do bucket que cada classe deixa livre para as classes acima
+DEFAULT_RESERVE = {"critical": 0.0, "interactive": 0.1, "bulk": 0.3}
+
+# Prioridade fora do contexto da requisição (ex: threads de background)
+_current_priority = ContextVar("rpc_priority", default=None)
+
+
+class RPCBudgetExceeded(Exception):
+    """Sem orçamento de chamadas ao RPC dentro do prazo; a requisição deve ser recusada com 503"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def current_priority():
+    """Prioridade das chamadas atuais: a do contexto, a da requisição (g.rpc_priority) ou a padrão"""
+    priority = _current_priority.get()
+    if priority is None and has_request_context():
+        priority = g.get("rpc_priority")
+    return priority or DEFAULT_PRIORITY
+
+
+def _check(priority):
+    if priority not in PRIORITIES:
+        raise ValueError(f"Prioridade desconhecida: {priority}")
+    return priority
+
+
+def set_priority(priority):
+    """Define a prioridade do contexto atual (ex: no início de uma thread de background)"""
+    return _current_priority.set(_check(priority))
+
+
+@contextmanager
+def rpc_priority(priority):
+    """Executa o bloco com a prioridade informada"""
+    token = _current_priority.set(_check(priority))
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class TokenBucket:
+    """Token bucket de um endpoint: `rate` chamadas/s com rajadas de até `burst`.
+
+    Um 429 esvazia o bucket e pausa o endpoint pelo Retry-After informado ou,
+    sem ele, por um backoff exponencial que volta ao início após um sucesso.
+    """
+
+    def __init__(self, url, rate, burst, backoff_base=1.0, backoff_max=60.0):
+        self.url = url
+        self.rate = rate
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.throttles = 0
+        self.consecutive_throttles = 0
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, cost, reserve, now, queued=0.0):
+        """Segundos até haver `cost` tokens acima da reserva, depois de atendidas
+        as `queued` chamadas na frente da fila (0 = disponível agora)"""
+        self._refill(now)
+        paused = max(0.0, self.paused_until - now)
+        missing = queued + cost + reserve * self.capacity - self.tokens
+        if missing <= 0:
+            return paused
+        if self.rate <= 0:
+            return math.inf
+        return max(paused, missing / self.rate)
+
+    def take(self, cost):
+        self.tokens -= cost
+
+    def throttle(self, retry_after=None):
+        self.throttles += 1
+        self.consecutive_throttles += 1
+        delay = retry_after
+        if delay is None:
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (self.consecutive_throttles - 1))
+        now = time.monotonic()
+        self.tokens = 0.0
+        self.updated = now
+        self.paused_until = max(self.paused_until, now + delay)
+        return delay
+
+    def recover(self):
+        self.consecutive_throttles = 0
+
+    def stats(self):
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            "rate": self.rate,
+            "burst": self.capacity,
+            "tokens": round(self.tokens, 2),
+            "pausedForSeconds": round(max(0.0, self.paused_until - now), 2),
+            "throttled": self.throttles
+        }
+
+
+class RPCBudget:
+    """Orçamento de chamadas por endpoint RPC, com fila por prioridade e descarte por prazo.
+
+    acquire() escolhe, na ordem de preferência, o primeiro endpoint com tokens
+    acima da reserva da classe de prioridade. Se nenhum tiver, a chamada
+    espera na fila (classes mais altas passam à frente) até `max_wait`
+    segundos; se a espera estimada, contando as chamadas já na fila à sua
+    frente, passar disso, é recusada na hora com RPCBudgetExceeded, cujo
+    retry_after vira o Retry-After do 503.
+    """
+
+    def __init__(self, rate=25.0, burst=50, overrides=None, max_wait=2.0, reserve=None,
+                 backoff_base=1.0, backoff_max=60.0):
+        self.rate = rate
+        self.burst = burst
+        self.overrides = overrides or {}
+        self.max_wait = max_wait
+        self.reserve = dict(DEFAULT_RESERVE, **(reserve or {}))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.enabled = rate > 0 or bool(self.overrides)
+        self._buckets = {}
+        self._waiting = {priority: 0 for priority in PRIORITIES}
+        # Chamadas (custo) esperando na fila, por prioridade
+        self._demand = {priority: 0.0 for priority in PRIORITIES}
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_config(cls, config):
+        overrides = {}
+        if config.RPC_RATE_LIMITS:
+            try:
+                overrides = json.loads(config.RPC_RATE_LIMITS)
+            except ValueError as e:
+                logging.error(f"RPC_RATE_LIMITS inválido, usando o limite padrão: {e}")
+        return cls(
+            rate=config.RPC_RATE_LIMIT,
+            burst=config.RPC_RATE_BURST,
+            overrides=overrides,
+            max_wait=config.RPC_BUDGET_MAX_WAIT,
+            backoff_base=config.RPC_BACKOFF_BASE,
+            backoff_max=config.RPC_BACKOFF_MAX
+        )
+
+    def bucket(self, url):
+        """Bucket do endpoint (compartilhado pelos providers síncrono e assíncrono da mesma URL)"""
+        with self._condition:
+            bucket = self._buckets.get(url)
+            if bucket is None:
+                limit = self.overrides.get(url) or {}
+                bucket = TokenBucket(
+                    url,
+                    float(limit.get("rate", self.rate)),
+                    float(limit.get("burst", self.burst)),
+                    self.backoff_base,
+                    self.backoff_max
+                )
+                self._buckets[url] = bucket
+            return bucket
+
+    def _admit(self, buckets, cost, priority, now, queued=False):
+        """Retorna (bucket escolhido, None) ou (None, espera estimada)"""
+        reserve = self.reserve[priority]
+        # Classes mais altas esperando na fila têm a vez; a própria classe entra na estimativa de espera
+        rank = PRIORITIES.index(priority)
+        higher = any(self._waiting[p] for p in PRIORITIES[:rank])
+        ahead = sum(self._demand[p] for p in PRIORITIES[:rank + 1]) - (cost if queued else 0)
+        best_wait = math.inf
+        for bucket in buckets:
+            if bucket.rate <= 0:
+                # Endpoint sem limite configurado
+                return bucket, None
+            # Lotes maiores que a rajada entram com o bucket cheio e deixam o saldo negativo
+            cost_here = min(cost, bucket.capacity)
+            if not higher and bucket.wait_time(cost_here, reserve, now) == 0:
+                bucket.take(cost)
+                return bucket, None
+            best_wait = min(best_wait, bucket.wait_time(cost_here, reserve, now, max(0.0, ahead)))
+        return None, best_wait
+
+    def acquire(self, urls, cost=1, priority=None, max_wait=None):
+        """Reserva `cost` chamadas no primeiro endpoint disponível de `urls`; retorna a URL escolhida"""
+        if not self.enabled:
+            return urls[0]
+        priority = priority or current_priority()
+        max_wait = self.max_wait if max_wait is None else max_wait
+        buckets = [self.bucket(url) for url in urls]
+        deadline = time.monotonic() + max_wait
+        queued = False
+        with self._condition:
+            try:
+                while True:
+                    now = time.monotonic()
+                    bucket, wait = self._admit(buckets, cost, priority, now, queued)
+                    if bucket is not None:
+                        record_budget(priority, "queued" if queued else "admitted")
+                        return bucket.url
+                    if now + wait > deadline:
+                        raise self._shed(priority, wait)
+                    if not queued:
+                        queued = True
+                        self._enqueue(priority, cost)
+                    # Acorda ao reabastecer ou quando outra chamada sair da fila
+                    self._condition.wait(min(max(wait, 0.001), deadline - now))
+            finally:
+                if queued:
+                    self._dequeue(priority, cost)
+
+    async def acquire_async(self, urls, cost=1, priority=None, max_wait=None):
+        """Versão de acquire() que espera sem bloquear o event loop"""
+        if not self.enabled:
+            return urls[0]
+        priority = priority or current_priority()
+        max_wait = self.max_wait if max_wait is None else max_wait
+        buckets = [self.bucket(url) for url in urls]
+        deadline = time.monotonic() + max_wait
+        queued = False
+        try:
+            while True:
+                with self._condition:
+                    now = time.monotonic()
+                    bucket, wait = self._admit(buckets, cost, priority, now, queued)
+                    if bucket is not None:
+                        record_budget(priority, "queued" if queued else "admitted")
+                        return bucket.url
+                    if now + wait > deadline:
+                        raise self._shed(priority, wait)
+                    if not queued:
+                        queued = True
+                        self._enqueue(priority, cost)
+                await asyncio.sleep(min(max(wait, 0.001), deadline - now))
+        finally:
+            if queued:
+                with self._condition:
+                    self._dequeue(priority, cost)
+
+    def _enqueue(self, priority, cost):
+        self._waiting[priority] += 1
+        self._demand[priority] += cost
+
+    def _dequeue(self, priority, cost):
+        self._waiting[priority] -= 1
+        self._demand[priority] -= cost
+        self._condition.notify_all()
+
+    def try_acquire(self, url, cost=1, priority=None):
+        """Reserva sem esperar (ex: a segunda requisição de um hedge); False se não houver orçamento"""
+        if not self.enabled:
+            return True
+        priority = priority or current_priority()
+        with self._condition:
+            bucket, _ = self._admit([self.bucket(url)], cost, priority, time.monotonic())
+            return bucket is not None
+
+    def _shed(self, priority, wait):
+        record_budget(priority, "shed")
+        retry_after = max(1, math.ceil(wait)) if wait != math.inf else 60
+        if has_request_context():
+            g.rpc_retry_after = max(g.get("rpc_retry_after") or 0, retry_after)
+        return RPCBudgetExceeded(f"Orçamento de chamadas RPC esgotado (prioridade {priority})", retry_after)
+
+    def throttle(self, url, retry_after=None):
+        """Registra um 429 do endpoint"""
+        with self._condition:
+            delay = self.bucket(url).throttle(retry_after)
+        logging.warning(f"RPC {url} limitou as chamadas (429); pausando por {delay:.1f}s")
+
+    def recover(self, url):
+        bucket = self._buckets.get(url)
+        if bucket is not None and bucket.consecutive_throttles:
+            with self._condition:
+                bucket.recover()
+
+    def stats(self):
+        with self._condition:
+            return {
+                "enabled": self.enabled,
+                "maxWaitSeconds": self.max_wait,
+                "waiting": dict(self._waiting),
+                "endpoints": {url: bucket.stats() for url, bucket in self._buckets.items()}
+            }
+
+
+def parse_retry_after(value):
+    """Segundos do cabeçalho Retry-After (apenas o formato numérico; datas HTTP são ignoradas)"""
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def overload_response(response):
+    """Troca a resposta de erro de uma requisição recusada pelo orçamento por 503 com Retry-After"""
+    retry_after = g.get("rpc_retry_after") if has_request_context() else None
+    if not retry_after or response.status_code < 500 or response.is_streamed:
+        return response
+    if response.status_code == 503 and "Retry-After" in response.headers:
+        return response
+    overloaded = jsonify({
+        "status": "error",
+        "message": f"Limite de chamadas ao RPC atingido; tente novamente em {retry_after}s",
+        "retryAfter": retry_after
+    })
+    overloaded.status_code = 503
+    overloaded.headers["Retry-After"] = str(retry_after)
+    overloaded.cache_control.no_store = True
+    return overloaded
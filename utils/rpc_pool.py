@@ -0,0 +1,444 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+from aiohttp import ClientError, ClientResponseError, ClientTimeout
+from requests.adapters import HTTPAdapter
+from web3._utils.request import async_get_response_from_post_request
+from web3.providers.async_base import AsyncJSONBaseProvider
+from web3.providers.base import JSONBaseProvider
+from utils.metrics import RPC_CALLS, rpc_function_label, track_rpc
+from utils.rpc_budget import parse_retry_after
+from utils.tracing import trace_rpc
+
+# Respostas HTTP e códigos JSON-RPC que justificam tentar outro endpoint
+RETRYABLE_HTTP_STATUS = {429, 500, 502, 503, 504}
+RETRYABLE_RPC_CODES = {-32005}
+
+# Métodos que não devem ser duplicados por requisições "hedged"
+NON_HEDGEABLE_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction"}
+
+# Classe do orçamento cobrada pela segunda requisição de um hedge: nunca tira tokens das leituras normais
+HEDGE_PRIORITY = "bulk"
+
+# Métodos cuja resposta não muda durante a vida do processo. O middleware de
+# validação do web3 consulta eth_chainId antes de cada eth_call.
+MEMOIZED_METHODS = {"eth_chainId"}
+
+
+class RetryableRPCError(Exception):
+    """Falha transitória de um endpoint; a chamada pode ser repetida em outro"""
+
+
+class HedgeExhaustedError(RetryableRPCError):
+    """Os dois endpoints de uma chamada hedged falharam"""
+
+
+class RPCEndpoint:
+    """Endpoint JSON-RPC com sessão keep-alive e estatísticas EWMA de latência e erro.
+
+    Com `budget` (utils/rpc_budget.py), respostas 429 pausam o token bucket do
+    endpoint pelo Retry-After recebido.
+    """
+
+    def __init__(self, url, timeout=10, alpha=0.2, pool_size=32, budget=None):
+        self.url = url
+        self.budget = budget
+        self.timeout = timeout
+        self.alpha = alpha
+        self.latency = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.cooldown_until = 0.0
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._session = None
+        self._session_pid = None
+
+    @property
+    def session(self):
+        """Sessão HTTP do processo atual, aberta no primeiro uso e recriada após fork (gunicorn --preload)"""
+        if self._session is None or self._session_pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._session_pid != os.getpid():
+                    self._session = self._new_session(self.pool_size)
+                    self._session_pid = os.getpid()
+        return self._session
+
+    @staticmethod
+    def _new_session(pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"Content-Type": "application/json"})
+        return session
+
+    def record_success(self, latency):
+        with self._lock:
+            self.requests += 1
+            self.latency = latency if self.latency is None else self.alpha * latency + (1 - self.alpha) * self.latency
+            self.error_rate = (1 - self.alpha) * self.error_rate
+
+    def record_failure(self):
+        with self._lock:
+            self.requests += 1
+            self.failures += 1
+            self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+            # Afastar temporariamente o endpoint, por mais tempo quanto pior a taxa de erro
+            self.cooldown_until = time.monotonic() + min(30.0, 1.0 + 30.0 * self.error_rate ** 2)
+
+    def score(self):
+        """Custo estimado de uma chamada (menor é melhor); endpoints não medidos são explorados primeiro"""
+        # Em cooldown, mesmo sem nenhuma resposta medida (ex: fora do ar desde o início)
+        penalty = 10.0 if time.monotonic() < self.cooldown_until else 0.0
+        if self.latency is None:
+            return penalty
+        return self.latency * (1 + 4 * self.error_rate) + penalty
+
+    def post(self, payload):
+        """Envia o payload JSON-RPC e retorna o corpo da resposta; falhas transitórias viram RetryableRPCError"""
+        started = time.perf_counter()
+        try:
+            response = self.session.post(self.url, data=payload, timeout=self.timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            self.record_failure()
+            raise RetryableRPCError(f"{self.url}: {e}") from e
+
+        if response.status_code in RETRYABLE_HTTP_STATUS:
+            raise self._http_failure(response.status_code, response.headers.get("Retry-After"))
+        response.raise_for_status()
+        return self._accept(response.content, started)
+
+    async def post_async(self, payload):
+        """Versão de post() para corrotinas (aiohttp, com a sessão por thread e event loop mantida pelo web3)"""
+        started = time.perf_counter()
+        try:
+            response = await async_get_response_from_post_request(
+                self.url, data=payload, headers={"Content-Type": "application/json"},
+                timeout=ClientTimeout(total=self.timeout)
+            )
+            body = await response.read()
+        except ClientResponseError as e:
+            # A sessão do web3 levanta o erro para qualquer status >= 400
+            if e.status in RETRYABLE_HTTP_STATUS:
+                raise self._http_failure(e.status, (e.headers or {}).get("Retry-After")) from e
+            raise
+        except (ClientError, asyncio.TimeoutError) as e:
+            self.record_failure()
+            raise RetryableRPCError(f"{self.url}: {e!r}") from e
+        return self._accept(body, started)
+
+    def _http_failure(self, status, retry_after):
+        self.record_failure()
+        if status == 429 and self.budget is not None:
+            self.budget.throttle(self.url, parse_retry_after(retry_after))
+        return RetryableRPCError(f"{self.url}: HTTP {status}")
+
+    def _accept(self, body, started):
+        """Corpo de uma resposta HTTP 2xx; erros JSON-RPC transitórios (ex: limite do nó) contam como falha"""
+        error = _rpc_error_code(body)
+        if error in RETRYABLE_RPC_CODES:
+            self.record_failure()
+            raise RetryableRPCError(f"{self.url}: erro JSON-RPC {error}")
+        self.record_success(time.perf_counter() - started)
+        if self.budget is not None:
+            self.budget.recover(self.url)
+        return body
+
+    def stats(self):
+        return {
+            "url": self.url,
+            "latencyMs": round(self.latency * 1000, 2) if self.latency is not None else None,
+            "errorRate": round(self.error_rate, 4),
+            "requests": self.requests,
+            "failures": self.failures,
+            "coolingDown": time.monotonic() < self.cooldown_until
+        }
+
+
+def _rpc_error_code(body):
+    # Evita decodificar todo o JSON: só respostas pequenas de erro precisam ser inspecionadas
+    if b'"error"' not in body[:256]:
+        return None
+    try:
+        data = json.loads(body)
+        if isinstance(data, dict) and isinstance(data.get("error"), dict):
+            return data["error"].get("code")
+    except ValueError:
+        pass
+    return None
+
+
+class PooledHTTPProvider(JSONBaseProvider):
+    """Provider web3 sobre vários endpoints HTTP, com roteamento por latência, failover e hedging.
+
+    Cada chamada vai ao endpoint de menor custo estimado (EWMA de latência
+    ponderada pela taxa de erro). Falhas transitórias são repetidas nos
+    próximos endpoints. Com `hedge` (desativado por padrão), se a resposta do
+    primeiro demorar mais que o atraso de hedge, a mesma chamada é disparada
+    no segundo e vale a primeira resposta.
+
+    Com `budget`, cada envio consome tokens do endpoint escolhido; sem tokens
+    dentro do prazo a chamada falha com RPCBudgetExceeded. O hedge é uma
+    chamada extra: só é disparado se o segundo endpoint tiver orçamento livre
+    na classe de menor prioridade (HEDGE_PRIORITY).
+
+    Com `breaker` (utils/circuit_breaker.py), envios que falharam em todos os
+    endpoints contam para abrir o circuito, e com ele aberto os envios falham
+    na hora com CircuitOpenError. `chain` é o rótulo das métricas de RPC.
+    """
+
+    def __init__(self, endpoint_uris, request_timeout=10, max_attempts=3, hedge_delay=None, ewma_alpha=0.2,
+                 batch_max_size=100, budget=None, breaker=None, hedge=False, chain=""):
+        super().__init__()
+        if isinstance(endpoint_uris, str):
+            endpoint_uris = [endpoint_uris]
+        if not endpoint_uris:
+            raise ValueError("Nenhum endpoint RPC configurado")
+        self.budget = budget
+        self.breaker = breaker
+        self.chain = chain
+        self.endpoints = [RPCEndpoint(uri, request_timeout, ewma_alpha, budget=budget) for uri in endpoint_uris]
+        self.max_attempts = max_attempts
+        self.hedge = hedge
+        self.hedge_delay = hedge_delay
+        self.batch_max_size = batch_max_size
+        self._hedge_executor = None
+        self._hedge_executor_pid = None
+        self._executor_lock = threading.Lock()
+        self._memoized = {}
+
+    def __str__(self):
+        return f"PooledHTTPProvider({', '.join(e.url for e in self.endpoints)})"
+
+    @property
+    def endpoint_uri(self):
+        """URL do endpoint atualmente preferido"""
+        return self.ranked_endpoints()[0].url
+
+    def ranked_endpoints(self):
+        return sorted(self.endpoints, key=lambda endpoint: endpoint.score())
+
+    def _hedge_after(self, endpoint):
+        if self.hedge_delay is not None:
+            return self.hedge_delay
+        # Sem configuração explícita: aguardar ~3x a latência típica do endpoint
+        return max(0.05, 3 * endpoint.latency) if endpoint.latency is not None else 1.0
+
+    @property
+    def hedge_executor(self):
+        # Threads não sobrevivem ao fork: cada worker cria o seu executor
+        with self._executor_lock:
+            if self._hedge_executor is None or self._hedge_executor_pid != os.getpid():
+                self._hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="rpc-hedge")
+                self._hedge_executor_pid = os.getpid()
+            return self._hedge_executor
+
+    def _hedged_post(self, primary, secondary, payload, cost=1):
+        first = self.hedge_executor.submit(primary.post, payload)
+        done, _ = wait([first], timeout=self._hedge_after(primary))
+        if done:
+            return first.result()
+        if self.budget is not None and not self.budget.try_acquire(secondary.url, cost, priority=HEDGE_PRIORITY):
+            # Sem orçamento para duplicar a chamada: esperar a primeira
+            return first.result()
+
+        second = self.hedge_executor.submit(secondary.post, payload)
+        pending = {first, second}
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except RetryableRPCError as e:
+                    last_error = e
+        raise HedgeExhaustedError(str(last_error)) from last_error
+
+    def _next_endpoint(self, remaining, cost):
+        if self.budget is None:
+            return remaining.pop(0)
+        # O primeiro endpoint (na ordem de preferência) com orçamento; espera na fila se nenhum tiver
+        url = self.budget.acquire([endpoint.url for endpoint in remaining], cost)
+        index = next(i for i, endpoint in enumerate(remaining) if endpoint.url == url)
+        return remaining.pop(index)
+
+    def send(self, payload, hedge=False, cost=1):
+        """Envia um payload JSON-RPC já codificado, com failover entre endpoints.
+
+        `cost` é o número de chamadas descontadas do orçamento (o tamanho do lote).
+        """
+        if self.breaker is None:
+            return self._send(payload, hedge, cost)
+        self.breaker.before_call()
+        try:
+            body = self._send(payload, hedge, cost)
+        except RetryableRPCError:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return body
+
+    def _send(self, payload, hedge, cost):
+        remaining = self.ranked_endpoints()[:self.max_attempts]
+        last_error = None
+        while remaining:
+            endpoint = self._next_endpoint(remaining, cost)
+            try:
+                if hedge and remaining:
+                    return self._hedged_post(endpoint, remaining[0], payload, cost)
+                return endpoint.post(payload)
+            except HedgeExhaustedError as e:
+                # O segundo endpoint também já foi tentado
+                remaining.pop(0)
+                logging.warning(f"Falha transitória no RPC, tentando próximo endpoint: {e}")
+                last_error = e
+            except RetryableRPCError as e:
+                logging.warning(f"Falha transitória no RPC, tentando próximo endpoint: {e}")
+                last_error = e
+        raise last_error
+
+    def make_request(self, method, params):
+        if method in self._memoized:
+            return dict(self._memoized[method])
+        payload = self.encode_rpc_request(method, params)
+        function = rpc_function_label(method, params)
+        with track_rpc(method, function, self.chain) as tracker, trace_rpc(method, params, function, len(payload)) as span:
+            raw_response = self.send(payload, hedge=self.hedge and method not in NON_HEDGEABLE_METHODS)
+            response = self.decode_rpc_response(raw_response)
+            if "error" in response:
+                tracker.outcome = "rpc_error"
+            if span is not None:
+                span.response_bytes = len(raw_response)
+                span.outcome = tracker.outcome
+        if method in MEMOIZED_METHODS and "result" in response:
+            self._memoized[method] = response
+        return response
+
+    def stats(self):
+        budget = self.budget.stats()["endpoints"] if self.budget is not None else {}
+        return [dict(endpoint.stats(), budget=budget.get(endpoint.url)) for endpoint in self.endpoints]
+
+    def make_batch_request(self, calls):
+        """Envia várias chamadas (método, parâmetros) como arrays JSON-RPC 2.0.
+
+        Lotes acima de batch_max_size são divididos; as respostas voltam na
+        ordem das chamadas, cada uma com "result" ou "error".
+        """
+        responses = []
+        for start in range(0, len(calls), self.batch_max_size):
+            responses.extend(self._send_batch(calls[start:start + self.batch_max_size]))
+        return responses
+
+    def _send_batch(self, calls):
+        ids = [next(self.request_counter) for _ in calls]
+        payload = json.dumps([
+            {"jsonrpc": "2.0", "method": method, "params": params, "id": request_id}
+            for request_id, (method, params) in zip(ids, calls)
+        ]).encode()
+        hedge = self.hedge and all(method not in NON_HEDGEABLE_METHODS for method, _ in calls)
+        with track_rpc("batch", chain=self.chain), trace_rpc("batch", [], f"{len(calls)} calls", len(payload)) as span:
+            raw_response = self.send(payload, hedge=hedge, cost=len(calls))
+            if span is not None:
+                span.response_bytes = len(raw_response)
+            data = json.loads(raw_response)
+
+        if isinstance(data, dict):
+            # O nó rejeitou o lote inteiro (ex: tamanho excedido ou batch não suportado)
+            if len(calls) == 1:
+                return [data]
+            middle = len(calls) // 2
+            logging.warning(f"Lote JSON-RPC de {len(calls)} chamadas rejeitado, dividindo: {data.get('error')}")
+            return self._send_batch(calls[:middle]) + self._send_batch(calls[middle:])
+
+        by_id = {item.get("id"): item for item in data if isinstance(item, dict)}
+        for request_id, (method, params) in zip(ids, calls):
+            outcome = "rpc_error" if "error" in by_id.get(request_id, {"error": None}) else "success"
+            RPC_CALLS.labels(self.chain, method, rpc_function_label(method, params), outcome).inc()
+        return [
+            by_id.get(request_id, {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {"code": -32603, "message": "Resposta ausente no lote JSON-RPC"}
+            })
+            for request_id in ids
+        ]
+
+
+class AsyncPooledHTTPProvider(AsyncJSONBaseProvider):
+    """Versão assíncrona do PooledHTTPProvider, sobre os mesmos endpoints.
+
+    Usa os RPCEndpoint, o orçamento e o circuit breaker de `pooled`: a
+    latência e as falhas vistas pelas rotas assíncronas contam no roteamento
+    das síncronas e vice-versa. Falhas transitórias são repetidas nos próximos
+    endpoints, como em PooledHTTPProvider.send(); não há hedging.
+    """
+
+    def __init__(self, pooled):
+        super().__init__()
+        self.pooled = pooled
+        self._memoized = {}
+
+    def __str__(self):
+        return f"AsyncPooledHTTPProvider({', '.join(e.url for e in self.pooled.endpoints)})"
+
+    @property
+    def endpoint_uri(self):
+        """URL do endpoint atualmente preferido"""
+        return self.pooled.endpoint_uri
+
+    def stats(self):
+        return self.pooled.stats()
+
+    async def _next_endpoint(self, remaining, cost):
+        if self.pooled.budget is None:
+            return remaining.pop(0)
+        url = await self.pooled.budget.acquire_async([endpoint.url for endpoint in remaining], cost)
+        index = next(i for i, endpoint in enumerate(remaining) if endpoint.url == url)
+        return remaining.pop(index)
+
+    async def send(self, payload, cost=1):
+        """Envia um payload JSON-RPC já codificado, com failover entre endpoints"""
+        breaker = self.pooled.breaker
+        if breaker is not None:
+            breaker.before_call()
+        remaining = self.pooled.ranked_endpoints()[:self.pooled.max_attempts]
+        last_error = None
+        while remaining:
+            endpoint = await self._next_endpoint(remaining, cost)
+            try:
+                body = await endpoint.post_async(payload)
+            except RetryableRPCError as e:
+                logging.warning(f"Falha transitória no RPC, tentando próximo endpoint: {e}")
+                last_error = e
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return body
+        if breaker is not None:
+            breaker.record_failure()
+        raise last_error
+
+    async def make_request(self, method, params):
+        if method in self._memoized:
+            return dict(self._memoized[method])
+        payload = self.encode_rpc_request(method, params)
+        function = rpc_function_label(method, params)
+        with track_rpc(method, function, self.pooled.chain) as tracker, trace_rpc(method, params, function, len(payload)) as span:
+            raw_response = await self.send(payload)
+            response = self.decode_rpc_response(raw_response)
+            if "error" in response:
+                tracker.outcome = "rpc_error"
+            if span is not None:
+                span.response_bytes = len(raw_response)
+                span.outcome = tracker.outcome
+        if method in MEMOIZED_METHODS and "result" in response:
+            self._memoized[method] = response
+        return response
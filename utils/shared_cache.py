@@ -0,0 +1,551 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from utils.cache import LRUCache
+from utils.metrics import record_cache
+from utils.multicall import Call
+from utils.rpc_budget import current_priority
+from utils.singleflight import SingleFlight
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack só é exigido pelos backends compartilhados
+    msgpack = None
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis é opcional
+    redis = None
+
+# Tipo de extensão msgpack para inteiros acima de 64 bits (uint256 de totalSupply, liquidez...)
+BIG_INT_EXT = 1
+
+
+def _pack_default(value):
+    if isinstance(value, int):
+        return msgpack.ExtType(BIG_INT_EXT, value.to_bytes((value.bit_length() + 8) // 8, "big", signed=True))
+    raise TypeError(f"Tipo não serializável no cache: {type(value).__name__}")
+
+
+def _unpack_ext(code, data):
+    if code == BIG_INT_EXT:
+        return int.from_bytes(data, "big", signed=True)
+    return msgpack.ExtType(code, data)
+
+
+def pack_entry(value, expires_at, block):
+    """Entrada do cache em msgpack: [expiração (epoch, 0 = nunca), bloco, valor]; tuplas viram listas"""
+    return msgpack.packb([expires_at or 0, block, value], default=_pack_default, use_bin_type=True)
+
+
+def unpack_entry(data):
+    return msgpack.unpackb(data, ext_hook=_unpack_ext, raw=False)
+
+
+def is_fresh(expires_at, entry_block, block):
+    """Entrada válida: não expirou e não é de um bloco anterior ao informado"""
+    if expires_at and time.time() >= expires_at:
+        return False
+    return block is None or entry_block is None or entry_block >= block
+
+
+class CacheBackend(ABC):
+    """Interface dos backends: valores com TTL e bloco de referência.
+
+    `get(key, block=N)` trata como falha entradas gravadas em um bloco anterior a
+    N (uma entrada de bloco mais novo, gravada por outro worker, é aceita).
+    Erros do armazenamento (Redis fora do ar, disco cheio) contam como falha de
+    cache e nunca derrubam a requisição.
+    """
+
+    kind = None
+    shared = False
+
+    def __init__(self, name="shared_cache"):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._last_warning = 0
+
+    def _record(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        record_cache(self.name, hit)
+
+    def _error(self, action, e):
+        self.errors += 1
+        # Com o armazenamento fora do ar toda leitura falha; um aviso a cada 30s basta
+        if time.monotonic() - self._last_warning >= 30:
+            self._last_warning = time.monotonic()
+            logging.warning(f"Cache {self.kind}: falha em {action}: {e}")
+        else:
+            logging.debug(f"Cache {self.kind}: falha em {action}: {e}")
+
+    def get(self, key, block=None):
+        return self.get_many([key], block=block)[0]
+
+    def set(self, key, value, ttl=None, block=None):
+        self.set_many([(key, value)], ttl=ttl, block=block)
+
+    @abstractmethod
+    def get_many(self, keys, block=None):
+        """Valores das chaves na mesma ordem; None para ausentes, expiradas ou de bloco anterior"""
+
+    @abstractmethod
+    def set_many(self, items, ttl=None, block=None):
+        """Grava pares (chave, valor) com TTL em segundos (None = sem expiração) e o bloco da leitura"""
+
+    @abstractmethod
+    def delete(self, key):
+        """Remove a chave, se existir"""
+
+    @abstractmethod
+    def clear(self):
+        """Remove todas as entradas do backend"""
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": self.kind,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hitRatio": round(self.hits / total, 4) if total else 0.0
+        }
+
+
+class MemoryBackend(CacheBackend):
+    """LRU do próprio processo (sem serialização); cada worker mantém sua cópia"""
+
+    kind = "memory"
+
+    def __init__(self, maxsize=10000, name="shared_cache"):
+        super().__init__(name)
+        self._cache = LRUCache(maxsize)
+
+    def get_many(self, keys, block=None):
+        values = []
+        for key in keys:
+            entry = self._cache.get(key)
+            if entry is not None and not is_fresh(entry[0], entry[1], block):
+                self._cache.delete(key)
+                entry = None
+            self._record(entry is not None)
+            values.append(None if entry is None else entry[2])
+        return values
+
+    def set_many(self, items, ttl=None, block=None):
+        expires_at = time.time() + ttl if ttl else 0
+        for key, value in items:
+            self._cache.set(key, (expires_at, block, value))
+
+    def delete(self, key):
+        self._cache.delete(key)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return {**super().stats(), "size": len(self._cache), "maxSize": self._cache.maxsize}
+
+
+class SharedMemoryBackend(CacheBackend):
+    """Um arquivo por chave em memória compartilhada (/dev/shm), visível a todos os workers do host.
+
+    A escrita vai para um arquivo temporário renomeado sobre o definitivo
+    (atômico), então leitores nunca veem uma entrada pela metade e não há
+    lock entre processos. Quando o número de arquivos passa de `maxsize`, os
+    mais antigos são removidos.
+    """
+
+    kind = "shm"
+    shared = True
+
+    def __init__(self, directory=None, maxsize=10000, name="shared_cache", prune_every=256):
+        super().__init__(name)
+        if directory is None:
+            base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            directory = os.path.join(base, "brzstable-cache")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.maxsize = maxsize
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.blake2b(key.encode(), digest_size=16).hexdigest())
+
+    def get_many(self, keys, block=None):
+        values = []
+        for key in keys:
+            value = None
+            path = self._path(key)
+            try:
+                with open(path, "rb") as f:
+                    expires_at, entry_block, cached = unpack_entry(f.read())
+                if is_fresh(expires_at, entry_block, block):
+                    value = cached
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                self._error("leitura", e)
+            self._record(value is not None)
+            values.append(value)
+        return values
+
+    def set_many(self, items, ttl=None, block=None):
+        expires_at = time.time() + ttl if ttl else 0
+        for key, value in items:
+            path = self._path(key)
+            temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(temporary, "wb") as f:
+                    f.write(pack_entry(value, expires_at, block))
+                os.replace(temporary, path)
+            except Exception as e:
+                self._error("escrita", e)
+        with self._lock:
+            self._writes += len(items)
+            prune = self._writes >= self.prune_every
+            if prune:
+                self._writes = 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Remove arquivos temporários órfãos e, acima de maxsize, as entradas mais antigas"""
+        entries = []
+        stale = []
+        now = time.time()
+        try:
+            for entry in os.scandir(self.directory):
+                try:
+                    mtime = entry.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if entry.name.endswith(".tmp"):
+                    if now - mtime > 60:
+                        stale.append(entry.path)
+                else:
+                    entries.append((mtime, entry.path))
+        except OSError as e:
+            logging.debug(f"Cache shm: falha ao listar {self.directory}: {e}")
+            return
+        if len(entries) > self.maxsize:
+            entries.sort()
+            stale.extend(path for _, path in entries[:len(entries) - self.maxsize])
+        for path in stale:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                # Outro worker removeu o mesmo arquivo
+                pass
+
+    def delete(self, key):
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            try:
+                os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        return {**super().stats(), "directory": self.directory, "maxSize": self.maxsize}
+
+
+class RedisBackend(CacheBackend):
+    """Redis compartilhado por todos os workers e hosts; TTL aplicado pelo próprio Redis.
+
+    `client` permite injetar um cliente já criado (ex: fakeredis.FakeRedis()).
+    """
+
+    kind = "redis"
+    shared = True
+
+    def __init__(self, url=None, client=None, prefix="brzstable:", name="shared_cache", socket_timeout=0.5):
+        super().__init__(name)
+        if client is None:
+            if redis is None:
+                raise RuntimeError("Pacote redis não instalado")
+            client = redis.Redis.from_url(url, socket_timeout=socket_timeout, socket_connect_timeout=socket_timeout)
+        self.client = client
+        self.prefix = prefix
+
+    def get_many(self, keys, block=None):
+        try:
+            raw_values = self.client.mget([self.prefix + key for key in keys])
+        except Exception as e:
+            self._error("leitura", e)
+            raw_values = [None] * len(keys)
+        values = []
+        for raw in raw_values:
+            value = None
+            if raw is not None:
+                try:
+                    expires_at, entry_block, cached = unpack_entry(raw)
+                    if is_fresh(expires_at, entry_block, block):
+                        value = cached
+                except Exception as e:
+                    self._error("decodificação", e)
+            self._record(value is not None)
+            values.append(value)
+        return values
+
+    def set_many(self, items, ttl=None, block=None):
+        expires_at = time.time() + ttl if ttl else 0
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            for key, value in items:
+                pipeline.set(self.prefix + key, pack_entry(value, expires_at, block), px=int(ttl * 1000) if ttl else None)
+            pipeline.execute()
+        except Exception as e:
+            self._error("escrita", e)
+
+    def delete(self, key):
+        try:
+            self.client.delete(self.prefix + key)
+        except Exception as e:
+            self._error("remoção", e)
+
+    def clear(self):
+        try:
+            keys = list(self.client.scan_iter(match=self.prefix + "*", count=1000))
+            if keys:
+                self.client.delete(*keys)
+        except Exception as e:
+            self._error("limpeza", e)
+
+
+class ArchiveBackend(CacheBackend):
+    """Cache permanente em SQLite (modo WAL) para leituras em blocos já finalizados.
+
+    O estado de um bloco abaixo da profundidade de finalidade não muda mais,
+    então as entradas não expiram nem são removidas (a chave já inclui o
+    bloco). Os valores são bytes (retornos brutos de eth_call). O arquivo é
+    compartilhado pelos workers do host e sobrevive a reinícios.
+    """
+
+    kind = "archive"
+    shared = True
+
+    # Limite de parâmetros por consulta do SQLite
+    MAX_VARIABLES = 500
+
+    def __init__(self, path, name="archive_cache"):
+        super().__init__(name)
+        self.path = path
+        self._local = threading.local()
+        with self.connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS calls (key TEXT PRIMARY KEY, value BLOB NOT NULL) WITHOUT ROWID")
+
+    def connection(self):
+        """Conexão SQLite da thread atual (sqlite3 não compartilha conexões entre threads)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_many(self, keys, block=None):
+        found = {}
+        try:
+            conn = self.connection()
+            for start in range(0, len(keys), self.MAX_VARIABLES):
+                chunk = keys[start:start + self.MAX_VARIABLES]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(conn.execute(f"SELECT key, value FROM calls WHERE key IN ({placeholders})", chunk))
+        except Exception as e:
+            self._error("leitura", e)
+        values = []
+        for key in keys:
+            value = found.get(key)
+            self._record(value is not None)
+            values.append(value)
+        return values
+
+    def set_many(self, items, ttl=None, block=None):
+        try:
+            with self.connection() as conn:
+                conn.executemany("INSERT OR IGNORE INTO calls (key, value) VALUES (?, ?)", items)
+        except Exception as e:
+            self._error("escrita", e)
+
+    def delete(self, key):
+        try:
+            with self.connection() as conn:
+                conn.execute("DELETE FROM calls WHERE key = ?", (key,))
+        except Exception as e:
+            self._error("remoção", e)
+
+    def clear(self):
+        try:
+            with self.connection() as conn:
+                conn.execute("DELETE FROM calls")
+        except Exception as e:
+            self._error("limpeza", e)
+
+    def stats(self):
+        try:
+            size_bytes = os.path.getsize(self.path)
+        except OSError:
+            size_bytes = None
+        return {**super().stats(), "path": self.path, "sizeBytes": size_bytes}
+
+
+def create_backend(config):
+    """Backend configurado em CACHE_BACKEND (memory, shm ou redis); memória se o escolhido não puder ser usado"""
+    kind = config.CACHE_BACKEND
+    try:
+        if kind in ("shm", "redis") and msgpack is None:
+            raise RuntimeError("Pacote msgpack não instalado")
+        if kind == "shm":
+            return SharedMemoryBackend(config.CACHE_SHM_DIR, maxsize=config.CACHE_MAXSIZE)
+        if kind == "redis":
+            return RedisBackend(config.CACHE_REDIS_URL, prefix=config.CACHE_KEY_PREFIX)
+        if kind != "memory":
+            raise ValueError(f"CACHE_BACKEND desconhecido: {kind}")
+    except Exception as e:
+        logging.error(f"Cache {kind} indisponível, usando memória do processo: {e}")
+    return MemoryBackend(maxsize=config.CACHE_MAXSIZE)
+
+
+def create_archive(config):
+    """Cache permanente de leituras históricas em ARCHIVE_CACHE_PATH; None se desativado ou indisponível"""
+    if not config.ARCHIVE_CACHE_PATH:
+        return None
+    try:
+        return ArchiveBackend(config.ARCHIVE_CACHE_PATH)
+    except Exception as e:
+        logging.error(f"Cache permanente {config.ARCHIVE_CACHE_PATH} indisponível: {e}")
+        return None
+
+
+class ChainReadCache:
+    """Retornos brutos de leituras de contrato (eth_call) por rede, alvo e calldata.
+
+    Guarda o retorno ainda codificado e decodifica a cada acerto (os codecs
+    pré-compilados tornam isso barato), então qualquer leitura pode passar por
+    aqui. Com um backend compartilhado, apenas um worker paga a chamada ao RPC
+    em cada bloco. Leituras ausentes idênticas e simultâneas (mesma rede, alvo,
+    calldata, bloco e prioridade) são coalescidas por `flight`, inclusive entre rotas
+    síncronas e assíncronas, e com cached=False só a coalescência é aplicada.
+
+    Leituras em um bloco fixo (block_identifier inteiro, ex: ?block=) só são
+    cacheadas em `archive`, sem TTL e com o bloco na chave; quem chama deve
+    passar cached=True apenas para blocos já finalizados.
+    """
+
+    def __init__(self, backend, chain_id, ttl=15, flight=None, archive=None):
+        self.backend = backend
+        self.chain_id = chain_id
+        self.ttl = ttl
+        self.flight = flight or SingleFlight()
+        self.archive = archive
+
+    def key(self, call, block=None):
+        if block is not None:
+            return f"{self.chain_id}:call@{block}:{call.target}:{call.call_data.hex()}"
+        return f"{self.chain_id}:call:{call.target}:{call.call_data.hex()}"
+
+    def _layer(self, calls, block, block_identifier, cached):
+        """(backend, chaves, bloco de referência, cached) das leituras: bloco atual ou bloco fixo"""
+        if isinstance(block_identifier, int):
+            keys = [self.key(call, block_identifier) for call in calls]
+            return self.archive, keys, None, cached and self.archive is not None
+        return self.backend, [self.key(call) for call in calls], block, cached
+
+    def _lookup(self, backend, calls, keys, block, cached):
+        results = [None] * len(calls)
+        if not cached:
+            return results, list(range(len(calls)))
+        missing = []
+        for index, entry in enumerate(backend.get_many(keys, block=block)):
+            if entry is None:
+                missing.append(index)
+            else:
+                results[index] = decode_result(calls[index], True, entry)
+        return results, missing
+
+    def _flight_keys(self, keys, missing, block, block_identifier):
+        tag = block if block_identifier == "latest" else block_identifier
+        # Coalescidas dentro da mesma classe de prioridade do orçamento do RPC (ver utils/rpc_budget.py)
+        priority = current_priority()
+        return [("eth_call", keys[index], tag, priority) for index in missing]
+
+    def _raw_calls(self, calls, missing, led):
+        # Mesmas chamadas, mas sem decodificar: o cache e a coalescência trabalham com os bytes do retorno
+        return [Call(calls[missing[i]].target, calls[missing[i]].call_data, decoder=bytes) for i in led]
+
+    def _store(self, backend, keys, missing, led, raw_results, block):
+        """Grava no backend o que este chamador leu do RPC (quem esperou pela leitura não grava de novo)"""
+        entries = [
+            (keys[missing[i]], data) for i, (success, data) in zip(led, raw_results)
+            # Falhas (revert ou RPC fora do ar) não são distinguíveis aqui e não vão para o cache
+            if success
+        ]
+        if entries:
+            backend.set_many(entries, ttl=None if backend is self.archive else self.ttl, block=block)
+
+    def aggregate(self, run, calls, block=None, block_identifier="latest", cached=True):
+        """Resultados (sucesso, valor) das chamadas; as que faltam no cache são executadas por run(chamadas)"""
+        backend, keys, block, cached = self._layer(calls, block, block_identifier, cached)
+        results, missing = self._lookup(backend, calls, keys, block, cached)
+        if not missing:
+            return results
+
+        def run_led(led):
+            raw_results = run(self._raw_calls(calls, missing, led))
+            if cached:
+                self._store(backend, keys, missing, led, raw_results, block)
+            return raw_results
+
+        raw_results = self.flight.do_many(self._flight_keys(keys, missing, block, block_identifier), run_led)
+        for index, (success, data) in zip(missing, raw_results):
+            results[index] = decode_result(calls[index], success, data)
+        return results
+
+    async def aggregate_async(self, run, calls, block=None, block_identifier="latest", cached=True):
+        """Versão de aggregate() para corrotinas: run(chamadas) retorna um awaitable"""
+        backend, keys, block, cached = self._layer(calls, block, block_identifier, cached)
+        results, missing = self._lookup(backend, calls, keys, block, cached)
+        if not missing:
+            return results
+
+        async def run_led(led):
+            raw_results = await run(self._raw_calls(calls, missing, led))
+            if cached:
+                self._store(backend, keys, missing, led, raw_results, block)
+            return raw_results
+
+        raw_results = await self.flight.do_many_async(self._flight_keys(keys, missing, block, block_identifier), run_led)
+        for index, (success, data) in zip(missing, raw_results):
+            results[index] = decode_result(calls[index], success, data)
+        return results
+
+
+def decode_result(call, success, data):
+    """Decodifica um retorno bruto como decode_aggregate3 faria (falha de decodificação -> (False, None))"""
+    if not success:
+        return (False, None)
+    try:
+        return (True, call.decode(data))
+    except Exception as e:
+        logging.debug(f"Falha ao decodificar retorno de {call.target}: {e}")
+        return (False, None)
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from utils.metrics import record_flight
+
+
+class SingleFlightTimeout(TimeoutError):
+    """O chamador desistiu de esperar pela leitura em andamento de outro chamador"""
+
+
+class SingleFlight:
+    """Coalescência de leituras idênticas simultâneas (single-flight).
+
+    O primeiro chamador de uma chave executa a leitura; os que chegarem
+    enquanto ela está em andamento esperam e recebem o mesmo resultado ou a
+    mesma exceção. Assim que termina, a chave é liberada (não é um cache). A
+    espera usa concurrent.futures.Future, então threads e corrotinas (de
+    qualquer event loop) podem esperar pela mesma leitura.
+
+    As chaves são tuplas cujo primeiro item identifica o tipo de leitura
+    (ex: "eth_call"), usado como rótulo nas métricas. `timeout` é o prazo de
+    espera de quem não executa a leitura, sobrescrevível por chamada.
+    """
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def _claim(self, key):
+        """Retorna (future, True) para quem deve executar a leitura ou (future, False) para quem espera"""
+        with self._lock:
+            future = self._flights.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                # Em execução: o cancelamento de um chamador que espera não afeta os demais
+                future.set_running_or_notify_cancel()
+                self._flights[key] = future
+        record_flight(key[0], "leader" if leader else "follower")
+        return future, leader
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _wait(self, key, future, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeout:
+            record_flight(key[0], "timeout")
+            raise SingleFlightTimeout(f"Leitura {key[0]} em andamento não terminou em {timeout}s") from None
+
+    async def _wait_async(self, key, future, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout)
+        except asyncio.TimeoutError:
+            record_flight(key[0], "timeout")
+            raise SingleFlightTimeout(f"Leitura {key[0]} em andamento não terminou em {timeout}s") from None
+
+    def do(self, key, fn, timeout=None):
+        """Executa fn() ou espera pela execução em andamento da mesma chave"""
+        future, leader = self._claim(key)
+        if not leader:
+            return self._wait(key, future, timeout)
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, key, fn, timeout=None):
+        """Versão de do() para corrotinas: fn() retorna um awaitable"""
+        future, leader = self._claim(key)
+        if not leader:
+            return await self._wait_async(key, future, timeout)
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def _claim_many(self, keys):
+        claims = [self._claim(key) for key in keys]
+        led = [index for index, (_, leader) in enumerate(claims) if leader]
+        return claims, led
+
+    def _finish_many(self, keys, claims, led, results):
+        if len(results) != len(led):
+            raise ValueError(f"{len(results)} resultados para {len(led)} leituras")
+        for position, index in enumerate(led):
+            self._finish(keys[index], claims[index][0], results[position])
+
+    def _fail_many(self, keys, claims, led, error):
+        for index in led:
+            self._finish(keys[index], claims[index][0], error=error)
+
+    def do_many(self, keys, run, timeout=None):
+        """Várias leituras de uma vez: run(índices) executa, em uma única chamada, as que ninguém
+        está fazendo; as demais são esperadas. Retorna os resultados na ordem das chaves."""
+        claims, led = self._claim_many(keys)
+        if led:
+            # Primeiro executa a própria parte: dois chamadores esperando um pelo outro sempre avançam
+            try:
+                self._finish_many(keys, claims, led, run(led))
+            except BaseException as e:
+                self._fail_many(keys, claims, led, e)
+                raise
+        return [self._wait(key, future, timeout) for key, (future, _) in zip(keys, claims)]
+
+    async def do_many_async(self, keys, run, timeout=None):
+        """Versão de do_many() para corrotinas: run(índices) retorna um awaitable"""
+        claims, led = self._claim_many(keys)
+        if led:
+            try:
+                self._finish_many(keys, claims, led, await run(led))
+            except BaseException as e:
+                self._fail_many(keys, claims, led, e)
+                raise
+        return [await self._wait_async(key, future, timeout) for key, (future, _) in zip(keys, claims)]
+
+    def in_flight(self):
+        return len(self._flights)
@@ -0,0 +1,233 @@
+import cProfile
+import hmac
+import os
+import random
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import current_app, g, request
+
+# Trace da requisição atual; propagado às threads do fan-out via contextvars.copy_context()
+_current_trace = ContextVar("rpc_trace", default=None)
+
+TRACE_HEADER = "X-Debug-Trace"
+TRACE_TOKEN_HEADER = "X-Debug-Token"
+
+
+class RPCSpan:
+    """Uma chamada JSON-RPC observada durante a requisição"""
+
+    __slots__ = ("method", "to", "function", "started", "duration", "request_bytes", "response_bytes", "outcome")
+
+    def __init__(self, method, to, function, request_bytes):
+        self.method = method
+        self.to = to
+        self.function = function
+        self.started = time.perf_counter()
+        self.duration = None
+        self.request_bytes = request_bytes
+        self.response_bytes = None
+        self.outcome = "success"
+
+
+class RequestTrace:
+    """Chamadas RPC, subchamadas de multicall e tempos de decodificação de uma requisição"""
+
+    def __init__(self, max_calls=200):
+        self.max_calls = max_calls
+        self.started = time.perf_counter()
+        self.spans = []
+        self.call_count = 0
+        self.subcalls = {}
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, span):
+        with self._lock:
+            self.call_count += 1
+            if len(self.spans) < self.max_calls:
+                self.spans.append(span)
+
+    def add_subcalls(self, functions):
+        with self._lock:
+            for function in functions:
+                self.subcalls[function] = self.subcalls.get(function, 0) + 1
+
+    def add_timing(self, name, duration):
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + duration
+
+    def summary(self, include_calls=True):
+        with self._lock:
+            spans = list(self.spans)
+            by_method = {}
+            for span in spans:
+                key = f"{span.method}:{span.function}" if span.function else span.method
+                entry = by_method.setdefault(key, {"calls": 0, "totalMs": 0.0})
+                entry["calls"] += 1
+                entry["totalMs"] = round(entry["totalMs"] + (span.duration or 0) * 1000, 3)
+            summary = {
+                "elapsedMs": round((time.perf_counter() - self.started) * 1000, 3),
+                "rpcCalls": self.call_count,
+                "rpcTimeMs": round(sum(span.duration or 0 for span in spans) * 1000, 3),
+                "bytesSent": sum(span.request_bytes or 0 for span in spans),
+                "bytesReceived": sum(span.response_bytes or 0 for span in spans),
+                "byFunction": by_method,
+                "multicallSubcalls": dict(self.subcalls),
+                "timingsMs": {name: round(value * 1000, 3) for name, value in self.timings.items()},
+                "truncated": self.call_count > len(spans)
+            }
+            if include_calls:
+                summary["calls"] = [{
+                    "method": span.method,
+                    "to": span.to,
+                    "function": span.function,
+                    "offsetMs": round((span.started - self.started) * 1000, 3),
+                    "durationMs": round((span.duration or 0) * 1000, 3),
+                    "requestBytes": span.request_bytes,
+                    "responseBytes": span.response_bytes,
+                    "outcome": span.outcome
+                } for span in spans]
+            return summary
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def trace_rpc(method, params, function="", request_bytes=None):
+    """Registra a chamada no trace ativo; sem trace, não faz nada além de produzir None"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    to = params[0].get("to") if method == "eth_call" and params and isinstance(params[0], dict) else None
+    span = RPCSpan(method, to, function, request_bytes)
+    try:
+        yield span
+    except Exception:
+        span.outcome = "error"
+        raise
+    finally:
+        span.duration = time.perf_counter() - span.started
+        trace.add_span(span)
+
+
+@contextmanager
+def trace_timing(name):
+    """Acumula no trace ativo o tempo gasto em uma etapa (ex: decodificação ABI)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_timing(name, time.perf_counter() - started)
+
+
+def trace_subcalls(functions):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_subcalls(functions)
+
+
+class RequestTracer:
+    """Ativa o trace por requisição via cabeçalho X-Debug-Trace ou amostragem.
+
+    `X-Debug-Trace: 1` devolve o resumo nos cabeçalhos e, em respostas JSON,
+    no campo `_trace`; `X-Debug-Trace: profile` também grava um dump cProfile
+    em profile_dir. Requisições amostradas (sample_rate) só registram o resumo
+    no log, sem alterar a resposta.
+
+    O trace expõe contratos, chamadas e tempos do RPC: o cabeçalho só é aceito
+    com header_enabled e, se `token` for definido, acompanhado de
+    `X-Debug-Token: <token>`.
+    """
+
+    def __init__(self, app=None, sample_rate=0.0, header_enabled=False, profile_dir=None, max_calls=200, token=None):
+        self.sample_rate = sample_rate
+        self.header_enabled = header_enabled
+        self.token = token
+        self.profile_dir = profile_dir
+        self.max_calls = max_calls
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self.start_trace)
+        app.after_request(self.finish_trace)
+        app.teardown_request(self.discard_trace)
+
+    def _header_allowed(self):
+        if not self.header_enabled:
+            return False
+        if self.token is None:
+            return True
+        return hmac.compare_digest(request.headers.get(TRACE_TOKEN_HEADER, "").encode(), self.token.encode())
+
+    def start_trace(self):
+        mode = request.headers.get(TRACE_HEADER, "").lower()
+        if mode and not self._header_allowed():
+            mode = ""
+        requested = mode in ("1", "true", "profile")
+        if not requested and not (self.sample_rate and random.random() < self.sample_rate):
+            return
+        g._rpc_trace = RequestTrace(self.max_calls)
+        g._rpc_trace_token = _current_trace.set(g._rpc_trace)
+        g._rpc_trace_requested = requested
+        if mode == "profile" and self.profile_dir:
+            g._rpc_profiler = cProfile.Profile()
+            g._rpc_profiler.enable()
+
+    def finish_trace(self, response):
+        trace = g.get("_rpc_trace")
+        if trace is None:
+            return response
+        profiler = g.pop("_rpc_profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            response.headers["X-Profile-File"] = self._dump_profile(profiler)
+
+        summary = trace.summary(include_calls=g.get("_rpc_trace_requested", False))
+        response.headers["Server-Timing"] = (
+            f'rpc;dur={summary["rpcTimeMs"]};desc="{summary["rpcCalls"]} calls", '
+            f'app;dur={summary["elapsedMs"]}'
+        )
+        response.headers["X-RPC-Calls"] = str(summary["rpcCalls"])
+        response.headers["X-RPC-Time-Ms"] = str(summary["rpcTimeMs"])
+        response.headers["X-RPC-Bytes"] = f'{summary["bytesSent"]}/{summary["bytesReceived"]}'
+
+        if not g.get("_rpc_trace_requested"):
+            logging.info(f"Trace RPC {request.method} {request.path}: {summary}")
+        elif response.is_json and not response.is_streamed:
+            # Resumo completo no corpo apenas quando o cliente pediu o trace
+            body = response.get_json(silent=True)
+            if isinstance(body, dict):
+                body["_trace"] = summary
+                response.set_data(current_app.json.dumps(body))
+        return response
+
+    def _dump_profile(self, profiler):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        endpoint = (request.endpoint or "unmatched").replace(".", "_")
+        path = os.path.join(self.profile_dir, f"{int(time.time() * 1000)}-{endpoint}.prof")
+        profiler.dump_stats(path)
+        return os.path.basename(path)
+
+    def discard_trace(self, _exc):
+        token = g.pop("_rpc_trace_token", None)
+        g.pop("_rpc_trace", None)
+        profiler = g.pop("_rpc_profiler", None)
+        if profiler is not None:
+            profiler.disable()
+        if token is not None:
+            try:
+                _current_trace.reset(token)
+            except ValueError:
+                # Token criado em outro contexto (ex: view async): apenas desativar
+                _current_trace.set(None)